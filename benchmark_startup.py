@@ -0,0 +1,38 @@
+"""
+Measure the startup time of pyprince commands, which run in a new process on every call of the npm package.
+Every command is started several times, the minimum and median wall times are printed in milliseconds.
+ex: python benchmark_startup.py --runs 20 --launcher "python build/pyprince.pyz"
+"""
+
+import argparse
+import shlex
+import statistics
+import subprocess
+import time
+
+DEFAULT_COMMANDS = ["version", "--help"]
+
+
+def measure(command, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), statistics.median(times)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("commands", nargs="*", help=f"pyprince commands to measure (default: {DEFAULT_COMMANDS})")
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("--launcher", default="python -m pyprince", help="How pyprince is started")
+    args = arg_parser.parse_args()
+
+    launcher = shlex.split(args.launcher)
+    for command in args.commands or DEFAULT_COMMANDS:
+        full_command = launcher + shlex.split(command)
+        # The first run fills the bytecode cache, it is not measured
+        subprocess.run(full_command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        min_ms, median_ms = measure(full_command, args.runs)
+        print(f"{command:<40} min {min_ms:8.1f} ms   median {median_ms:8.1f} ms")
@@ -1,12 +1,23 @@
 """
 Build a pyz package for pyprince into the /build folder using shiv and pip.
 This script should be started from the venv that contains the dev deps of pyprince.
+
+With --no-extract, the pyz is a plain zipapp instead, which python imports directly from the archive.
+Its modules are precompiled, so nothing is extracted or compiled when it is launched.
+The bytecode is only used by the python version that built it, other versions compile the sources on every launch.
+Native extension modules can not be imported from a zip archive, so their pure python fallbacks are used
+(ex: the pure python parser of libcst, which pyprince uses anyway).
 """
 
+import argparse
+import compileall
+import shutil
 import subprocess
 import venv
 import os
 import sys
+import zipapp
+import zipfile
 from pathlib import Path
 
 print("Building pyprince pyz package")
@@ -19,12 +30,7 @@ def run(command, **kwargs):
     return subprocess.run(command.split(), check=True, **kwargs)
 
 
-if __name__ == "__main__":
-    os.makedirs("build", exist_ok=True)
-    res = run(
-        "poetry export -f requirements.txt --without-hashes -o build/requirements.txt", capture_output=True, shell=True
-    )
-
+def build_shiv_pyz():
     # Create venv for building
     print("Create build/build_venv")
     builder = venv.EnvBuilder(clear=True, with_pip=True)
@@ -40,3 +46,58 @@ if __name__ == "__main__":
         "python -m shiv -c pyprince -o build/pyprince.pyz --compressed --site-packages ./build/build_venv/Lib/site-packages",
         shell=True,
     )
+
+
+def build_zipapp_pyz():
+    app_dir = Path("build/zipapp")
+    if app_dir.exists():
+        shutil.rmtree(app_dir)
+
+    print(f"Install deps into {app_dir}")
+    run(f"{sys.executable} -m pip install --no-cache-dir --target {app_dir} -r build/requirements.txt")
+    run(f"{sys.executable} -m pip install --no-cache-dir --no-deps --target {app_dir} .")
+    # Scripts and package metadata are not needed to run from the archive
+    shutil.rmtree(app_dir / "bin", ignore_errors=True)
+    for dist_info in app_dir.glob("*.dist-info"):
+        shutil.rmtree(dist_info)
+
+    print("Precompile bytecode")
+    # zipimport only loads bytecode next to the source files, and it can not write them, so they are compiled here.
+    # Unchecked hashes are used, because the mtimes of the sources are not kept in the archive.
+    compileall.compile_dir(
+        str(app_dir),
+        quiet=1,
+        legacy=True,
+        invalidation_mode=compileall.py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+    (app_dir / "__main__.py").write_text("from pyprince import console_entry_main\n\nconsole_entry_main()\n")
+
+    print("Build pyz file")
+    zipapp.create_archive(app_dir, "build/pyprince.pyz", compressed=True)
+
+
+def check_stdlib_packs(pyz_path: str):
+    # The packs are generated files, which are easily left out of the installed package
+    with zipfile.ZipFile(pyz_path) as archive:
+        packs = [name for name in archive.namelist() if "pyprince/stdlib_packs/" in name and name.endswith(".json")]
+    if not packs:
+        sys.exit(f"No stdlib pack was found in {pyz_path}, run build_stdlib_packs.py before building it")
+    print(f"Stdlib packs in {pyz_path}: {', '.join(Path(name).name for name in packs)}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--no-extract", action="store_true", help="Build a zipapp, which runs without extracting itself"
+    )
+    args = arg_parser.parse_args()
+
+    os.makedirs("build", exist_ok=True)
+    res = run(
+        "poetry export -f requirements.txt --without-hashes -o build/requirements.txt", capture_output=True, shell=True
+    )
+    if args.no_extract:
+        build_zipapp_pyz()
+    else:
+        build_shiv_pyz()
+    check_stdlib_packs("build/pyprince.pyz")
@@ -0,0 +1,46 @@
+"""
+Generate the stdlib packs of pyprince into pyprince/stdlib_packs, before the pyz package is built.
+Every python executable given as argument gets its own build venv, where pyprince is installed and run,
+so a pack is created for each supported python version. Without arguments the current python is used.
+ex: python build_stdlib_packs.py python3.9 python3.10 python3.11 python3.12
+"""
+
+import subprocess
+import os
+import sys
+from pathlib import Path
+
+print("Building pyprince stdlib packs")
+print(f"Current path: {Path('.').resolve()}")
+
+
+def run(command, **kwargs):
+    print(f"Running: {command}")
+    return subprocess.run(command, check=True, **kwargs)
+
+
+def venv_executable(venv_dir: Path, name: str) -> str:
+    scripts_dir = venv_dir / ("Scripts" if os.name == "nt" else "bin")
+    return str(scripts_dir / name)
+
+
+if __name__ == "__main__":
+    pythons = sys.argv[1:] or [sys.executable]
+    packs_dir = (Path("pyprince") / "stdlib_packs").resolve()
+    os.makedirs("build", exist_ok=True)
+    for python in pythons:
+        version = run(
+            [python, "-c", "import sys; print(f'{sys.version_info.major}.{sys.version_info.minor}')"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        venv_dir = Path("build") / f"pack_venv_{version}"
+        print(f"Create {venv_dir} with {python}")
+        # The venv is created by the python of the pack, so the stdlib of that python is parsed
+        run([python, "-m", "venv", "--clear", str(venv_dir)])
+
+        print(f"Install pyprince into {venv_dir}")
+        run([venv_executable(venv_dir, "pip"), "install", "--no-cache-dir", "."])
+
+        print(f"Pack stdlib of python {version}")
+        run([venv_executable(venv_dir, "pyprince"), "pack-stdlib", "-o", str(packs_dir)])
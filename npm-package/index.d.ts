@@ -4,8 +4,55 @@ export interface PyPrinceStats extends fs.Stats {
     filePath: string;
 }
 
+export interface PyPrincePoolProgress {
+    queued: number;
+    running: number;
+    completed: number;
+    failed: number;
+    restarts: number;
+}
+
+/** Progress of a parse, reported by commands called with '--progress json'. */
+export interface PyPrinceCommandProgress {
+    event: "progress" | "finished";
+    parsed: number;
+    cached: number;
+    queued: number;
+    elapsed: number;
+    modules_per_second: number;
+    cache_hit_ratio: number;
+    eta: number | null;
+}
+
+export interface PyPrincePoolOptions {
+    pythonExecutablePath?: string;
+    pyprincePath?: string;
+    /** Number of worker processes, which is the number of commands running concurrently. */
+    workers?: number;
+    /** Commands running longer than this are rejected, and their worker is restarted. */
+    timeoutMs?: number;
+    maxQueueSize?: number;
+    onProgress?: (progress: PyPrincePoolProgress) => void;
+    onCommandProgress?: (progress: PyPrinceCommandProgress, args: string[]) => void;
+}
+
+export class PyPrinceError extends Error {
+    /** What the command printed before it failed. */
+    output: string;
+}
+
+export class PyPrincePool {
+  constructor(options?: PyPrincePoolOptions);
+  call(...args: string[]): Promise<string>;
+  run(args: string[], options?: { timeoutMs?: number }): Promise<string>;
+  close(): Promise<void>;
+}
+
 export class PyPrince {
   constructor(pythonExecutablePath?: string);
   callPrince(...args: string[]): string;
+  callPrinceAsync(...args: string[]): Promise<string>;
+  createPool(options?: PyPrincePoolOptions): PyPrincePool;
+  close(): Promise<void>;
   async getPrinceInfo(): PyPrinceStats | Error;
 }
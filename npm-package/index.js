@@ -1,8 +1,10 @@
 'use strict';
 
-const path = require("node:path"); 
-const fs = require("node:fs"); 
-const { execFileSync } = require("node:child_process");
+const path = require("node:path");
+const fs = require("node:fs");
+const os = require("node:os");
+const readline = require("node:readline");
+const { execFileSync, spawn } = require("node:child_process");
 
 class PyPrince {
     // By default we use the first one on PATH. TODO: Probably this is different on linux/windows..
@@ -11,11 +13,39 @@ class PyPrince {
     constructor(pythonExecutablePath = PyPrince.defaultPythonPath) {
         this.pythonExecutablePath = pythonExecutablePath;
         this.pyprincePath = path.join(__dirname, "pyprince.pyz");
+        this.pool = null;
     }
 
     callPrince(...args) {
         return execFileSync(this.pythonExecutablePath, [this.pyprincePath, ...args]).toString();
-        // TODO: Check result field 
+        // TODO: Check result field
+    }
+
+    /**
+     * Runs the command in a persistent worker process, without blocking the event loop.
+     * The workers are started on the first call, and are kept until close() is called.
+     */
+    async callPrinceAsync(...args) {
+        if (this.pool === null) {
+            this.pool = this.createPool();
+        }
+        return this.pool.call(...args);
+    }
+
+    createPool(options = {}) {
+        return new PyPrincePool({
+            pythonExecutablePath: this.pythonExecutablePath,
+            pyprincePath: this.pyprincePath,
+            ...options,
+        });
+    }
+
+    async close() {
+        if (this.pool !== null) {
+            const pool = this.pool;
+            this.pool = null;
+            await pool.close();
+        }
     }
 
     async getPrinceInfo() {
@@ -29,4 +59,262 @@ class PyPrince {
     }
 };
 
-module.exports = { PyPrince };
\ No newline at end of file
+class PyPrinceError extends Error {
+    constructor(message, output = "") {
+        super(message);
+        this.name = "PyPrinceError";
+        this.output = output;
+    }
+}
+
+/**
+ * A pyprince process started with the 'serve' command.
+ * Requests are written to its stdin and responses are read from its stdout as JSON lines, matched by their ids.
+ */
+class PyPrinceWorker {
+    constructor(pythonExecutablePath, pyprincePath, onExit, onEvent = null) {
+        this.pending = new Map();
+        this.nextId = 0;
+        this.exited = false;
+        this.isReady = false;
+        this.process = spawn(pythonExecutablePath, [pyprincePath, "serve"], { stdio: ["pipe", "pipe", "pipe"] });
+        this.stderr = "";
+
+        this.ready = new Promise((resolve, reject) => {
+            this.resolveReady = resolve;
+            this.rejectReady = reject;
+        });
+        // Avoid unhandled rejections, the failure is reported to the requests too
+        this.ready.catch(() => {});
+
+        readline.createInterface({ input: this.process.stdout }).on("line", (line) => this.onLine(line));
+        readline.createInterface({ input: this.process.stderr }).on("line", (line) => this.onErrorLine(line));
+        // Writing to a crashed worker fails, the crash itself is reported by the exit event
+        this.process.stdin.on("error", () => {});
+        this.process.on("error", (err) => this.onExit(err));
+        this.process.on("exit", (code, signal) => {
+            this.onExit(new PyPrinceError(`pyprince worker exited with code ${code}, signal ${signal}: ${this.stderr}`));
+        });
+        this.exitCallback = onExit;
+        this.eventCallback = onEvent;
+        this.currentArgs = null;
+    }
+
+    onErrorLine(line) {
+        // Commands called with '--progress json' report their progress as JSON lines on stderr
+        if (line.startsWith("{")) {
+            try {
+                const event = JSON.parse(line);
+                if (this.eventCallback !== null) {
+                    this.eventCallback(event, this.currentArgs);
+                }
+                return;
+            } catch (err) {
+                // Not a progress event
+            }
+        }
+        // Keep the end of stderr, to explain crashes
+        this.stderr = (this.stderr + line + "\n").slice(-4096);
+    }
+
+    onLine(line) {
+        let message;
+        try {
+            message = JSON.parse(line);
+        } catch (err) {
+            return; // Not a protocol message
+        }
+        if (message.ready) {
+            this.isReady = true;
+            this.resolveReady();
+            return;
+        }
+        const request = this.pending.get(message.id);
+        if (request === undefined) {
+            return;
+        }
+        this.pending.delete(message.id);
+        if (message.ok) {
+            request.resolve(message.output);
+        } else {
+            request.reject(new PyPrinceError(message.error, message.output));
+        }
+    }
+
+    onExit(err) {
+        if (this.exited) {
+            return;
+        }
+        this.exited = true;
+        this.rejectReady(err);
+        for (const request of this.pending.values()) {
+            request.reject(err);
+        }
+        this.pending.clear();
+        this.exitCallback(this, err);
+    }
+
+    async send(args) {
+        await this.ready;
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            this.process.stdin.write(JSON.stringify({ id, args }) + "\n");
+        });
+    }
+
+    kill() {
+        this.process.stdin.end();
+        this.process.kill();
+    }
+}
+
+/**
+ * A pool of persistent pyprince worker processes.
+ * Every worker runs one command at a time, so at most 'workers' commands run concurrently, the rest are queued.
+ * Workers which crash or exceed the timeout of their command are replaced with new ones.
+ */
+class PyPrincePool {
+    constructor({
+        pythonExecutablePath = PyPrince.defaultPythonPath,
+        pyprincePath = path.join(__dirname, "pyprince.pyz"),
+        workers = Math.max(1, Math.min(4, os.cpus().length - 1)),
+        timeoutMs = 120000,
+        maxQueueSize = Infinity,
+        onProgress = null,
+        onCommandProgress = null,
+    } = {}) {
+        this.pythonExecutablePath = pythonExecutablePath;
+        this.pyprincePath = pyprincePath;
+        this.workerCount = workers;
+        this.timeoutMs = timeoutMs;
+        this.maxQueueSize = maxQueueSize;
+        this.onProgress = onProgress;
+        this.onCommandProgress = onCommandProgress;
+
+        this.idleWorkers = [];
+        this.busyWorkers = new Set();
+        this.queue = [];
+        this.closed = false;
+        this.stats = { queued: 0, running: 0, completed: 0, failed: 0, restarts: 0 };
+        for (let i = 0; i < this.workerCount; i++) {
+            this.idleWorkers.push(this.startWorker());
+        }
+    }
+
+    call(...args) {
+        return this.run(args);
+    }
+
+    /** Queues the command, options.timeoutMs overrides the timeout of the pool. */
+    run(args, { timeoutMs = this.timeoutMs } = {}) {
+        if (this.closed) {
+            return Promise.reject(new PyPrinceError("pyprince pool is closed"));
+        }
+        if (this.queue.length >= this.maxQueueSize) {
+            return Promise.reject(new PyPrinceError(`pyprince pool queue is full (${this.maxQueueSize})`));
+        }
+        return new Promise((resolve, reject) => {
+            this.queue.push({ args, timeoutMs, resolve, reject });
+            this.reportProgress();
+            this.dispatch();
+        });
+    }
+
+    async close() {
+        this.closed = true;
+        for (const request of this.queue) {
+            request.reject(new PyPrinceError("pyprince pool is closed"));
+        }
+        this.queue = [];
+        for (const worker of [...this.idleWorkers, ...this.busyWorkers]) {
+            worker.kill();
+        }
+        this.idleWorkers = [];
+        this.busyWorkers.clear();
+    }
+
+    startWorker() {
+        return new PyPrinceWorker(
+            this.pythonExecutablePath,
+            this.pyprincePath,
+            (worker) => this.onWorkerExit(worker),
+            (event, args) => {
+                if (this.onCommandProgress !== null) {
+                    this.onCommandProgress(event, args);
+                }
+            },
+        );
+    }
+
+    onWorkerExit(worker) {
+        if (this.closed) {
+            return;
+        }
+        // The request of a busy worker is rejected by the worker, its slot is refilled when the request settles.
+        // Workers which could not start are replaced by the next request, so a missing python is not restarted forever.
+        const idleIndex = this.idleWorkers.indexOf(worker);
+        if (idleIndex >= 0 && worker.isReady) {
+            this.idleWorkers.splice(idleIndex, 1);
+            this.stats.restarts++;
+            this.idleWorkers.push(this.startWorker());
+        }
+    }
+
+    dispatch() {
+        while (this.queue.length > 0 && this.idleWorkers.length > 0) {
+            const request = this.queue.shift();
+            const worker = this.idleWorkers.pop();
+            this.busyWorkers.add(worker);
+            this.execute(worker, request);
+        }
+        this.reportProgress();
+    }
+
+    async execute(worker, request) {
+        let timer = null;
+        const timeout = new Promise((_, reject) => {
+            timer = setTimeout(() => {
+                reject(new PyPrinceError(`pyprince command timed out after ${request.timeoutMs} ms: ${request.args.join(" ")}`));
+            }, request.timeoutMs);
+        });
+        let failed = false;
+        worker.currentArgs = request.args;
+        try {
+            request.resolve(await Promise.race([worker.send(request.args), timeout]));
+            this.stats.completed++;
+        } catch (err) {
+            failed = true;
+            this.stats.failed++;
+            request.reject(err);
+        } finally {
+            clearTimeout(timer);
+            worker.currentArgs = null;
+        }
+
+        this.busyWorkers.delete(worker);
+        if (this.closed) {
+            worker.kill();
+            return;
+        }
+        if (worker.exited || (failed && worker.pending.size > 0)) {
+            // The worker crashed, or it is still running the timed out command, which can not be cancelled
+            worker.kill();
+            this.stats.restarts++;
+            this.idleWorkers.push(this.startWorker());
+        } else {
+            this.idleWorkers.push(worker);
+        }
+        this.dispatch();
+    }
+
+    reportProgress() {
+        this.stats.queued = this.queue.length;
+        this.stats.running = this.busyWorkers.size;
+        if (this.onProgress !== null) {
+            this.onProgress({ ...this.stats });
+        }
+    }
+}
+
+module.exports = { PyPrince, PyPrincePool, PyPrinceError };
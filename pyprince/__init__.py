@@ -1 +1,13 @@
-from .main import console_entry_main
+import sys
+
+__version__ = "0.0.5"
+
+
+def console_entry_main():
+    # Printing the version does not need the command line app, which takes most of the startup time to import
+    if sys.argv[1:] in [["version"], ["--version"]]:
+        print(f"pyprince version: {__version__}")
+        return
+    from pyprince.main import console_entry_main as main
+
+    main()
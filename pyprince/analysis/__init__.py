@@ -0,0 +1,4 @@
+from pyprince.analysis.module_graph import ModuleGraph
+from pyprince.analysis.cycles import ImportCycle, find_strongly_connected_components, find_import_cycles
+from pyprince.analysis.layers import find_reachable, find_topological_layers
+from pyprince.analysis.footprint import Footprint, PackageFootprint, compute_footprint
@@ -0,0 +1,108 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List
+
+from pyprince.analysis.module_graph import ModuleGraph
+
+
+@dataclass
+class ImportCycle:
+    """A strongly connected component of the import graph, which has more than one module or imports itself."""
+
+    modules: List[str]  # Sorted member modules
+    path: List[str]  # A shortest cycle through the first member, which starts and ends with it
+
+    def to_dict(self):
+        return {"modules": self.modules, "path": self.path}
+
+
+def find_strongly_connected_components(graph: ModuleGraph) -> List[List[int]]:
+    """
+    Finds the strongly connected components of the graph with Tarjan's algorithm in linear time.
+    The recursion of the algorithm is replaced by an explicit stack, so deep graphs do not hit the recursion limit.
+    Components are returned in reverse topological order: every component comes after the components it imports.
+    """
+    node_count = len(graph)
+    index = [-1] * node_count
+    low_link = [0] * node_count
+    on_stack = [False] * node_count
+    component_stack: List[int] = []
+    components: List[List[int]] = []
+    next_index = 0
+
+    for start in range(node_count):
+        if index[start] != -1:
+            continue
+        # Frames of the explicit call stack: (node, position of the next successor to visit)
+        call_stack = [(start, 0)]
+        index[start] = low_link[start] = next_index
+        next_index += 1
+        component_stack.append(start)
+        on_stack[start] = True
+        while call_stack:
+            node, position = call_stack[-1]
+            successors = graph.successors[node]
+            if position < len(successors):
+                call_stack[-1] = (node, position + 1)
+                successor = successors[position]
+                if index[successor] == -1:
+                    index[successor] = low_link[successor] = next_index
+                    next_index += 1
+                    component_stack.append(successor)
+                    on_stack[successor] = True
+                    call_stack.append((successor, 0))
+                elif on_stack[successor] and index[successor] < low_link[node]:
+                    low_link[node] = index[successor]
+                continue
+
+            call_stack.pop()
+            if call_stack:
+                parent = call_stack[-1][0]
+                if low_link[node] < low_link[parent]:
+                    low_link[parent] = low_link[node]
+            if low_link[node] == index[node]:
+                component = []
+                while True:
+                    member = component_stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def find_import_cycles(graph: ModuleGraph) -> List[ImportCycle]:
+    """
+    Reports the import cycles of the graph, the largest ones first.
+    Every cycle has a shortest path through its first module, found by a breadth-first search inside the component.
+    """
+    cycles = []
+    for component in find_strongly_connected_components(graph):
+        if len(component) == 1 and component[0] not in graph.successors[component[0]]:
+            continue
+        members = sorted(component, key=lambda node: graph.names[node])
+        path = _find_shortest_cycle(graph, members[0], set(component))
+        cycles.append(ImportCycle([graph.names[node] for node in members], [graph.names[node] for node in path]))
+    cycles.sort(key=lambda cycle: (-len(cycle.modules), cycle.modules[0]))
+    return cycles
+
+
+def _find_shortest_cycle(graph: ModuleGraph, start: int, component: set) -> List[int]:
+    parents: Dict[int, int] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for successor in graph.successors[node]:
+            if successor == start:
+                path = [node]
+                while node != start:
+                    node = parents[node]
+                    path.append(node)
+                path.reverse()
+                path.append(start)
+                return path
+            if successor in component and successor not in parents:
+                parents[successor] = node
+                queue.append(successor)
+    return [start]
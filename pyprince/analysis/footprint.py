@@ -0,0 +1,133 @@
+from dataclasses import dataclass, field
+import os
+from typing import Dict, List, Optional, Set
+
+from pyprince.analysis.cycles import find_strongly_connected_components
+from pyprince.analysis.module_graph import ModuleGraph
+from pyprince.parser import ImportKind, Project, constants
+
+
+@dataclass
+class PackageFootprint:
+    type: str
+    modules: int  # Modules of the package
+    source_bytes: int  # Size of the files of the package modules
+    reach: int  # Modules imported transitively by the package modules, the package modules included
+    reach_bytes: int  # Size of the files of the transitively imported modules
+
+
+@dataclass
+class Footprint:
+    """The transitive dependencies of the modules and packages of a project."""
+
+    # Number of modules imported transitively by a module, the module itself is not counted
+    module_reach: Dict[str, int] = field(default_factory=dict)
+    packages: Dict[str, PackageFootprint] = field(default_factory=dict)
+
+    def to_dict(self):
+        packages = sorted(self.packages.items(), key=lambda item: (-item[1].reach_bytes, item[0]))
+        modules = sorted(self.module_reach.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            "packages": {name: package.__dict__ for name, package in packages},
+            "modules": dict(modules),
+        }
+
+
+def compute_footprint(proj: Project, skip_import_kinds: Optional[Set[ImportKind]] = None) -> Footprint:
+    """
+    Computes the transitive closure of every module over the graph of condensed import cycles.
+    Closures are bitsets (python ints), where the bit of a module is its position in the order of the components,
+    so the closures of components which are close in the graph share their low bits.
+    Components are processed after the components they import, so every closure is built from the closures of the
+    imported components, and a closure is freed as soon as all the components importing it are done.
+    """
+    graph = ModuleGraph.from_project(proj, skip_import_kinds)
+    components = find_strongly_connected_components(graph)
+
+    component_of = [0] * len(graph)
+    bit_of = [0] * len(graph)
+    node_of_bit: List[int] = []
+    for component_id, component in enumerate(components):
+        for node in component:
+            component_of[node] = component_id
+            bit_of[node] = len(node_of_bit)
+            node_of_bit.append(node)
+
+    # Number of imports of a component from other components, which still need its closure
+    pending_importers = [0] * len(components)
+    for node, successors in enumerate(graph.successors):
+        for successor in successors:
+            if component_of[successor] != component_of[node]:
+                pending_importers[component_of[successor]] += 1
+
+    package_of_node: Dict[int, str] = {}
+    for package_name in proj.list_packages():
+        package = proj.get_package(package_name)
+        if package is not None:
+            for node in graph.get_ids(package.modules):
+                package_of_node[node] = package_name
+    package_closures: Dict[str, int] = {}
+
+    result = Footprint()
+    closures: Dict[int, int] = {}
+    for component_id, component in enumerate(components):
+        closure = 0
+        for node in component:
+            closure |= 1 << bit_of[node]
+        for node in component:
+            for successor in graph.successors[node]:
+                successor_component = component_of[successor]
+                if successor_component == component_id:
+                    continue
+                closure |= closures[successor_component]
+                pending_importers[successor_component] -= 1
+                if pending_importers[successor_component] == 0:
+                    del closures[successor_component]
+        if pending_importers[component_id] > 0:
+            closures[component_id] = closure
+
+        reach = _count_bits(closure) - 1
+        for node in component:
+            result.module_reach[graph.names[node]] = reach
+            package_name = package_of_node.get(node, None)
+            if package_name is not None:
+                package_closures[package_name] = package_closures.get(package_name, 0) | closure
+
+    module_sizes = [_get_source_size(proj, name) for name in graph.names]
+    for package_name, package_closure in package_closures.items():
+        package = proj.get_package(package_name)
+        assert package is not None
+        package_nodes = graph.get_ids(package.modules)
+        reached_nodes = [node_of_bit[bit] for bit in _iter_bits(package_closure)]
+        result.packages[package_name] = PackageFootprint(
+            type=package.package_type.name,
+            modules=len(package_nodes),
+            source_bytes=sum(module_sizes[node] for node in package_nodes),
+            reach=len(reached_nodes),
+            reach_bytes=sum(module_sizes[node] for node in reached_nodes),
+        )
+    return result
+
+
+def _count_bits(bits: int) -> int:
+    # int.bit_count is only available from python 3.10
+    return bin(bits).count("1")
+
+
+def _iter_bits(bits: int):
+    """Yields the positions of the set bits. The positions are found in the binary text, which is linear."""
+    text = bin(bits)[:1:-1]
+    position = text.find("1")
+    while position != -1:
+        yield position
+        position = text.find("1", position + 1)
+
+
+def _get_source_size(proj: Project, module_name: str) -> int:
+    mod = proj.get_module(module_name)
+    if mod is None or mod.path is None or mod.path in [constants.BUILTIN, constants.FROZEN]:
+        return 0
+    try:
+        return os.path.getsize(mod.path) if os.path.isfile(mod.path) else 0
+    except OSError:
+        return 0
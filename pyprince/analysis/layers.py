@@ -0,0 +1,57 @@
+from collections import deque
+from typing import List, Optional
+
+from pyprince.analysis.cycles import find_strongly_connected_components
+from pyprince.analysis.module_graph import ModuleGraph
+
+
+def find_reachable(graph: ModuleGraph, roots: List[int]) -> List[bool]:
+    """Flags the nodes which are reachable from the roots, the roots included."""
+    reachable = [False] * len(graph)
+    queue = deque(roots)
+    for root in roots:
+        reachable[root] = True
+    while queue:
+        node = queue.popleft()
+        for successor in graph.successors[node]:
+            if not reachable[successor]:
+                reachable[successor] = True
+                queue.append(successor)
+    return reachable
+
+
+def find_topological_layers(graph: ModuleGraph, roots: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Orders the modules reachable from the roots (all modules if roots is None) into layers, dependencies first.
+    Every module only imports modules of earlier layers, so the modules of a layer can be processed concurrently
+    once the earlier layers are done. The modules of an import cycle can not be ordered, they share a layer.
+    The layer of a module is the length of the longest import chain below it, over the graph of condensed cycles.
+    """
+    reachable = find_reachable(graph, roots) if roots is not None else [True] * len(graph)
+    # Components come after the components they import, so the layers of the imported ones are already known
+    components = find_strongly_connected_components(graph)
+    component_of = [0] * len(graph)
+    for component_id, component in enumerate(components):
+        for node in component:
+            component_of[node] = component_id
+
+    component_layers = [0] * len(components)
+    layers: List[List[int]] = []
+    for component_id, component in enumerate(components):
+        # Reachability is closed under imports, so a component is either fully reachable or not at all
+        if not reachable[component[0]]:
+            continue
+        layer = 0
+        for node in component:
+            for successor in graph.successors[node]:
+                successor_component = component_of[successor]
+                if successor_component != component_id:
+                    layer = max(layer, component_layers[successor_component] + 1)
+        component_layers[component_id] = layer
+        while len(layers) <= layer:
+            layers.append([])
+        layers[layer].extend(component)
+
+    for layer_nodes in layers:
+        layer_nodes.sort(key=lambda node: graph.names[node])
+    return layers
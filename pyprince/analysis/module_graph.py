@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+from pyprince.parser import ImportKind, Project
+
+
+class ModuleGraph:
+    """
+    The import graph of a project with interned module ids, for analyses which walk the whole graph.
+    Module names are mapped to ids (0..n-1), and the imports of every module are stored as a list of ids.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.successors: List[List[int]] = []
+
+    @staticmethod
+    def from_project(proj: Project, skip_import_kinds: Optional[Set[ImportKind]] = None) -> "ModuleGraph":
+        """
+        Builds the graph from the edges of the project. Imports of modules which are not in the project are kept,
+        their targets are nodes without successors.
+        Edges which are only imported in the contexts of skip_import_kinds (ex: TypeChecking) are left out.
+        """
+        graph = ModuleGraph()
+        for mod in proj.iter_modules():
+            graph.add_node(mod.name)
+        for edge in proj.iter_edges():
+            if skip_import_kinds and edge.kinds.issubset(skip_import_kinds):
+                continue
+            graph.add_edge(edge.source, edge.target)
+        return graph
+
+    def add_node(self, name: str) -> int:
+        node = self.ids.get(name, None)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.successors.append([])
+        return node
+
+    def add_edge(self, source: str, target: str):
+        # Modules list their imports once, so the edges are not deduplicated
+        source_id = self.add_node(source)
+        self.successors[source_id].append(self.add_node(target))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_ids(self, names: Iterable[str]) -> List[int]:
+        """Ids of the given modules, modules which are not in the graph are left out."""
+        return [self.ids[name] for name in names if name in self.ids]
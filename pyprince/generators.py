@@ -1,9 +1,14 @@
 from dataclasses import dataclass, field
 import dataclasses
 from collections import defaultdict
-from typing import List, Set
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import zipfile
 
-from pyprince.parser import Project, Module, Package, PackageType
+from pyprince.parser import ImportKind, ModuleKind, Project, Module, Package, PackageType
+from pyprince.parser import constants
+from pyprince.transformer import optimize_module
+from pyprince.utils import logger
 
 
 @dataclass
@@ -12,31 +17,268 @@ class PackageDescriptor:
     modules: Set[str] = field(default_factory=set)
 
 
+@dataclass
+class SymbolDescriptor:
+    module: str
+    kind: str = "Unknown"
+
+
+@dataclass
+class TimingDescriptor:
+    self_us: int
+    cumulative_us: int
+    order: int
+    loaded_by: Optional[str] = None
+
+
 class DependencyDescriptor:
     def __init__(self) -> None:
         self.nodes: List[str] = []
         self.edges: dict[str, List[str]] = defaultdict(list)
         self.packages: dict[str, PackageDescriptor] = defaultdict(PackageDescriptor)
+        self.symbols: dict[str, SymbolDescriptor] = {}
+        self.import_kinds: dict[str, dict[str, List[str]]] = defaultdict(dict)
+        self.dynamic_edges: dict[str, List[str]] = defaultdict(list)
+        self.timings: dict[str, TimingDescriptor] = {}
+        self.kinds: dict[str, str] = {}
+        self.weights: dict[str, dict[str, int]] = defaultdict(dict)
+        self.cycles: List[dict] = []
 
     def add_node(self, node: str):
         self.nodes.append(node)
 
+    def add_kind(self, node: str, kind: ModuleKind):
+        """Records the kind of a module node, unknown kinds are left out."""
+        if kind != ModuleKind.Unknown:
+            self.kinds[node] = kind.name
+
     def add_edge(self, root: str, sub: str):
         self.edges[root].append(sub)
 
+    def add_import_kinds(self, root: str, sub: str, kinds: Set[ImportKind]):
+        """Records the import contexts of an edge. Edges imported at the top-level of the module are not recorded."""
+        if ImportKind.TopLevel not in kinds:
+            self.import_kinds[root][sub] = sorted(kind.name for kind in kinds)
+
+    def add_weight(self, root: str, sub: str, weight: int):
+        """Records the number of module imports, which an edge of a condensed graph stands for."""
+        self.weights[root][sub] = weight
+
+    def add_cycle(self, modules: List[str], path: List[str]):
+        """Records an import cycle with its member modules, and a shortest cycle path through them."""
+        self.cycles.append({"modules": modules, "path": path})
+
+    def add_dynamic_edge(self, root: str, sub: str):
+        """Flags an edge which comes from an importlib.import_module or __import__ call."""
+        self.dynamic_edges[root].append(sub)
+
+    def add_timing(self, module: str, self_us: int, cumulative_us: int, order: int, loaded_by: Optional[str]):
+        """Records the import time of a module, measured by running the program."""
+        self.timings[module] = TimingDescriptor(self_us, cumulative_us, order, loaded_by)
+
     def add_package(self, package: Package):
         self.packages[package.name] = PackageDescriptor(package.package_type.name, package.modules)
 
+    def add_symbol(self, qualified_name: str, module: str, kind: str):
+        if qualified_name not in self.symbols:
+            self.add_node(qualified_name)
+            self.symbols[qualified_name] = SymbolDescriptor(module, kind)
+
     def to_dict(self):
         result = {"nodes": self.nodes, "edges": dict(self.edges)}
         if len(self.packages) > 0:
             result["packages"] = {k: dataclasses.asdict(v) for k, v in self.packages.items()}
+        if len(self.symbols) > 0:
+            result["symbols"] = {k: dataclasses.asdict(v) for k, v in self.symbols.items()}
+        if len(self.import_kinds) > 0:
+            result["import_kinds"] = dict(self.import_kinds)
+        if len(self.dynamic_edges) > 0:
+            result["dynamic_edges"] = dict(self.dynamic_edges)
+        if len(self.kinds) > 0:
+            result["kinds"] = self.kinds
+        if len(self.timings) > 0:
+            result["timings"] = {k: dataclasses.asdict(v) for k, v in self.timings.items()}
+        if len(self.weights) > 0:
+            result["weights"] = dict(self.weights)
+        if len(self.cycles) > 0:
+            result["cycles"] = self.cycles
         return result
 
 
-def generate_code(proj: Project) -> str:
+def generate_code(proj: Project, optimize: bool = False) -> str:
+    """Generates the code of the root module. If optimize is true, the optimization passes are run on it first."""
     root_cst = proj.get_syntax_tree(proj.get_root_modules()[0])
-    return root_cst.code if root_cst else ""
+    if root_cst is None:
+        return ""
+    if optimize:
+        root_cst = optimize_module(root_cst)
+    return root_cst.code
+
+
+def generate_bundle(proj: Project, include_site_packages: bool = False) -> str:
+    """
+    Generates a single self-contained python file from the local modules of the project.
+
+    The sources of the bundled modules are stored in a module registry inside the generated file,
+    and an import hook serves them from there, so importing them does not touch the filesystem.
+    Running the bundle as a script runs the root module as __main__, importing it re-exports the root module.
+    Stdlib modules, and site-packages unless 'include_site_packages' is true, are imported from the environment.
+    """
+    root_name = proj.get_root_modules()[0]
+    registry = _collect_bundle_sources(proj, include_site_packages)
+
+    code_builder: List[str] = [_BUNDLE_HEADER, "_PYPRINCE_MODULES = {"]
+    for module_name, (is_package, source) in registry.items():
+        code_builder.append(f"    {module_name!r}: ({is_package!r}, {source!r}),")
+    code_builder.append("}")
+    code_builder.append(f"_PYPRINCE_ROOT = {root_name!r}")
+    code_builder.append(_BUNDLE_FOOTER)
+    return "\n".join(code_builder)
+
+
+def generate_zipapp(proj: Project, output_file: Path, include_site_packages: bool = False):
+    """
+    Writes the local modules of the project into a zipapp, that runs the root module when executed.
+    The module registry is the archive itself, modules are laid out in it the same way as on the disk.
+    """
+    root_name = proj.get_root_modules()[0]
+    registry = _collect_bundle_sources(proj, include_site_packages)
+
+    with output_file.open("wb") as output_stream:
+        output_stream.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(output_stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for module_name, (is_package, source) in registry.items():
+                module_path = module_name.replace(".", "/")
+                archive.writestr(f"{module_path}/__init__.py" if is_package else f"{module_path}.py", source)
+            main_source = f"import runpy\nrunpy.run_module({root_name!r}, run_name='__main__', alter_sys=True)\n"
+            archive.writestr("__main__.py", main_source)
+    output_file.chmod(output_file.stat().st_mode | 0o111)
+
+
+def _collect_bundle_sources(proj: Project, include_site_packages: bool) -> Dict[str, Tuple[bool, str]]:
+    """Returns the name -> (is_package, source) registry of bundled modules in topological order,
+    meaning every module comes after the modules it imports."""
+    excluded_packages = {PackageType.StandardLib}
+    if not include_site_packages:
+        excluded_packages.add(PackageType.Site)
+    excluded_modules: Set[str] = set()
+    for package_name in proj.list_packages():
+        package = proj.get_package(package_name)
+        if package is not None and package.package_type in excluded_packages:
+            excluded_modules.update(package.modules)
+
+    registry: Dict[str, Tuple[bool, str]] = {}
+    for module_name in _topological_order(proj, proj.get_root_modules(), excluded_modules):
+        mod = proj.get_module(module_name)
+        if mod is None or mod.path is None or module_name in registry:
+            continue
+        if mod.syntax_tree is None:
+            logger.warning(f"Module {module_name} has no parsed source, it is left out from the bundle")
+            continue
+        _add_bundle_ancestors(proj, module_name, Path(mod.path), registry)
+        registry[module_name] = (Path(mod.path).stem == "__init__", mod.syntax_tree.code)
+    return registry
+
+
+def _add_bundle_ancestors(proj: Project, module_name: str, module_path: Path, registry: Dict[str, Tuple[bool, str]]):
+    """
+    Registers the parent packages of a module before the module, because importing 'pkg.sub.mod' imports 'pkg'
+    and 'pkg.sub' first. Parent packages are not graph nodes when only their submodules are imported
+    (ex: 'from pkg import helper'), so their __init__ files are read next to the module.
+    Parent packages without an __init__ file are namespace packages, they are registered as empty packages.
+    """
+    parts = module_name.split(".")
+    # The directory of the closest parent package
+    package_dir = module_path.parent.parent if module_path.stem == "__init__" else module_path.parent
+    ancestors: List[Tuple[str, Path]] = []
+    for depth in range(len(parts) - 1, 0, -1):
+        ancestors.append((".".join(parts[:depth]), package_dir))
+        package_dir = package_dir.parent
+
+    for package_name, package_dir in reversed(ancestors):
+        if package_name in registry:
+            continue
+        package_mod = proj.get_module(package_name)
+        if package_mod is not None and package_mod.syntax_tree is not None:
+            source = package_mod.syntax_tree.code
+        else:
+            try:
+                init_file = package_dir / "__init__.py"
+                source = init_file.read_text(encoding="utf-8") if init_file.is_file() else ""
+            except OSError:
+                logger.warning(f"Could not read the __init__ file of package {package_name} from {package_dir}")
+                source = ""
+        registry[package_name] = (True, source)
+
+
+def _topological_order(proj: Project, roots: List[str], excluded_modules: Set[str]) -> List[str]:
+    """Orders the modules reachable from roots, so dependencies come before their dependents.
+    Import cycles are broken at the edge that closes the cycle."""
+    result: List[str] = []
+    visited: Set[str] = set()
+    for root in roots:
+        if root in visited or root in excluded_modules:
+            continue
+        visited.add(root)
+        # iterative DFS, so deep import chains dont hit the recursion limit
+        stack: List[Tuple[str, int]] = [(root, 0)]
+        while stack:
+            module_name, sub_index = stack.pop()
+            mod = proj.get_module(module_name)
+            submodules = mod.submodules if mod is not None else []
+            while sub_index < len(submodules):
+                sub_name = submodules[sub_index].name
+                sub_index += 1
+                if sub_name not in visited and sub_name not in excluded_modules and proj.has_module(sub_name):
+                    visited.add(sub_name)
+                    stack.append((module_name, sub_index))
+                    stack.append((sub_name, 0))
+                    break
+            else:
+                result.append(module_name)
+    return result
+
+
+_BUNDLE_HEADER = """\
+# Generated by pyprince. Contains a bundle of modules, that are imported from the registry below.
+import importlib.abc
+import importlib.util
+import sys
+"""
+
+_BUNDLE_FOOTER = """
+
+class _PyPrinceBundleImporter(importlib.abc.MetaPathFinder, importlib.abc.InspectLoader):
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in _PYPRINCE_MODULES:
+            return None
+        return importlib.util.spec_from_loader(
+            fullname, self, origin=f"<pyprince-bundle>/{fullname}", is_package=self.is_package(fullname)
+        )
+
+    def is_package(self, fullname):
+        return _PYPRINCE_MODULES[fullname][0]
+
+    def get_source(self, fullname):
+        return _PYPRINCE_MODULES[fullname][1]
+
+    def get_code(self, fullname):
+        return compile(self.get_source(fullname), f"<pyprince-bundle>/{fullname}", "exec")
+
+    def exec_module(self, module):
+        exec(self.get_code(module.__spec__.name), module.__dict__)
+
+
+sys.meta_path.insert(0, _PyPrinceBundleImporter())
+
+if __name__ == "__main__":
+    import runpy
+
+    runpy.run_module(_PYPRINCE_ROOT, run_name="__main__", alter_sys=True)
+else:
+    _root = importlib.import_module(_PYPRINCE_ROOT)
+    globals().update({k: v for k, v in vars(_root).items() if not k.startswith("__")})
+"""
 
 
 def describe_module_dependencies(proj: Project) -> DependencyDescriptor:
@@ -47,20 +289,138 @@ def describe_module_dependencies(proj: Project) -> DependencyDescriptor:
     The nodes can be package names and module names (a package is roughly a folder full of modules).
 
     The node names are unique.
+    Edges which are not imported at the top-level of the module are listed with their import contexts.
+    Edges which come from importlib.import_module or __import__ calls are listed in the dynamic edges.
+    The kinds of modules (ex: source, extension, namespace package) are listed when they are known.
     """
     return _describe_deps(proj)
 
 
-def _describe_deps(proj: Project) -> DependencyDescriptor:
+def describe_symbol_dependencies(proj: Project) -> DependencyDescriptor:
+    """
+    Generates a struct which describes the dependencies of modules with symbol granularity.
+
+    Names imported with 'from module import name' are edges to the symbol node 'module.name', where module is the
+    module that actually defines the name, even if it is imported through re-exports. Unresolved names keep the
+    module they are imported from. Modules imported as a whole are edges to the module node.
+    Symbols are only known for the modules parsed from source, names imported from modules found in the project cache
+    or the shared cache are unresolved (kind 'Unknown'), so the symbols of a warm cache are less precise.
+    """
     result = DependencyDescriptor()
 
     for module_name in proj.get_modules():
         result.add_node(module_name)
+        mod = proj.get_module(module_name)
+        if mod is not None:
+            result.add_kind(module_name, mod.kind)
+
+    for module_name in proj.get_modules():
         mod = proj.get_module(module_name)
         if mod is None:
             continue
+        for sub in mod.submodules:
+            symbol_names = mod.imported_symbols.get(sub.name, None)
+            if not symbol_names:
+                result.add_edge(mod.name, sub.name)
+                continue
+            for symbol_name in sorted(symbol_names):
+                if symbol_name == constants.STAR_IMPORT:
+                    result.add_edge(mod.name, sub.name)
+                    continue
+                symbol = proj.resolve_symbol(sub.name, symbol_name)
+                if symbol is not None:
+                    result.add_symbol(symbol.qualified_name, symbol.module_name, symbol.kind.name)
+                    result.add_edge(mod.name, symbol.qualified_name)
+                else:
+                    qualified_name = f"{sub.name}.{symbol_name}"
+                    result.add_symbol(qualified_name, sub.name, "Unknown")
+                    result.add_edge(mod.name, qualified_name)
+
+    for package_name in proj.list_packages():
+        package = proj.get_package(package_name)
+        if package is None:
+            continue
+        result.add_package(package)
+
+    return result
+
+
+def describe_package_dependencies(proj: Project) -> DependencyDescriptor:
+    """
+    Generates a condensed graph of the dependencies between packages.
+
+    An edge from package A to package B stands for all the imports from modules of A to modules of B,
+    its weight is the number of these imports. Imports inside a package are left out.
+    Modules which are not in any package (ex: unresolved modules) are grouped by their top-level name.
+    """
+    module_packages: Dict[str, str] = {}
+    for package_name in proj.list_packages():
+        package = proj.get_package(package_name)
+        if package is None:
+            continue
+        for module_name in package.modules:
+            module_packages[module_name] = package_name
+
+    result = _describe_grouped_deps(proj, lambda name: module_packages.get(name, None) or name.split(".")[0])
+    for package_name in proj.list_packages():
+        package = proj.get_package(package_name)
+        if package is not None:
+            result.add_package(package)
+    return result
+
+
+def describe_prefix_dependencies(proj: Project, depth: int = 1) -> DependencyDescriptor:
+    """
+    Generates a condensed graph of the dependencies between module name prefixes of 'depth' parts.
+    ex: with depth 2, the modules 'email.mime.text' and 'email.mime.base' are both in the node 'email.mime'.
+    Edges are weighted by the number of imports they stand for, like in describe_package_dependencies.
+    """
+    return _describe_grouped_deps(proj, lambda name: ".".join(name.split(".")[:depth]))
+
+
+def _describe_grouped_deps(proj: Project, group_of: Callable[[str], str]) -> DependencyDescriptor:
+    result = DependencyDescriptor()
+    groups: Dict[str, str] = {}
+
+    def get_group(module_name: str) -> str:
+        group = groups.get(module_name, None)
+        if group is None:
+            group = groups[module_name] = group_of(module_name)
+        return group
+
+    nodes: Dict[str, None] = {}
+    for mod in proj.iter_modules():
+        nodes.setdefault(get_group(mod.name), None)
+
+    # A single pass over the edges, the weights are counted in insertion order, so the output is deterministic
+    weights: Dict[Tuple[str, str], int] = defaultdict(int)
+    for edge in proj.iter_edges():
+        source, target = get_group(edge.source), get_group(edge.target)
+        if source != target:
+            weights[(source, target)] += 1
+
+    for node in nodes:
+        result.add_node(node)
+    for (source, target), weight in weights.items():
+        if target not in nodes:
+            nodes[target] = None
+            result.add_node(target)
+        result.add_edge(source, target)
+        result.add_weight(source, target, weight)
+    return result
+
+
+def _describe_deps(proj: Project) -> DependencyDescriptor:
+    result = DependencyDescriptor()
+
+    for mod in proj.iter_modules():
+        result.add_node(mod.name)
+        result.add_kind(mod.name, mod.kind)
         for sub in mod.submodules:
             result.add_edge(mod.name, sub.name)
+            result.add_import_kinds(mod.name, sub.name, mod.import_kinds.get(sub.name, {ImportKind.TopLevel}))
+            if sub.name in mod.dynamic_imports:
+                result.add_dynamic_edge(mod.name, sub.name)
 
     for package_name in proj.list_packages():
         package = proj.get_package(package_name)
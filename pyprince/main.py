@@ -1,102 +1,704 @@
+from __future__ import annotations
+
 from enum import Enum
 import pathlib
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 import sys
 
 import typer
 
-from pyprince import parser, generators
-from pyprince.utils import logging, logger, serializer
+from pyprince import __version__
+
+if TYPE_CHECKING:
+    from pyprince import generators, parser
+
+# Commands import the modules they need, because importing libcst and loguru takes most of the startup time.
 
 
 class OutputFormat(str, Enum):
     json = "json"
     dot = "dot"
+    csv = "csv"  # Edge list
+    tsv = "tsv"  # Edge list
+    columnar = "columnar"  # Directory of node, package and edge tables, see serializer.write_columnar
+
+
+class LogLevel(str, Enum):
+    trace = "TRACE"
+    debug = "DEBUG"
+    info = "INFO"
+    warning = "WARNING"
+    error = "ERROR"
+
+
+class LogFormat(str, Enum):
+    text = "text"
+    json = "json"
+
+
+class GraphGrouping(str, Enum):
+    module = "module"
+    package = "package"
+    prefix = "prefix"  # Module name prefixes of --group-depth parts
+
+
+class ProgressFormat(str, Enum):
+    none = "none"
+    text = "text"
+    json = "json"
+
+
+class SkippedImportKind(str, Enum):
+    function_local = "function-local"
+    type_checking = "type-checking"
+    fallback = "fallback"
+    platform_guarded = "platform-guarded"
+
+    def to_import_kind(self) -> parser.ImportKind:
+        from pyprince import parser
+
+        return {
+            SkippedImportKind.function_local: parser.ImportKind.FunctionLocal,
+            SkippedImportKind.type_checking: parser.ImportKind.TypeChecking,
+            SkippedImportKind.fallback: parser.ImportKind.Fallback,
+            SkippedImportKind.platform_guarded: parser.ImportKind.PlatformGuarded,
+        }[self]
 
 
 app = typer.Typer()
+# Arguments of logging.init, set by the options of the app, before the command runs
+log_settings: Dict[str, Any] = {}
 
 
 def console_entry_main():
     app()
 
 
+@app.callback()
+def configure(
+    log_level: LogLevel = typer.Option(LogLevel.info, "--log-level", case_sensitive=False),
+    quiet: bool = typer.Option(False, "--quiet", help="Only log warnings and errors"),
+    log_format: LogFormat = typer.Option(LogFormat.text, "--log-format"),
+):
+    """Logs are written to ~/.pyprince, the options of the logs come before the command."""
+    log_settings["level"] = "WARNING" if quiet else log_level.value
+    log_settings["serialize"] = log_format == LogFormat.json
+
+
 @app.command()
 def parse(
     entrypoint: pathlib.Path,
     describe_modules: bool = typer.Option(False, "--dm"),
     output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
     cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
     output_format: OutputFormat = typer.Option(OutputFormat.json, "-f"),
     shallow_stdlib: bool = typer.Option(False, "--shallow-std"),
+    optimize: bool = typer.Option(False, "--optimize"),
+    symbol_granularity: bool = typer.Option(
+        False, "--symbols", help="Graph of imported names, names from cached modules are not resolved"
+    ),
+    skip_imports: List[SkippedImportKind] = typer.Option([], "--skip-imports"),
+    static_resolve: bool = typer.Option(False, "--static-resolve"),
+    store_file: Optional[pathlib.Path] = typer.Option(None, "--store"),
+    progress_format: ProgressFormat = typer.Option(ProgressFormat.none, "--progress", help="Report progress on stderr"),
+    grouping: GraphGrouping = typer.Option(GraphGrouping.module, "--group", help="Condense the graph of --dm"),
+    group_depth: int = typer.Option(1, "--group-depth", min=1),
+    report_cycles: bool = typer.Option(False, "--cycles", help="Add the import cycles to the JSON of --dm"),
 ):
-    logging.init()
+    from pyprince import parser, generators
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
     logger.info(f"****** Starting pyprince at {pathlib.Path().absolute()} ******")
     logger.info(f"Program called with args: {sys.argv}")
 
     if not check_entrypoint(entrypoint):
         typer.echo("Entrypoint check failed, exiting.")
         return
+    if describe_modules:
+        check_output(output_format, output_file, report_cycles)
+        if symbol_granularity and grouping != GraphGrouping.module:
+            raise typer.BadParameter("--group can not be used with --symbols")
 
-    project_cache = load_cache(cache_file)
-    project = parser.parse_project(entrypoint, project_cache=project_cache, shallow_stdlib=shallow_stdlib)
-    save_cache(cache_file, project)
+    skip_import_kinds = {kind.to_import_kind() for kind in skip_imports}
+    store = None
+    if store_file is not None:
+        logger.info(f"Storing the project in: {store_file}")
+        # Syntax trees are only needed to generate code
+        store = parser.SqliteProject(store_file, keep_syntax_trees=not describe_modules)
+    try:
+        project = parse_with_caches(
+            entrypoint,
+            cache_file,
+            shared_cache_file,
+            no_stdlib_pack,
+            shallow_stdlib,
+            skip_import_kinds,
+            static_resolve,
+            progress_format,
+            project=store,
+        )
+        if describe_modules:
+            if symbol_granularity:
+                desc = generators.describe_symbol_dependencies(project)
+            elif grouping == GraphGrouping.package:
+                desc = generators.describe_package_dependencies(project)
+            elif grouping == GraphGrouping.prefix:
+                desc = generators.describe_prefix_dependencies(project, group_depth)
+            else:
+                desc = generators.describe_module_dependencies(project)
+            if report_cycles:
+                from pyprince import analysis
 
-    if describe_modules:
-        desc = generators.describe_module_dependencies(project)
-        if output_format == OutputFormat.json:
-            result = serializer.to_json(desc)
+                graph = analysis.ModuleGraph.from_project(project, skip_import_kinds)
+                for cycle in analysis.find_import_cycles(graph):
+                    desc.add_cycle(cycle.modules, cycle.path)
+            write_descriptor(desc, output_format, output_file)
         else:
-            result = serializer.to_graphviz_dot(desc)
+            typer.echo(generators.generate_code(project, optimize))
+    finally:
+        if store is not None:
+            store.close()
+    logger.success(f"pyprince finished")
 
-        if output_file is not None:
-            if not output_file.exists():
-                output_file.parent.mkdir(parents=True, exist_ok=True)
-                output_file.touch()
-            output_file.write_text(result)
-        else:
-            typer.echo(result)
+
+@app.command()
+def bundle(
+    entrypoint: pathlib.Path,
+    output_file: pathlib.Path = typer.Option(..., "-o"),
+    as_zipapp: bool = typer.Option(False, "--zipapp"),
+    include_site_packages: bool = typer.Option(False, "--include-site"),
+    cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
+):
+    from pyprince import generators
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince bundle at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    project = parse_with_caches(
+        entrypoint,
+        cache_file,
+        shared_cache_file,
+        no_stdlib_pack,
+        shallow_stdlib=True,
+        skip_import_kinds=set(),
+        static_resolve=False,
+        progress_format=ProgressFormat.none,
+    )
+
+    if not output_file.parent.exists():
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+    if as_zipapp:
+        generators.generate_zipapp(project, output_file, include_site_packages)
     else:
-        typer.echo(generators.generate_code(project))
-    logger.success(f"pyprince finished")
+        output_file.write_text(generators.generate_bundle(project, include_site_packages))
+    logger.success(f"pyprince bundle finished, written to {output_file}")
+
+
+@app.command()
+def inline(
+    entrypoint: pathlib.Path,
+    function_name: str = typer.Option(..., "--function"),
+    module_name: Optional[str] = typer.Option(None, "--module"),
+    depth: int = typer.Option(1, "--depth"),
+    optimize: bool = typer.Option(False, "--optimize"),
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+):
+    from pyprince import parser, transformer
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince inline at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    project = parser.parse_project(entrypoint, shallow_stdlib=True)
+    if module_name is None:
+        module_name = project.get_root_modules()[0]
+    expanded = transformer.expand_project_function(project, module_name, function_name, depth)
+    result = transformer.optimize_module(expanded).code if optimize else expanded.code
+
+    if output_file is not None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(result)
+    else:
+        typer.echo(result)
+    logger.success(f"pyprince inline finished")
+
+
+@app.command()
+def trace(
+    entrypoint: pathlib.Path,
+    program_args: Optional[List[str]] = typer.Argument(None),
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    output_format: OutputFormat = typer.Option(OutputFormat.json, "-f"),
+    python_executable: Optional[str] = typer.Option(None, "--python"),
+    timeout: Optional[float] = typer.Option(None, "--timeout"),
+):
+    from pyprince import tracer
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince trace at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+    check_output(output_format, output_file)
+
+    import_trace = tracer.trace_imports(entrypoint, program_args or [], python_executable, timeout)
+    desc = tracer.describe_import_trace(import_trace)
+    write_descriptor(desc, output_format, output_file)
+    logger.success(f"pyprince trace finished")
+
+
+@app.command()
+def reconcile(
+    entrypoint: pathlib.Path,
+    program_args: Optional[List[str]] = typer.Argument(None),
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
+    shallow_stdlib: bool = typer.Option(False, "--shallow-std"),
+    skip_imports: List[SkippedImportKind] = typer.Option([], "--skip-imports"),
+    static_resolve: bool = typer.Option(False, "--static-resolve"),
+    python_executable: Optional[str] = typer.Option(None, "--python"),
+    timeout: Optional[float] = typer.Option(None, "--timeout"),
+):
+    from pyprince import reconciler, tracer
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince reconcile at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    skip_import_kinds = {kind.to_import_kind() for kind in skip_imports}
+    project = parse_with_caches(
+        entrypoint,
+        cache_file,
+        shared_cache_file,
+        no_stdlib_pack,
+        shallow_stdlib,
+        skip_import_kinds,
+        static_resolve,
+        ProgressFormat.none,
+    )
+
+    import_trace = tracer.trace_imports(entrypoint, program_args or [], python_executable, timeout)
+    report = reconciler.reconcile(project, import_trace, skip_import_kinds)
+    write_json(report.to_dict(), output_file)
+    logger.success(
+        f"pyprince reconcile finished, {len(report.over_approximated)} over-approximated and "
+        + f"{len(report.under_approximated)} under-approximated modules"
+    )
+
+
+@app.command()
+def cycles(
+    entrypoint: pathlib.Path,
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
+    shallow_stdlib: bool = typer.Option(False, "--shallow-std"),
+    skip_imports: List[SkippedImportKind] = typer.Option([], "--skip-imports"),
+    static_resolve: bool = typer.Option(False, "--static-resolve"),
+    progress_format: ProgressFormat = typer.Option(ProgressFormat.none, "--progress", help="Report progress on stderr"),
+):
+    """
+    Reports the import cycles of the project: the strongly connected components of its module graph,
+    with their modules and a shortest cycle path. Imports of the skipped kinds are not part of the cycles.
+    """
+    from pyprince import analysis
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince cycles at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    skip_import_kinds = {kind.to_import_kind() for kind in skip_imports}
+    project = parse_with_caches(
+        entrypoint,
+        cache_file,
+        shared_cache_file,
+        no_stdlib_pack,
+        shallow_stdlib,
+        skip_import_kinds,
+        static_resolve,
+        progress_format,
+    )
+
+    graph = analysis.ModuleGraph.from_project(project, skip_import_kinds)
+    import_cycles = analysis.find_import_cycles(graph)
+    write_json({"modules": len(graph), "cycles": [cycle.to_dict() for cycle in import_cycles]}, output_file)
+    logger.success(f"pyprince cycles finished, found {len(import_cycles)} import cycles")
+
+
+@app.command()
+def layers(
+    entrypoint: pathlib.Path,
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
+    shallow_stdlib: bool = typer.Option(False, "--shallow-std"),
+    skip_imports: List[SkippedImportKind] = typer.Option([], "--skip-imports"),
+    static_resolve: bool = typer.Option(False, "--static-resolve"),
+    progress_format: ProgressFormat = typer.Option(ProgressFormat.none, "--progress", help="Report progress on stderr"),
+):
+    """
+    Orders the modules reachable from the entrypoint into topological layers, dependencies first.
+    The modules of a layer only import modules of earlier layers, so they can be loaded or built concurrently.
+    """
+    from pyprince import analysis
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince layers at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    skip_import_kinds = {kind.to_import_kind() for kind in skip_imports}
+    project = parse_with_caches(
+        entrypoint,
+        cache_file,
+        shared_cache_file,
+        no_stdlib_pack,
+        shallow_stdlib,
+        skip_import_kinds,
+        static_resolve,
+        progress_format,
+    )
+
+    graph = analysis.ModuleGraph.from_project(project, skip_import_kinds)
+    module_layers = analysis.find_topological_layers(graph, graph.get_ids(project.get_root_modules()))
+    write_json(
+        {
+            "roots": list(project.get_root_modules()),
+            "layers": [[graph.names[node] for node in layer] for layer in module_layers],
+        },
+        output_file,
+    )
+    logger.success(f"pyprince layers finished, {len(module_layers)} layers")
+
+
+@app.command()
+def footprint(
+    entrypoint: pathlib.Path,
+    output_file: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    cache_file: Optional[pathlib.Path] = typer.Option(None, "--cache"),
+    shared_cache_file: Optional[pathlib.Path] = typer.Option(None, "--shared-cache"),
+    no_stdlib_pack: bool = typer.Option(False, "--no-stdlib-pack"),
+    shallow_stdlib: bool = typer.Option(False, "--shallow-std"),
+    skip_imports: List[SkippedImportKind] = typer.Option([], "--skip-imports"),
+    static_resolve: bool = typer.Option(False, "--static-resolve"),
+    progress_format: ProgressFormat = typer.Option(ProgressFormat.none, "--progress", help="Report progress on stderr"),
+):
+    """
+    Reports how many modules and source bytes every package imports transitively,
+    and how many modules every module imports transitively.
+    """
+    from pyprince import analysis
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince footprint at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if not check_entrypoint(entrypoint):
+        typer.echo("Entrypoint check failed, exiting.")
+        return
+
+    skip_import_kinds = {kind.to_import_kind() for kind in skip_imports}
+    project = parse_with_caches(
+        entrypoint,
+        cache_file,
+        shared_cache_file,
+        no_stdlib_pack,
+        shallow_stdlib,
+        skip_import_kinds,
+        static_resolve,
+        progress_format,
+    )
+
+    module_footprint = analysis.compute_footprint(project, skip_import_kinds)
+    write_json(module_footprint.to_dict(), output_file)
+    logger.success(f"pyprince footprint finished for {len(module_footprint.packages)} packages")
+
+
+@app.command("pack-stdlib")
+def pack_stdlib(
+    output_dir: Optional[pathlib.Path] = typer.Option(None, "-o"),
+    progress_format: ProgressFormat = typer.Option(ProgressFormat.none, "--progress", help="Report progress on stderr"),
+):
+    """
+    Parses the whole stdlib of the running python into a stdlib pack, which is loaded automatically on later runs.
+    The pack is written to output_dir, by default into the packs shipped with pyprince.
+    """
+    import json
+    import tempfile
+
+    from pyprince import parser
+    from pyprince.parser import constants, stdlib_pack
+    from pyprince.utils import logging, logger
+    from pyprince.utils.progress import create_progress_reporter
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince pack-stdlib at {pathlib.Path().absolute()} ******")
+    logger.info(f"Program called with args: {sys.argv}")
+
+    if output_dir is None:
+        output_dir = pathlib.Path(__file__).parent / stdlib_pack.PACKS_DIR_NAME
+    output_file = output_dir / stdlib_pack.get_pack_name()
+    with tempfile.TemporaryDirectory() as entry_dir:
+        # The entrypoint imports every stdlib module, which are resolved statically so none of them are executed
+        entrypoint = pathlib.Path(entry_dir) / "pyprince_stdlib_entry.py"
+        entrypoint.write_text("".join(f"import {name}\n" for name in stdlib_pack.get_stdlib_module_names()))
+        project = parser.parse_project(
+            entrypoint, static_resolve=True, progress=create_progress_reporter(progress_format.value, sys.stderr)
+        )
+    content = stdlib_pack.create_pack(project)
+    if content is None:
+        typer.echo("Stdlib was empty, no pack was created.")
+        return
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_text(json.dumps(content))
+    module_count = len(content[constants.PACKAGE_TAG][constants.STDLIB_PACKAGE_NAME])
+    logger.success(f"pyprince pack-stdlib finished, {module_count} modules written to {output_file}")
+    typer.echo(f"Stdlib pack written to {output_file}")
+
+
+@app.command()
+def serve():
+    """Runs commands read from stdin as JSON lines, and writes their results to stdout. See pyprince.server."""
+    from pyprince import server
+    from pyprince.utils import logging, logger
+
+    logging.init(**log_settings)
+    logger.info(f"****** Starting pyprince server at {pathlib.Path().absolute()} ******")
+    server.serve_requests(app, sys.stdin, sys.stdout)
+    logger.success(f"pyprince server finished")
 
 
 @app.command()
 def version():
-    typer.echo(f"pyprince version: 0.0.5")
+    typer.echo(f"pyprince version: {__version__}")
 
 
-def load_cache(cache_file: Optional[pathlib.Path]) -> Optional[parser.ProjectCache]:
+def load_cache(cache_file: Optional[pathlib.Path], use_stdlib_pack: bool = True) -> Optional[parser.ProjectCache]:
+    from pyprince import parser
+    from pyprince.parser import stdlib_pack
+    from pyprince.utils import logger
+
     try:
         project_cache = None
         if cache_file is not None:
             logger.info(f"Using cache. Cache path: {cache_file}")
-            project_cache = parser.ProjectCache()
+            if cache_file.suffix in parser.SQLITE_SUFFIXES:
+                project_cache = parser.SqliteProjectCache(cache_file)
+            else:
+                project_cache = parser.ProjectCache()
+        else:
+            logger.info(f"Project cache disabled")
+
+        # The stdlib pack is loaded first, so the modules of the cache file replace it
+        if use_stdlib_pack:
+            pack_cache = project_cache or parser.ProjectCache()
+            if stdlib_pack.load_matching_pack(pack_cache):
+                project_cache = pack_cache
+
+        if project_cache is not None and cache_file is not None and cache_file.suffix not in parser.SQLITE_SUFFIXES:
             if cache_file.exists():
                 logger.info(f"Loading cache from {cache_file}")
                 with cache_file.open("r") as cache_stream:
                     project_cache.load_stream(cache_stream)
-        else:
-            logger.info(f"Project cache disabled")
         return project_cache
     except Exception:
         logger.opt(exception=True).warning(f"Failed to load cache file at: {cache_file}")
         raise
 
 
+def close_cache(project_cache: Optional[parser.ProjectCache]):
+    """Closes the database of a SQLite cache, it is opened again to save the cache."""
+    from pyprince import parser
+
+    if isinstance(project_cache, parser.SqliteProjectCache):
+        project_cache.close()
+
+
 def save_cache(cache_file: Optional[pathlib.Path], project: parser.Project):
+    import sqlite3
+
+    from pyprince import parser
+    from pyprince.utils import logger
+
     if cache_file is not None:
         try:
             if not cache_file.exists():
                 logger.info(f"Creating folders for cache {cache_file}")
                 cache_file.parent.mkdir(parents=True, exist_ok=True)
+            if cache_file.suffix in parser.SQLITE_SUFFIXES:
+                logger.info(f"Writing cache {cache_file}")
+                sqlite_cache = parser.SqliteProjectCache(cache_file)
+                try:
+                    sqlite_cache.save(project)
+                finally:
+                    sqlite_cache.close()
+                return
             with cache_file.open("w") as cache_stream:
                 logger.info(f"Writing cache {cache_file}")
                 parser.ProjectCache().serialize(cache_stream, project)
-        except IOError:
+        except (IOError, sqlite3.Error):
             logger.opt(exception=True).warning(f"Failed to create cache file at: {cache_file}")
 
 
+def open_shared_cache(shared_cache_file: Optional[pathlib.Path]) -> Optional[parser.SharedModuleCache]:
+    import sqlite3
+
+    from pyprince import parser
+    from pyprince.utils import logger
+
+    if shared_cache_file is None:
+        return None
+    try:
+        logger.info(f"Using shared cache at: {shared_cache_file}")
+        return parser.SharedModuleCache(shared_cache_file)
+    except sqlite3.Error:
+        logger.opt(exception=True).warning(
+            f"Failed to open shared cache at: {shared_cache_file}, continuing without it"
+        )
+        return None
+
+
+def close_shared_cache(shared_cache: Optional[parser.SharedModuleCache]):
+    import sqlite3
+
+    from pyprince.utils import logger
+
+    if shared_cache is None:
+        return
+    try:
+        shared_cache.close()
+    except sqlite3.Error:
+        logger.opt(exception=True).warning(f"Failed to publish to the shared cache")
+
+
+def parse_with_caches(
+    entrypoint: pathlib.Path,
+    cache_file: Optional[pathlib.Path],
+    shared_cache_file: Optional[pathlib.Path],
+    no_stdlib_pack: bool,
+    shallow_stdlib: bool,
+    skip_import_kinds: Set[parser.ImportKind],
+    static_resolve: bool,
+    progress_format: ProgressFormat,
+    project: Optional[parser.Project] = None,
+) -> parser.Project:
+    """
+    Parses the project of a command, with the caches and the progress options of the parse command.
+    The modules are added to project if it is given, ex: a SqliteProject.
+    """
+    from pyprince import parser
+    from pyprince.utils.progress import create_progress_reporter
+
+    project_cache = load_cache(cache_file, use_stdlib_pack=not no_stdlib_pack)
+    shared_cache = open_shared_cache(shared_cache_file)
+    try:
+        project = parser.parse_project(
+            entrypoint,
+            project_cache=project_cache,
+            shallow_stdlib=shallow_stdlib,
+            skip_import_kinds=skip_import_kinds,
+            static_resolve=static_resolve,
+            shared_cache=shared_cache,
+            project=project,
+            progress=create_progress_reporter(progress_format.value, sys.stderr),
+        )
+    finally:
+        close_shared_cache(shared_cache)
+        close_cache(project_cache)
+    save_cache(cache_file, project)
+    return project
+
+
+def write_json(result: Dict[str, Any], output_file: Optional[pathlib.Path]):
+    """Writes the result of an analysis command to output_file, or to stdout if it is None."""
+    import json
+
+    text = json.dumps(result, indent=2)
+    if output_file is not None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(text)
+    else:
+        typer.echo(text)
+
+
+def check_output(output_format: OutputFormat, output_file: Optional[pathlib.Path], report_cycles: bool = False):
+    """Checked before the command starts working, so a long parse does not fail at the end."""
+    if output_format == OutputFormat.columnar and output_file is None:
+        raise typer.BadParameter("The columnar format is written to a directory, which must be given with -o")
+    if report_cycles and output_format != OutputFormat.json:
+        raise typer.BadParameter("--cycles is only written to the json format")
+
+
+def write_descriptor(
+    desc: generators.DependencyDescriptor, output_format: OutputFormat, output_file: Optional[pathlib.Path]
+):
+    """Writes the graph to output_file, or to stdout if it is None. Edge lists are streamed without building a string."""
+    from pyprince.utils import serializer
+
+    if output_format == OutputFormat.columnar:
+        assert output_file is not None, "Checked by check_output"
+        serializer.write_columnar(desc, output_file)
+        return
+    if output_format in [OutputFormat.csv, OutputFormat.tsv]:
+        delimiter = "\t" if output_format == OutputFormat.tsv else ","
+        if output_file is None:
+            serializer.write_edge_list(desc, sys.stdout, delimiter)
+            return
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with output_file.open("w", newline="", encoding="utf-8") as output_stream:
+            serializer.write_edge_list(desc, output_stream, delimiter)
+        return
+
+    if output_format == OutputFormat.json:
+        result = serializer.to_json(desc)
+    else:
+        result = serializer.to_graphviz_dot(desc)
+    if output_file is not None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(result)
+    else:
+        typer.echo(result)
+
+
 def check_entrypoint(entrypoint: pathlib.Path):
     if not entrypoint.exists():
         typer.echo(f"Entrypoint does not exists: {entrypoint}")
@@ -1,3 +1,5 @@
 from pyprince.parser.project import *
 from pyprince.parser.project_cache import ProjectCache
 from pyprince.parser.project_parser import parse_project
+from pyprince.parser.shared_cache import SharedModuleCache
+from pyprince.parser.sqlite_project import SqliteProject, SqliteProjectCache, SQLITE_SUFFIXES
@@ -5,4 +5,5 @@ FROZEN = "frozen"
 
 VERSION_TAG = "version"
 PACKAGE_TAG = "packages"
+MISSING_MODULES_TAG = "missing_modules"
 STDLIB_PACKAGE_NAME = "stdlib"
@@ -1,13 +1,16 @@
 import collections.abc
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+import importlib.util
+from types import CodeType
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 import libcst
 import libcst.matchers as cstm
 
 from pyprince.parser import constants
 from pyprince.parser.module_finder import ModuleFinder
-from pyprince.parser.project import Module
+from pyprince.parser.module_loader import iter_code_imports
+from pyprince.parser.project import ImportKind, Module
 from pyprince.utils import logger
 
 
@@ -24,10 +27,27 @@ class ImportHandler:
             return
 
         # TODO: If submodule is just an alias from an import, we will have to interpret code, or load the parent module.
-        module_imports, from_imports = self._extract_module_import_names(mod.syntax_tree)
+        module_imports, from_imports, dynamic_imports = self._extract_module_import_names(mod.syntax_tree)
+        self._resolve_imports(mod, module_imports, from_imports, dynamic_imports)
+
+    def resolve_code_imports(self, mod: Module, code: CodeType):
+        """
+        Same as resolve_module_imports, for modules which only have bytecode.
+        The imports are read from the IMPORT_NAME opcodes, so only function-local imports are told apart.
+        """
+        module_imports, from_imports = self._extract_code_import_names(code)
+        self._resolve_imports(mod, module_imports, from_imports, [])
+
+    def _resolve_imports(
+        self,
+        mod: Module,
+        module_imports: List["ImportDescription"],
+        from_imports: List["FromImportDescription"],
+        dynamic_imports: List["DynamicImportDescription"],
+    ):
         for imp in module_imports:
             sub_id = self.finder.find_top_level_module(imp.package_name)
-            mod.add_submodule(sub_id)
+            mod.add_submodule(sub_id, imp.kind)
         for imp in from_imports:
             if imp.is_relative_import():
                 assert imp.relative_level is not None
@@ -40,64 +60,289 @@ class ImportHandler:
                     continue
                 package_id = self.finder.find_top_level_module(imp.package_name)
 
-            if (
-                (package_id.spec is None)
-                or (not self.finder.is_package_module(package_id.spec.origin))
-                or imp.targets == constants.STAR_IMPORT
-            ):
-                mod.add_submodule(package_id)
+            if imp.targets == constants.STAR_IMPORT:
+                mod.add_imported_symbol(package_id, constants.STAR_IMPORT, imp.kind)
+                continue
+            if (package_id.spec is None) or (not self.finder.is_package_module(package_id.spec.origin)):
+                for target in imp.targets:
+                    mod.add_imported_symbol(package_id, target, imp.kind)
                 continue
 
             for target in imp.targets:
                 module_candidate = f"{package_id.name}.{target}"
                 sub_id = self.finder.try_find_top_level_module(module_candidate)
                 if sub_id is None:
-                    mod.add_submodule(package_id)
+                    mod.add_imported_symbol(package_id, target, imp.kind)
                 else:
-                    mod.add_submodule(sub_id)
+                    mod.add_submodule(sub_id, imp.kind)
+        for dyn in dynamic_imports:
+            if dyn.is_relative_import() and dyn.relative_to_module and not self.finder.is_package_module(mod.path):
+                # The package of a plain module is its parent, but the call resolves the name below the module itself
+                try:
+                    module_name = importlib.util.resolve_name(
+                        "." * dyn.relative_level + (dyn.module_name or ""), mod.name
+                    )
+                except ImportError:
+                    continue
+                sub_id = self.finder.find_top_level_module(module_name)
+            elif dyn.is_relative_import():
+                sub_id = self.finder.find_relative_module(dyn.module_name, dyn.relative_level, mod.id)
+                if sub_id is None:
+                    continue
+            else:
+                assert dyn.module_name is not None
+                sub_id = self.finder.find_top_level_module(dyn.module_name)
+            mod.add_dynamic_import(sub_id, dyn.kind)
 
     def _extract_module_import_names(
         self, root_cst: libcst.Module
-    ) -> Tuple[List["ImportDescription"], List["FromImportDescription"]]:
+    ) -> Tuple[List["ImportDescription"], List["FromImportDescription"], List["DynamicImportDescription"]]:
         # go through all the import statements and parse out the modules
+        collector = _ImportCollector(root_cst)
+        root_cst.visit(collector)
+        return collector.package_imports, collector.from_imports, collector.dynamic_imports
+
+    def _extract_code_import_names(
+        self, code: CodeType
+    ) -> Tuple[List["ImportDescription"], List["FromImportDescription"]]:
         package_imports: List[ImportDescription] = []
         from_imports: List[FromImportDescription] = []
-        import_exprs = cstm.findall(root_cst, cstm.OneOf(cstm.Import(), cstm.ImportFrom()))
-        for import_expr in import_exprs:
-            logger.debug(f"- {root_cst.code_for_node(import_expr)}")
-            # get module name. Right now we dont use the module alias name, so we dont save it.
-            if cstm.matches(import_expr, cstm.Import()):
-                assert isinstance(import_expr, libcst.Import)
-                for alias in import_expr.names:
-                    import_desc = ImportDescription(alias.evaluated_name)
-                    if import_desc not in package_imports:
-                        package_imports.append(import_desc)
-            if cstm.matches(import_expr, cstm.ImportFrom()):
-                # cases:
-                # If module is None and relative is none, that cannot happen. -> log error
-                # - from . or ..  -> module is None, and relative is not empty
-                # - from .foo -> module is a Name and relative is not empty
-                # - from foo -> module is a Name and relative is empty
-                # - from foo.bar -> module is an Attribute and relative is empty
-                assert isinstance(import_expr, libcst.ImportFrom)
-                step_level = len(import_expr.relative)
-                module_name = None
-                if isinstance(import_expr.module, libcst.Attribute):
-                    module_name = root_cst.code_for_node(import_expr.module)
-                elif isinstance(import_expr.module, libcst.Name):
-                    module_name = import_expr.module.value
-
-                if isinstance(import_expr.names, collections.abc.Sequence):
-                    targets = [alias.evaluated_name for alias in import_expr.names]
-                    desc = FromImportDescription(module_name, targets, step_level)
-                    if desc not in from_imports:
-                        from_imports.append(desc)
+        for module_name, fromlist, level, is_function_local in iter_code_imports(code):
+            kind = ImportKind.FunctionLocal if is_function_local else ImportKind.TopLevel
+            if fromlist is None and level == 0:
+                desc = ImportDescription(module_name, kind)
+                if desc not in package_imports:
+                    package_imports.append(desc)
+                continue
+            # 'import a.b' is the only import without a fromlist, relative imports are always 'from' imports
+            targets = constants.STAR_IMPORT if fromlist == (constants.STAR_IMPORT,) else list(fromlist or [])
+            from_desc = FromImportDescription(module_name or None, targets, level, kind)
+            if from_desc not in from_imports:
+                from_imports.append(from_desc)
+        return package_imports, from_imports
+
+
+class _ImportCollector(libcst.CSTVisitor):
+    """Collects the import statements of a module, and classifies them by the context they are in.
+    Calls of importlib.import_module and __import__ are collected too, when their module name can be resolved
+    from string literals and module-level string constants.
+    """
+
+    _TYPE_CHECKING_TEST = cstm.OneOf(cstm.Name("TYPE_CHECKING"), cstm.Attribute(attr=cstm.Name("TYPE_CHECKING")))
+    _PLATFORM_CHECK = cstm.OneOf(
+        cstm.Attribute(value=cstm.Name("sys"), attr=cstm.Name("platform")),
+        cstm.Attribute(value=cstm.Name("os"), attr=cstm.Name("name")),
+        cstm.Attribute(value=cstm.Name("platform"), attr=cstm.Name("system")),
+    )
+    # Handlers of broader exceptions (ex: 'except Exception:') also run for other errors, so they are not fallbacks
+    _FALLBACK_EXCEPTIONS = {"ImportError", "ModuleNotFoundError"}
+    _IMPORT_MODULE_FUNCTION = cstm.OneOf(
+        cstm.Attribute(value=cstm.Name("importlib"), attr=cstm.Name("import_module")), cstm.Name("import_module")
+    )
+    _CURRENT_PACKAGE = cstm.OneOf(cstm.Name("__package__"), cstm.Name("__name__"))
+
+    def __init__(self, root_cst: libcst.Module) -> None:
+        super().__init__()
+        self.root_cst = root_cst
+        self.package_imports: List[ImportDescription] = []
+        self.from_imports: List[FromImportDescription] = []
+        self.dynamic_imports: List[DynamicImportDescription] = []
+        self._kinds: List[ImportKind] = [ImportKind.TopLevel]
+        self._string_constants: Dict[str, str] = {}
+
+    def visit_Module(self, node: libcst.Module) -> Optional[bool]:
+        # Functions can use constants which are defined below them, so the constants are collected before the calls
+        node.visit(_StringConstantCollector(self._string_constants, self._evaluate_string))
+        return True
+
+    def _current_kind(self) -> ImportKind:
+        return max(self._kinds, key=lambda kind: kind.value)
+
+    def visit_FunctionDef(self, node: libcst.FunctionDef) -> Optional[bool]:
+        self._kinds.append(ImportKind.FunctionLocal)
+        return True
+
+    def leave_FunctionDef(self, original_node: libcst.FunctionDef) -> None:
+        self._kinds.pop()
+
+    def visit_If_body(self, node: libcst.If) -> None:
+        if cstm.matches(node.test, self._TYPE_CHECKING_TEST):
+            self._kinds.append(ImportKind.TypeChecking)
+        elif self._is_platform_check(node.test):
+            self._kinds.append(ImportKind.PlatformGuarded)
+        else:
+            self._kinds.append(ImportKind.TopLevel)
+
+    def leave_If_body(self, node: libcst.If) -> None:
+        self._kinds.pop()
+
+    def visit_If_orelse(self, node: libcst.If) -> None:
+        # The else branch of a TYPE_CHECKING check is executed at runtime
+        self._kinds.append(ImportKind.PlatformGuarded if self._is_platform_check(node.test) else ImportKind.TopLevel)
+
+    def leave_If_orelse(self, node: libcst.If) -> None:
+        self._kinds.pop()
+
+    def visit_ExceptHandler(self, node: libcst.ExceptHandler) -> Optional[bool]:
+        self._kinds.append(ImportKind.Fallback if self._is_import_error_handler(node) else ImportKind.TopLevel)
+        return True
+
+    def leave_ExceptHandler(self, original_node: libcst.ExceptHandler) -> None:
+        self._kinds.pop()
+
+    def visit_Import(self, node: libcst.Import) -> Optional[bool]:
+        logger.opt(lazy=True).debug("- {}", lambda: self.root_cst.code_for_node(node))
+        # get module name. Right now we dont use the module alias name, so we dont save it.
+        for alias in node.names:
+            import_desc = ImportDescription(alias.evaluated_name, self._current_kind())
+            if import_desc not in self.package_imports:
+                self.package_imports.append(import_desc)
+        return False
+
+    def visit_ImportFrom(self, node: libcst.ImportFrom) -> Optional[bool]:
+        logger.opt(lazy=True).debug("- {}", lambda: self.root_cst.code_for_node(node))
+        # cases:
+        # If module is None and relative is none, that cannot happen. -> log error
+        # - from . or ..  -> module is None, and relative is not empty
+        # - from .foo -> module is a Name and relative is not empty
+        # - from foo -> module is a Name and relative is empty
+        # - from foo.bar -> module is an Attribute and relative is empty
+        step_level = len(node.relative)
+        module_name = None
+        if isinstance(node.module, libcst.Attribute):
+            module_name = self.root_cst.code_for_node(node.module)
+        elif isinstance(node.module, libcst.Name):
+            module_name = node.module.value
+
+        if isinstance(node.names, collections.abc.Sequence):
+            targets = [alias.evaluated_name for alias in node.names]
+            desc = FromImportDescription(module_name, targets, step_level, self._current_kind())
+        else:
+            desc = FromImportDescription(module_name, constants.STAR_IMPORT, step_level, self._current_kind())
+        if desc not in self.from_imports:
+            self.from_imports.append(desc)
+        return False
+
+    def visit_Call(self, node: libcst.Call) -> Optional[bool]:
+        if cstm.matches(node.func, self._IMPORT_MODULE_FUNCTION):
+            desc = self._describe_import_module_call(node)
+        elif cstm.matches(node.func, cstm.Name("__import__")):
+            desc = self._describe_dunder_import_call(node)
+        else:
+            return True
+
+        if desc is None:
+            logger.opt(lazy=True).debug(
+                "Could not resolve dynamic import - {}", lambda: self.root_cst.code_for_node(node)
+            )
+        elif desc not in self.dynamic_imports:
+            logger.opt(lazy=True).debug("- {}", lambda: self.root_cst.code_for_node(node))
+            self.dynamic_imports.append(desc)
+        return True
+
+    def _describe_import_module_call(self, node: libcst.Call) -> Optional["DynamicImportDescription"]:
+        # importlib.import_module(name, package=None)
+        name_arg = self._get_argument(node, 0, "name")
+        if name_arg is None:
+            return None
+        module_name = self._evaluate_string(name_arg)
+        if module_name is None:
+            return None
+        if not module_name.startswith("."):
+            return DynamicImportDescription(module_name, 0, self._current_kind())
+
+        package_arg = self._get_argument(node, 1, "package")
+        if package_arg is None:
+            return None
+        if cstm.matches(package_arg, self._CURRENT_PACKAGE):
+            relative_name = module_name.lstrip(".")
+            relative_level = len(module_name) - len(relative_name)
+            relative_to_module = cstm.matches(package_arg, cstm.Name("__name__"))
+            return DynamicImportDescription(
+                relative_name or None, relative_level, self._current_kind(), relative_to_module
+            )
+        package_name = self._evaluate_string(package_arg)
+        if package_name is None:
+            return None
+        try:
+            return DynamicImportDescription(
+                importlib.util.resolve_name(module_name, package_name), 0, self._current_kind()
+            )
+        except ImportError:
+            return None
+
+    def _describe_dunder_import_call(self, node: libcst.Call) -> Optional["DynamicImportDescription"]:
+        # __import__(name, globals=None, locals=None, fromlist=(), level=0)
+        name_arg = self._get_argument(node, 0, "name")
+        if name_arg is None:
+            return None
+        module_name = self._evaluate_string(name_arg)
+        if module_name is None:
+            return None
+        relative_level = 0
+        level_arg = self._get_argument(node, 4, "level")
+        if level_arg is not None:
+            if not isinstance(level_arg, libcst.Integer):
+                return None
+            relative_level = int(level_arg.evaluated_value)
+        if relative_level == 0 and len(module_name) == 0:
+            return None
+        return DynamicImportDescription(module_name or None, relative_level, self._current_kind())
+
+    def _get_argument(self, node: libcst.Call, position: int, keyword: str) -> Optional[libcst.BaseExpression]:
+        for index, arg in enumerate(node.args):
+            if arg.keyword is not None:
+                if arg.keyword.value == keyword:
+                    return arg.value
+            elif arg.star == "" and index == position:
+                return arg.value
+        return None
+
+    def _evaluate_string(self, expr: libcst.BaseExpression) -> Optional[str]:
+        """Evaluates string literals, f-strings and concatenations built from string literals and constants."""
+        if isinstance(expr, libcst.SimpleString):
+            value = expr.evaluated_value
+            return value if isinstance(value, str) else None
+        if isinstance(expr, libcst.Name):
+            return self._string_constants.get(expr.value, None)
+        if isinstance(expr, libcst.ConcatenatedString):
+            left, right = self._evaluate_string(expr.left), self._evaluate_string(expr.right)
+            return left + right if (left is not None and right is not None) else None
+        if isinstance(expr, libcst.BinaryOperation) and isinstance(expr.operator, libcst.Add):
+            left, right = self._evaluate_string(expr.left), self._evaluate_string(expr.right)
+            return left + right if (left is not None and right is not None) else None
+        if isinstance(expr, libcst.FormattedString):
+            parts: List[str] = []
+            for part in expr.parts:
+                if isinstance(part, libcst.FormattedStringText):
+                    parts.append(part.value)
+                elif (
+                    isinstance(part, libcst.FormattedStringExpression)
+                    and part.conversion is None
+                    and part.format_spec is None
+                ):
+                    value = self._evaluate_string(part.expression)
+                    if value is None:
+                        return None
+                    parts.append(value)
                 else:
-                    desc = FromImportDescription(module_name, constants.STAR_IMPORT, step_level)
-                    if desc not in from_imports:
-                        from_imports.append(desc)
+                    return None
+            return "".join(parts)
+        return None
 
-        return package_imports, from_imports
+    def _is_platform_check(self, test: libcst.BaseExpression) -> bool:
+        return len(cstm.findall(test, self._PLATFORM_CHECK)) > 0
+
+    def _is_import_error_handler(self, handler: libcst.ExceptHandler) -> bool:
+        if handler.type is None:
+            return False
+        exception_types = handler.type.elements if isinstance(handler.type, libcst.Tuple) else [handler.type]
+        for exception_type in exception_types:
+            if isinstance(exception_type, libcst.Element):
+                exception_type = exception_type.value
+            if isinstance(exception_type, libcst.Name) and exception_type.value in self._FALLBACK_EXCEPTIONS:
+                return True
+        return False
 
 
 @dataclass(eq=True, frozen=True)
@@ -105,6 +350,7 @@ class ImportDescription:
     """ex: import package_name"""
 
     package_name: str
+    kind: ImportKind = ImportKind.TopLevel
 
 
 @dataclass(eq=True, frozen=True)
@@ -117,6 +363,127 @@ class FromImportDescription:
     package_name: Optional[str]
     targets: Union[str, List[str]]
     relative_level: Optional[int] = None
+    kind: ImportKind = ImportKind.TopLevel
 
     def is_relative_import(self) -> bool:
         return self.relative_level is not None and self.relative_level > 0
+
+
+@dataclass(eq=True, frozen=True)
+class DynamicImportDescription:
+    """ex: importlib.import_module("package_name")
+    ex: importlib.import_module("..package_name", __package__)
+                                 ^^-- relative_level = 2
+    """
+
+    module_name: Optional[str]
+    relative_level: int = 0
+    kind: ImportKind = ImportKind.TopLevel
+    # The name is relative to __name__ instead of __package__, which differ for modules which are not packages
+    relative_to_module: bool = False
+
+    def is_relative_import(self) -> bool:
+        return self.relative_level > 0
+
+
+class _StringConstantCollector(libcst.CSTVisitor):
+    """
+    Collects the module-level names which are assigned a string, they are often used to build module names.
+    Names which are bound in any other way too (ex: 'NAME += ...', 'for NAME in ...', 'global NAME' in a function)
+    are left out, their value at the time of a call is unknown. Function and class scopes are not collected.
+    """
+
+    def __init__(
+        self, constants: Dict[str, str], evaluate_string: Callable[[libcst.BaseExpression], Optional[str]]
+    ) -> None:
+        super().__init__()
+        self.constants = constants
+        self.evaluate_string = evaluate_string
+        self._ambiguous_names: Set[str] = set()
+
+    def visit_FunctionDef(self, node: libcst.FunctionDef) -> Optional[bool]:
+        self._set_ambiguous(node.name)
+        for statement in cstm.findall(node, cstm.Global()):
+            if isinstance(statement, libcst.Global):
+                for item in statement.names:
+                    self._set_ambiguous(item.name)
+        return False
+
+    def visit_ClassDef(self, node: libcst.ClassDef) -> Optional[bool]:
+        self._set_ambiguous(node.name)
+        return False
+
+    def visit_Lambda(self, node: libcst.Lambda) -> Optional[bool]:
+        return False
+
+    def visit_Assign(self, node: libcst.Assign) -> Optional[bool]:
+        if len(node.targets) == 1 and isinstance(node.targets[0].target, libcst.Name):
+            self._add_constant(node.targets[0].target, node.value)
+        else:
+            for target in node.targets:
+                self._set_ambiguous(target.target)
+        return True
+
+    def visit_AnnAssign(self, node: libcst.AnnAssign) -> Optional[bool]:
+        if node.value is not None and isinstance(node.target, libcst.Name):
+            self._add_constant(node.target, node.value)
+        else:
+            self._set_ambiguous(node.target)
+        return True
+
+    def visit_AugAssign(self, node: libcst.AugAssign) -> Optional[bool]:
+        self._set_ambiguous(node.target)
+        return True
+
+    def visit_For(self, node: libcst.For) -> Optional[bool]:
+        self._set_ambiguous(node.target)
+        return True
+
+    def visit_WithItem(self, node: libcst.WithItem) -> Optional[bool]:
+        if node.asname is not None:
+            self._set_ambiguous(node.asname.name)
+        return True
+
+    def visit_NamedExpr(self, node: libcst.NamedExpr) -> Optional[bool]:
+        self._set_ambiguous(node.target)
+        return True
+
+    def visit_ExceptHandler(self, node: libcst.ExceptHandler) -> Optional[bool]:
+        if node.name is not None:
+            self._set_ambiguous(node.name.name)
+        return True
+
+    def visit_ImportAlias(self, node: libcst.ImportAlias) -> Optional[bool]:
+        if node.asname is not None:
+            self._set_ambiguous(node.asname.name)
+            return True
+        bound_name = node.name  # 'import a.b' binds 'a'
+        while isinstance(bound_name, libcst.Attribute):
+            bound_name = bound_name.value
+        self._set_ambiguous(bound_name)
+        return True
+
+    def visit_Del(self, node: libcst.Del) -> Optional[bool]:
+        self._set_ambiguous(node.target)
+        return True
+
+    def _add_constant(self, target: libcst.Name, value_node: libcst.BaseExpression):
+        name = target.value
+        if name in self._ambiguous_names:
+            return
+        value = self.evaluate_string(value_node)
+        if value is None or self.constants.get(name, value) != value:
+            self._set_ambiguous(target)
+        else:
+            self.constants[name] = value
+
+    def _set_ambiguous(self, target: libcst.BaseExpression):
+        """Marks the names bound by an assignment target, ex: 'a, (b, *c)'."""
+        if isinstance(target, libcst.Name):
+            self.constants.pop(target.value, None)
+            self._ambiguous_names.add(target.value)
+        elif isinstance(target, (libcst.Tuple, libcst.List)):
+            for element in target.elements:
+                self._set_ambiguous(element.value)
+        elif isinstance(target, libcst.StarredElement):
+            self._set_ambiguous(target.value)
@@ -1,16 +1,30 @@
+import importlib.machinery
 import importlib.util
 from importlib.machinery import ModuleSpec
 from pathlib import Path
 import sys
-from typing import Dict, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from pyprince.utils import logger
-from pyprince.parser.project import ModuleIdentifier
+from pyprince.parser.project import ModuleIdentifier, ModuleKind
 from pyprince.parser import constants
 
 
 class ModuleFinder:
-    def __init__(self) -> None:
+    # Source lines which extend the __path__ of a package with the directories of the same package in other sys.path
+    # entries. See pkgutil.extend_path and pkg_resources.declare_namespace
+    PATH_EXTENSION_MARKERS = ["extend_path", "declare_namespace"]
+
+    def __init__(self, static: bool = False) -> None:
+        """
+        When 'static' is true, modules are resolved only by looking at the filesystem.
+        Otherwise importlib.util.find_spec is used as a fallback, which imports the parent packages of dotted names.
+        """
+        self.static = static
+        # Specs found by static resolution, None means the module was not found
+        self._static_spec_cache: Dict[str, Optional[ModuleSpec]] = dict()
+        # Names which could not be found, so failed lookups are not repeated. Depends on the searched paths.
+        self.missing_modules: Set[str] = set()
         self.update_toplevel_module_paths(sys.path)
         self.path_finder = None
         for finder in sys.meta_path:
@@ -25,13 +39,44 @@ class ModuleFinder:
     def update_toplevel_module_paths(self, paths: Sequence[str]) -> None:
         self._top_level_paths = [Path(p).resolve() for p in paths]
         self._top_level_path_strings = [str(p) for p in self._top_level_paths]
+        self.missing_modules.clear()
+        if self.static:
+            self._static_search_paths = self._top_level_path_strings + self._find_pth_paths(self._top_level_paths)
+            self._static_spec_cache.clear()
+
+    @staticmethod
+    def get_module_kind(spec: Optional[ModuleSpec]) -> ModuleKind:
+        if spec is None:
+            return ModuleKind.Unknown
+        origin = spec.origin
+        if origin is None or origin == "namespace":
+            # Before python 3.7 the origin of namespace packages was 'namespace'
+            if spec.submodule_search_locations is not None:
+                return ModuleKind.Namespace
+            return ModuleKind.Unknown
+        return ModuleFinder.get_origin_kind(origin)
+
+    @staticmethod
+    def get_origin_kind(origin: str) -> ModuleKind:
+        if origin == constants.BUILTIN:
+            return ModuleKind.Builtin
+        if origin == constants.FROZEN:
+            return ModuleKind.Frozen
+        if origin.endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES)) or origin.endswith(".pyd"):
+            return ModuleKind.Extension
+        if origin.endswith(tuple(importlib.machinery.BYTECODE_SUFFIXES)) or origin.endswith(".pyo"):
+            return ModuleKind.Bytecode
+        if origin.endswith(tuple(importlib.machinery.SOURCE_SUFFIXES)):
+            return ModuleKind.Source
+        return ModuleKind.Unknown
 
     def is_parsable_origin(self, module_origin: str) -> bool:
         return not (
             (module_origin in [constants.BUILTIN, constants.FROZEN])
-            or (module_origin.endswith(".pyd"))
-            or (module_origin.endswith(".pyc"))
-            or (module_origin.endswith(".pyo"))
+            or module_origin.endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES))
+            or module_origin.endswith(".pyd")
+            or module_origin.endswith(".pyc")
+            or module_origin.endswith(".pyo")
         )
 
     def find_top_level_module(self, module_name: str) -> ModuleIdentifier:
@@ -45,7 +90,7 @@ class ModuleFinder:
             logger.warning(f"Could not resolve path to top-level module {module_name}")
             return ModuleIdentifier(module_name)
         assert mod_id.spec is not None
-        logger.trace(f"Resolved module {mod_id.name} from {module_name} to {mod_id.spec.origin}")
+        logger.trace("Resolved module {} from {} to {}", mod_id.name, module_name, mod_id.spec.origin)
         return mod_id
 
     def try_find_top_level_module(self, module_name: str) -> Optional[ModuleIdentifier]:
@@ -54,6 +99,8 @@ class ModuleFinder:
         """
         if module_name in self.module_cache:
             return self.module_cache[module_name]
+        if module_name in self.missing_modules:
+            return None
         spec = None
 
         if "." in module_name:
@@ -73,9 +120,10 @@ class ModuleFinder:
         if spec is None:
             spec = self.find_spec(module_name)
             if spec is None:
+                self.missing_modules.add(module_name)
                 return None
 
-        mod_id = ModuleIdentifier(module_name, spec)
+        mod_id = ModuleIdentifier(module_name, spec, self.get_module_kind(spec))
         self.module_cache[module_name] = mod_id
         return mod_id
 
@@ -117,7 +165,11 @@ class ModuleFinder:
             mod_id = ModuleIdentifier(full_module_name)
         else:
             logger.trace(
-                f"Resolved relative module to {mod_id.name} from module {parent_module.name} {'.'*relative_level} {module_name}"
+                "Resolved relative module to {} from module {} {} {}",
+                mod_id.name,
+                parent_module.name,
+                "." * relative_level,
+                module_name,
             )
         return mod_id
 
@@ -134,7 +186,12 @@ class ModuleFinder:
     def find_spec(self, module_name: str, parent_name: Optional[str] = None) -> Optional[ModuleSpec]:
         """Wrapper around importlib.util.find_spec to find location of module by its full name.
         If module_name is relative (starts with .) then parent_name is used to resolve the full name.
+        In static mode the spec is found without importing anything.
         """
+        if self.static:
+            if module_name.startswith("."):
+                module_name = importlib.util.resolve_name(module_name, parent_name)
+            return self.find_spec_static(module_name)
         try:
             # I was debating doing the full resolution in module_finder to avoid running unknown code for security reasons.
             # Unforunately that is very complicated. For submodule imports, python relies on interpreting the code of
@@ -159,3 +216,77 @@ class ModuleFinder:
 
         spec = self.path_finder.find_spec(name, path)
         return spec
+
+    def find_spec_static(self, module_name: str) -> Optional[ModuleSpec]:
+        """
+        Finds the spec of a module by its full name, without executing the code of its parent packages.
+        Submodules are searched in the submodule_search_locations of their parent packages, which covers
+        namespace packages (PEP 420). Packages which extend their __path__ are searched in every sys.path entry.
+        """
+        if module_name in self._static_spec_cache:
+            return self._static_spec_cache[module_name]
+
+        spec = None
+        if module_name in sys.builtin_module_names:
+            spec = importlib.machinery.BuiltinImporter.find_spec(module_name)
+        if spec is None:
+            spec = importlib.machinery.FrozenImporter.find_spec(module_name)
+        if spec is None and self.path_finder is not None:
+            if "." not in module_name:
+                spec = self.path_finder.find_spec(module_name, self._static_search_paths)
+            else:
+                parent_name, _ = self.split_package_name(module_name)
+                parent_spec = self.find_spec_static(parent_name)
+                if (parent_spec is not None) and (parent_spec.submodule_search_locations is not None):
+                    search_paths = list(parent_spec.submodule_search_locations)
+                    search_paths += self._find_extended_package_paths(parent_name, parent_spec, search_paths)
+                    spec = self.path_finder.find_spec(module_name, search_paths)
+
+        if spec is None:
+            logger.debug(f"Could not find module {module_name} statically")
+        self._static_spec_cache[module_name] = spec
+        return spec
+
+    def _find_extended_package_paths(self, package_name: str, spec: ModuleSpec, known_paths: List[str]) -> List[str]:
+        if (spec.origin is None) or (not spec.origin.endswith(".py")):
+            return []
+        try:
+            source = Path(spec.origin).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return []
+        if not any(marker in source for marker in ModuleFinder.PATH_EXTENSION_MARKERS):
+            return []
+
+        extended_paths = []
+        package_parts = package_name.split(".")
+        for search_path in self._static_search_paths:
+            package_dir = Path(search_path).joinpath(*package_parts)
+            if package_dir.is_dir() and str(package_dir) not in known_paths:
+                extended_paths.append(str(package_dir))
+        return extended_paths
+
+    @staticmethod
+    def _find_pth_paths(paths: Sequence[Path]) -> List[str]:
+        """
+        Returns the directories listed in the .pth files of the site directories, which are not in paths.
+        Lines starting with 'import' are executed by the site module, those are skipped.
+        """
+        pth_paths: List[str] = []
+        known_paths = {str(p) for p in paths}
+        for site_dir in paths:
+            if site_dir.name not in ["site-packages", "dist-packages"] or not site_dir.is_dir():
+                continue
+            for pth_file in sorted(site_dir.glob("*.pth")):
+                try:
+                    lines = pth_file.read_text(encoding="utf-8", errors="replace").splitlines()
+                except OSError:
+                    continue
+                for line in lines:
+                    line = line.strip()
+                    if (not line) or line.startswith("#") or line.startswith(("import ", "import\t")):
+                        continue
+                    pth_path = (site_dir / line).resolve()
+                    if pth_path.is_dir() and str(pth_path) not in known_paths:
+                        known_paths.add(str(pth_path))
+                        pth_paths.append(str(pth_path))
+        return pth_paths
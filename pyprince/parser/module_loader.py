@@ -0,0 +1,120 @@
+import dis
+from importlib.machinery import ModuleSpec
+import importlib.util
+import inspect
+import marshal
+from pathlib import Path
+from types import CodeType
+from typing import Dict, Iterable, List, Optional, Tuple
+import zipfile
+
+from pyprince.utils import logger
+
+# Size of the header of .pyc files since python 3.7: magic number, flags, and source mtime and size or hash
+PYC_HEADER_SIZE = 16
+
+
+class ModuleLoader:
+    """
+    Reads the source or the bytecode of modules without importing them.
+    Files are read from the filesystem, or straight from zip archives (ex: zipapps), using a cached handle per archive.
+    When neither works, the loader of the module spec is asked for the source.
+    """
+
+    def __init__(self) -> None:
+        # Opened zip archives by their path, None means the path is not a zip archive
+        self._zip_files: Dict[str, Optional[zipfile.ZipFile]] = dict()
+
+    def get_source(self, spec: ModuleSpec) -> Optional[bytes]:
+        if spec.origin is None:
+            return None
+        content = self.read_origin(spec.origin)
+        if content is not None:
+            return content
+
+        get_source = getattr(spec.loader, "get_source", None)
+        if get_source is None:
+            return None
+        try:
+            source = get_source(spec.name)
+        except ImportError:
+            logger.debug(f"Loader of module {spec.name} could not get its source")
+            return None
+        return source.encode("utf-8") if source is not None else None
+
+    def get_code(self, spec: ModuleSpec) -> Optional[CodeType]:
+        """Loads the code object of a bytecode-only module."""
+        if spec.origin is None:
+            return None
+        content = self.read_origin(spec.origin)
+        if content is None or len(content) < PYC_HEADER_SIZE:
+            return None
+        if content[:4] != importlib.util.MAGIC_NUMBER:
+            logger.warning(f"Bytecode of module {spec.name} was compiled by a different python version")
+            return None
+        code = marshal.loads(content[PYC_HEADER_SIZE:])
+        return code if isinstance(code, CodeType) else None
+
+    def read_origin(self, origin: str) -> Optional[bytes]:
+        """Reads the file at origin, which may point to a file inside a zip archive."""
+        origin_path = Path(origin)
+        if origin_path.is_file():
+            return origin_path.read_bytes()
+
+        archive, inner_path = self._find_zip_archive(origin_path)
+        if archive is None:
+            return None
+        try:
+            return archive.read(inner_path)
+        except KeyError:
+            return None
+
+    def close(self):
+        for archive in self._zip_files.values():
+            if archive is not None:
+                archive.close()
+        self._zip_files.clear()
+
+    def _find_zip_archive(self, path: Path) -> Tuple[Optional[zipfile.ZipFile], str]:
+        # ex: /path/app.pyz/package/module.py -> (/path/app.pyz, package/module.py)
+        for archive_path in path.parents:
+            archive_key = str(archive_path)
+            if archive_key not in self._zip_files:
+                if archive_path.is_dir() or not archive_path.exists():
+                    continue
+                self._zip_files[archive_key] = (
+                    zipfile.ZipFile(archive_path) if zipfile.is_zipfile(archive_path) else None
+                )
+            archive = self._zip_files[archive_key]
+            if archive is None:
+                return None, ""
+            return archive, path.relative_to(archive_path).as_posix()
+        return None, ""
+
+
+def iter_code_imports(code: CodeType) -> Iterable[Tuple[str, Optional[Tuple[str, ...]], int, bool]]:
+    """
+    Yields the imports of a code object and its nested code objects from their IMPORT_NAME opcodes,
+    as (module_name, fromlist, level, is_function_local) tuples.
+    ex: 'from ..package import name' -> ('package', ('name',), 2, False)
+    The level and the fromlist are the values loaded by the two instructions before IMPORT_NAME. They are read by
+    their value, because the loading opcode changes between versions (ex: LOAD_SMALL_INT loads the level since 3.14).
+    """
+    remaining = [(code, False)]
+    while remaining:
+        current, is_function_local = remaining.pop()
+        previous: List[dis.Instruction] = []
+        for instruction in dis.get_instructions(current):
+            if instruction.opname == "IMPORT_NAME" and len(previous) == 2:
+                level, fromlist = previous[0].argval, previous[1].argval
+                if (
+                    isinstance(level, int)
+                    and not isinstance(level, bool)
+                    and (fromlist is None or isinstance(fromlist, tuple))
+                ):
+                    yield instruction.argval, fromlist, level, is_function_local
+            previous = previous[-1:] + [instruction]
+        for const in current.co_consts:
+            if isinstance(const, CodeType):
+                # Class bodies run when the module is loaded, function bodies when they are called
+                remaining.append((const, is_function_local or bool(const.co_flags & inspect.CO_NEWLOCALS)))
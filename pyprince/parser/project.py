@@ -4,16 +4,28 @@ from dataclasses import dataclass, field
 import enum
 from importlib.machinery import ModuleSpec
 from types import FunctionType, ModuleType
-from typing import Iterable, Optional, Set, Union, List
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Union, List
 import inspect
 
 import libcst
+from libcst.metadata import CodeRange, MetadataWrapper, PositionProvider
+
+
+class ModuleKind(enum.Enum):
+    Unknown = 0
+    Source = 1  # .py file, the only kind which can be parsed
+    Extension = 2  # Native extension module, ex: .so or .pyd file
+    Builtin = 3  # Compiled into the interpreter
+    Frozen = 4  # Frozen into the interpreter
+    Namespace = 5  # Namespace package without an __init__ file (PEP 420)
+    Bytecode = 6  # Only a .pyc file exists
 
 
 @dataclass(frozen=True)
 class ModuleIdentifier:
     name: str
     spec: Optional[ModuleSpec] = None
+    kind: ModuleKind = ModuleKind.Unknown
 
     def __eq__(self, other):
         if isinstance(other, ModuleIdentifier):
@@ -24,6 +36,16 @@ class ModuleIdentifier:
         return hash(self.name)
 
 
+class ImportKind(enum.Enum):
+    """The context of an import statement. Greater values are less likely to be executed when the module is loaded."""
+
+    TopLevel = 0  # Executed when the module is loaded
+    Fallback = 1  # In an 'except ImportError' handler, only executed when another import fails
+    FunctionLocal = 2  # In a function body, only executed when the function is called
+    PlatformGuarded = 3  # In a branch of a 'sys.platform', 'os.name' or 'platform.system()' check
+    TypeChecking = 4  # In an 'if TYPE_CHECKING' block, never executed at runtime
+
+
 @dataclass
 class Module:
     id: ModuleIdentifier
@@ -31,15 +53,58 @@ class Module:
     syntax_tree: Union[libcst.Module, None]  # None means the module could not be parsed
     name: str = field(init=False)
     submodules: List[ModuleIdentifier] = field(default_factory=list)
+    # The names imported from a submodule with 'from submodule import name'. Submodules imported as a whole are missing.
+    imported_symbols: Dict[str, Set[str]] = field(default_factory=dict)
+    # The contexts of the import statements of each submodule
+    import_kinds: Dict[str, Set[ImportKind]] = field(default_factory=dict)
+    # The submodules imported with importlib.import_module or __import__ calls
+    dynamic_imports: Set[str] = field(default_factory=set)
 
     def __post_init__(self):
         self.name = self.id.name
 
-    def add_submodule(self, submodule: Union[ModuleIdentifier, Module]):
+    @property
+    def kind(self) -> ModuleKind:
+        return self.id.kind
+
+    def add_submodule(self, submodule: Union[ModuleIdentifier, Module], kind: ImportKind = ImportKind.TopLevel):
         if isinstance(submodule, Module):
             submodule = submodule.id
         if submodule not in self.submodules:
             self.submodules.append(submodule)
+        self.import_kinds.setdefault(submodule.name, set()).add(kind)
+
+    def add_imported_symbol(
+        self, submodule: Union[ModuleIdentifier, Module], symbol_name: str, kind: ImportKind = ImportKind.TopLevel
+    ):
+        """Adds submodule as a dependency, and records that symbol_name is imported from it."""
+        self.add_submodule(submodule, kind)
+        self.imported_symbols.setdefault(submodule.name, set()).add(symbol_name)
+
+    def add_dynamic_import(self, submodule: Union[ModuleIdentifier, Module], kind: ImportKind = ImportKind.TopLevel):
+        """Adds submodule as a dependency, which is imported by calling importlib.import_module or __import__."""
+        self.add_submodule(submodule, kind)
+        self.dynamic_imports.add(submodule.name)
+
+    def get_submodules(self, skip_import_kinds: Optional[Set[ImportKind]] = None) -> List[ModuleIdentifier]:
+        """Returns the submodules which are imported by at least one import statement not in skip_import_kinds."""
+        if not skip_import_kinds:
+            return self.submodules
+        return [
+            sub
+            for sub in self.submodules
+            if not self.import_kinds.get(sub.name, {ImportKind.TopLevel}).issubset(skip_import_kinds)
+        ]
+
+
+@dataclass(frozen=True)
+class ImportEdge:
+    """An import of the target module by the source module."""
+
+    source: str
+    target: str
+    kinds: FrozenSet[ImportKind] = frozenset({ImportKind.TopLevel})
+    dynamic: bool = False  # Imported with importlib.import_module or __import__
 
 
 class PackageType(enum.Enum):
@@ -63,6 +128,31 @@ class Package:
             self.modules.add(module.name)
 
 
+class SymbolKind(enum.Enum):
+    Function = 0
+    Class = 1
+    Variable = 2
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A function, class or variable defined in a module. Members of classes are qualified with the class name.
+    ex: module.function, module.Class, module.Class.method"""
+
+    qualified_name: str
+    module_name: str
+    kind: SymbolKind
+    # The defining node in the syntax tree of the module, None if the project does not keep syntax trees
+    node: Optional[libcst.CSTNode] = field(compare=False, repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.qualified_name.rpartition(".")[2]
+
+    def is_module_level(self) -> bool:
+        return self.qualified_name == f"{self.module_name}.{self.name}"
+
+
 @dataclass
 class Project:
     # The mapping of aliases to importLocations
@@ -71,6 +161,12 @@ class Project:
     _modules: dict[str, Module] = field(default_factory=dict)
     _syntax_trees: dict[str, libcst.Module] = field(default_factory=dict)
     _packages: dict[str, Package] = field(default_factory=dict)
+    _symbols: dict[str, Symbol] = field(default_factory=dict)
+    _symbols_by_name: dict[str, List[str]] = field(default_factory=dict)
+    _symbol_positions: dict[str, dict[libcst.CSTNode, CodeRange]] = field(default_factory=dict)
+    # Names of imported modules which could not be found, with the package directory they were looked up in.
+    # The directory is None for top-level modules, which are looked up in sys.path.
+    _unresolved_modules: dict[str, Optional[str]] = field(default_factory=dict)
 
     def add_root_module(self, module_name: str):
         self._root_modules.append(module_name)
@@ -104,6 +200,28 @@ class Project:
     def get_modules(self) -> Iterable[str]:
         return self._modules.keys()
 
+    def iter_modules(self) -> Iterable[Module]:
+        return self._modules.values()
+
+    def iter_edges(self) -> Iterable[ImportEdge]:
+        """Yields the imports between the modules of the project, in the order they were added."""
+        for mod in self.iter_modules():
+            for sub in mod.submodules:
+                kinds = frozenset(mod.import_kinds.get(sub.name, {ImportKind.TopLevel}))
+                yield ImportEdge(mod.name, sub.name, kinds, sub.name in mod.dynamic_imports)
+
+    def add_module_to_package(self, package: Package, module: Union[ModuleIdentifier, Module]):
+        package.add_module(module)
+
+    def add_unresolved_module(self, module_name: str, lookup_dir: Optional[str] = None):
+        self._unresolved_modules[module_name] = lookup_dir
+
+    def get_unresolved_modules(self) -> Iterable[str]:
+        return self._unresolved_modules.keys()
+
+    def get_unresolved_module_lookup_dir(self, module_name: str) -> Optional[str]:
+        return self._unresolved_modules.get(module_name, None)
+
     def add_syntax_tree(self, module_name: str, st: libcst.Module):
         self._syntax_trees[module_name] = st
 
@@ -112,6 +230,54 @@ class Project:
             return None
         return self._syntax_trees[module_name]
 
+    def add_symbol(self, symbol: Symbol):
+        if symbol.qualified_name not in self._symbols:
+            self._symbols_by_name.setdefault(symbol.name, []).append(symbol.qualified_name)
+        self._symbols[symbol.qualified_name] = symbol
+
+    def get_symbol(self, qualified_name: str) -> Optional[Symbol]:
+        return self._symbols.get(qualified_name, None)
+
+    def find_symbols(self, name: str) -> List[Symbol]:
+        """Returns all the symbols with the given unqualified name."""
+        return [self._symbols[qualified_name] for qualified_name in self._symbols_by_name.get(name, [])]
+
+    def resolve_symbol(self, module_name: str, symbol_name: str) -> Optional[Symbol]:
+        """Finds the definition of a name imported from a module. If the module only re-exports the name
+        with a 'from ... import name', follows the import to the defining module.
+        Modules only record the imported names, not their aliases: a name re-exported with
+        'from ... import name as alias' is not found by its alias, and is found by its original name."""
+        visited: Set[str] = set()
+        while module_name not in visited:
+            visited.add(module_name)
+            symbol = self.get_symbol(f"{module_name}.{symbol_name}")
+            if symbol is not None:
+                return symbol
+            mod = self.get_module(module_name)
+            if mod is None:
+                return None
+            for source_module, names in mod.imported_symbols.items():
+                if symbol_name in names:
+                    module_name = source_module
+                    break
+            else:
+                return None
+        return None
+
+    def get_symbol_position(self, qualified_name: str) -> Optional[CodeRange]:
+        """Returns the line and column range of the definition of a symbol.
+        Positions are computed for the whole module on first request, because it needs a pass over the module."""
+        symbol = self.get_symbol(qualified_name)
+        if symbol is None or symbol.node is None:
+            return None
+        if symbol.module_name not in self._symbol_positions:
+            syntax_tree = self.get_syntax_tree(symbol.module_name)
+            if syntax_tree is None:
+                return None
+            wrapper = MetadataWrapper(syntax_tree, unsafe_skip_copy=True)
+            self._symbol_positions[symbol.module_name] = dict(wrapper.resolve(PositionProvider))
+        return self._symbol_positions[symbol.module_name].get(symbol.node, None)
+
     def set_loaded_modules_root(self, module: Optional[ModuleType]):
         self._loaded_modules = module
         return self
@@ -122,6 +288,8 @@ class Project:
     def clone(self) -> Project:
         cl = Project().set_loaded_modules_root(self._loaded_modules)
         cl._syntax_trees = self._syntax_trees.copy()
+        cl._symbols = self._symbols.copy()
+        cl._symbols_by_name = {name: list(qualified) for name, qualified in self._symbols_by_name.items()}
         return cl
 
     def iter_loaded_modules(self) -> Iterable[ModuleType]:
@@ -141,7 +309,13 @@ class Project:
     def has_function(self, func_name: str) -> bool:
         return self.get_function(func_name) is not None
 
-    def get_function(self, func_name: str):
+    def get_function(self, func_name: str) -> Optional[libcst.FunctionDef]:
+        """Returns the definition of a module level function by its qualified or unqualified name."""
+        symbol = self._find_function_symbol(func_name)
+        if symbol is not None:
+            assert isinstance(symbol.node, libcst.FunctionDef)
+            return symbol.node
+
         name, module = self.find_module_for_function(func_name)
         if not module:
             return None
@@ -152,12 +326,31 @@ class Project:
             return None
 
     def find_module_for_function(self, func_name: str) -> tuple[Optional[str], Optional[libcst.Module]]:
+        """Looks up the function in the symbol index. If it is not indexed, but the modules are loaded,
+        searches the members of the loaded root module."""
+        symbol = self._find_function_symbol(func_name)
+        if symbol is not None:
+            return symbol.module_name, self.get_syntax_tree(symbol.module_name)
+
+        if self._loaded_modules is None:
+            return None, None
         functions: List[tuple[str, FunctionType]] = inspect.getmembers(self._loaded_modules, inspect.isfunction)
         for name, func in functions:
             if name == func_name:
                 return func.__module__, self.get_syntax_tree(func.__module__)
         return None, None
 
+    def _find_function_symbol(self, func_name: str) -> Optional[Symbol]:
+        symbol = self.get_symbol(func_name)
+        if symbol is not None and symbol.kind == SymbolKind.Function:
+            return symbol
+        candidates = [s for s in self.find_symbols(func_name) if s.kind == SymbolKind.Function and s.is_module_level()]
+        # prefer the functions of the root modules, like the name would be looked up from the entrypoint
+        for candidate in candidates:
+            if candidate.module_name in self._root_modules:
+                return candidate
+        return candidates[0] if len(candidates) > 0 else None
+
     # TODO: Split to classes:
     # - CodeGenerator - generate code for project/module/function
     # - CodeTransformer - Expands function calls, substitute variables, adds/removes new code nodes
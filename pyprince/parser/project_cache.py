@@ -1,10 +1,14 @@
+import importlib.machinery
 import io
 import json
-from typing import Optional
+import os
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 from pyprince.utils.error import PyPrinceException
 from pyprince.parser import constants
 from pyprince.utils import logger
-from pyprince.parser.project import Module, ModuleIdentifier, Package, PackageType, Project
+from pyprince.parser.project import ImportKind, Module, ModuleKind, ModuleIdentifier, Package, PackageType, Project
 
 
 class ProjectCache:
@@ -13,9 +17,19 @@ class ProjectCache:
     PACKAGE_NAME_TAG = "name"
     PACKAGE_PATH_TAG = "path"
     PACKAGE_SUBMODULES_TAG = "submodules"
+    PACKAGE_SYMBOLS_TAG = "symbols"
+    PACKAGE_IMPORT_KINDS_TAG = "import_kinds"
+    PACKAGE_DYNAMIC_IMPORTS_TAG = "dynamic_imports"
+    PACKAGE_KIND_TAG = "kind"
+    MISSING_FINGERPRINT_TAG = "path_fingerprint"
+    MISSING_NAMES_TAG = "names"
 
     def __init__(self) -> None:
         self._project = Project()
+        # Names of modules which could not be found, with the directory and its mtime where they were looked up.
+        # Top-level modules are looked up in sys.path, which is checked with _path_fingerprint.
+        self._missing_modules: Dict[str, Optional[Tuple[str, Optional[int]]]] = {}
+        self._path_fingerprint: Dict[str, Optional[int]] = {}
 
     def find_in_cache(self, module_id: ModuleIdentifier) -> Optional[Module]:
         if self._project.has_module(module_id.name):
@@ -24,18 +38,89 @@ class ProjectCache:
 
     def serialize(self, stream: io.IOBase, project: Project):
         logger.info("Saving cache")
+        save_content = self.serialize_dict(project)
+        if save_content is None:
+            return
+        json.dump(save_content, stream, indent=4)
+
+    def serialize_dict(self, project: Project) -> Optional[dict]:
         std_package = project.get_package(constants.STDLIB_PACKAGE_NAME)
         if std_package is None:
             # TODO: We should save even if there is no stdlib package
             logger.warning(f"{constants.STDLIB_PACKAGE_NAME} was empty, exit from saving.")
-            return
+            return None
 
         std_save_content = self._serialize_package(project, std_package)
 
         save_content = {constants.VERSION_TAG: ProjectCache.SAVE_VERSION, constants.PACKAGE_TAG: {}}
         save_content[constants.PACKAGE_TAG][constants.STDLIB_PACKAGE_NAME] = std_save_content
         logger.info(f"Saving {len(std_save_content)} modules in cache for {constants.STDLIB_PACKAGE_NAME}")
-        json.dump(save_content, stream, indent=4)
+        missing_save_content = self._serialize_missing_modules(project)
+        if len(missing_save_content[ProjectCache.MISSING_NAMES_TAG]) > 0:
+            save_content[constants.MISSING_MODULES_TAG] = missing_save_content
+        return save_content
+
+    def _serialize_missing_modules(self, project: Project):
+        names = {}
+        for module_name in sorted(project.get_unresolved_modules()):
+            lookup_dir = project.get_unresolved_module_lookup_dir(module_name)
+            names[module_name] = [lookup_dir, _get_mtime(lookup_dir)] if lookup_dir is not None else None
+        return {
+            ProjectCache.MISSING_FINGERPRINT_TAG: ProjectCache.get_path_fingerprint(
+                sys.path, self._get_entry_dir(project)
+            ),
+            ProjectCache.MISSING_NAMES_TAG: names,
+        }
+
+    def _get_entry_dir(self, project: Project) -> Optional[str]:
+        roots = project.get_root_modules()
+        root = project.get_module(roots[0]) if len(roots) > 0 else None
+        if root is None or root.path is None:
+            return None
+        return str(Path(root.path).resolve().parent)
+
+    @staticmethod
+    def get_path_fingerprint(paths: Sequence[str], excluded_dir: Optional[str]) -> Dict[str, Optional[int]]:
+        """
+        Maps the directories of paths to their modification time. Adding or removing a module in a directory changes it.
+        The excluded_dir is left out, which is the directory of the entrypoint and changes whenever the project changes.
+        """
+        fingerprint = {}
+        for path in paths:
+            resolved = str(Path(path).resolve())
+            if resolved != excluded_dir:
+                fingerprint[resolved] = _get_mtime(resolved)
+        return fingerprint
+
+    def find_missing_modules(self, paths: Sequence[str], entry_dir: Path) -> Set[str]:
+        """
+        Returns the names of modules which could not be found when the cache was saved, and are still missing.
+        If the directories of paths changed since then, nothing is returned.
+        The entry_dir is not in the fingerprint, so names which may be found there are left out.
+        """
+        entry_dir_string = str(entry_dir.resolve())
+        if ProjectCache.get_path_fingerprint(paths, entry_dir_string) != self._path_fingerprint:
+            if len(self._missing_modules) > 0:
+                logger.info("Directories of sys.path changed, dropping cached missing modules")
+            return set()
+
+        missing = set()
+        for module_name, lookup in self._missing_modules.items():
+            in_entry_dir = self._may_be_in_dir(module_name.partition(".")[0], entry_dir)
+            if lookup is None:
+                if in_entry_dir:
+                    continue
+            elif _get_mtime(lookup[0]) != lookup[1]:
+                continue
+            elif in_entry_dir and not Path(lookup[0]).is_relative_to(entry_dir.resolve()):
+                continue  # The package may be shadowed by a package in the entrypoint directory
+            missing.add(module_name)
+        return missing
+
+    def _may_be_in_dir(self, module_name: str, directory: Path) -> bool:
+        if (directory / module_name).exists():
+            return True
+        return any((directory / f"{module_name}{suffix}").exists() for suffix in importlib.machinery.all_suffixes())
 
     def _serialize_package(self, project: Project, package: Package):
         package_content = {}
@@ -43,23 +128,66 @@ class ProjectCache:
             module = project.get_module(module_name)
             if module is None:
                 raise PyPrinceException(f"Module '{module_name}' was in project packages, but not in modules")
-            package_content[module.name] = {
-                ProjectCache.PACKAGE_NAME_TAG: module_name,
-                ProjectCache.PACKAGE_PATH_TAG: module.path,
-            }
-            submodules = [sub.name for sub in module.submodules]
-            if len(submodules) > 0:
-                package_content[module.name][ProjectCache.PACKAGE_SUBMODULES_TAG] = submodules
+            package_content[module.name] = ProjectCache.serialize_module(module)
         return package_content
 
+    @staticmethod
+    def serialize_module(module: Module) -> dict:
+        module_content = {
+            ProjectCache.PACKAGE_NAME_TAG: module.name,
+            ProjectCache.PACKAGE_PATH_TAG: module.path,
+        }
+        if module.kind != ModuleKind.Unknown:
+            module_content[ProjectCache.PACKAGE_KIND_TAG] = module.kind.name
+        submodules = [sub.name for sub in module.submodules]
+        if len(submodules) > 0:
+            module_content[ProjectCache.PACKAGE_SUBMODULES_TAG] = submodules
+        if len(module.imported_symbols) > 0:
+            module_content[ProjectCache.PACKAGE_SYMBOLS_TAG] = {
+                sub: sorted(names) for sub, names in module.imported_symbols.items()
+            }
+        # Only the submodules imported in other contexts are saved, the rest of them are top-level imports.
+        import_kinds = {
+            sub: sorted(kind.name for kind in kinds)
+            for sub, kinds in module.import_kinds.items()
+            if kinds != {ImportKind.TopLevel}
+        }
+        if len(import_kinds) > 0:
+            module_content[ProjectCache.PACKAGE_IMPORT_KINDS_TAG] = import_kinds
+        if len(module.dynamic_imports) > 0:
+            module_content[ProjectCache.PACKAGE_DYNAMIC_IMPORTS_TAG] = sorted(module.dynamic_imports)
+        return module_content
+
+    @staticmethod
+    def deserialize_module(module_name: str, module_info: dict, project: Optional[Project] = None) -> Module:
+        """Creates a module from its serialized form. Submodules already in the project are referenced from there."""
+        kind = ModuleKind[module_info.get(ProjectCache.PACKAGE_KIND_TAG, ModuleKind.Unknown.name)]
+        module = Module(ModuleIdentifier(module_name, None, kind), module_info[ProjectCache.PACKAGE_PATH_TAG], None)
+
+        for sub in module_info.get(ProjectCache.PACKAGE_SUBMODULES_TAG, []):
+            sub_module = project.get_module(sub) if project is not None else None
+            if sub_module != None:
+                module.add_submodule(sub_module)
+            else:
+                module.add_submodule(ModuleIdentifier(sub, None))
+
+        for sub, names in module_info.get(ProjectCache.PACKAGE_SYMBOLS_TAG, {}).items():
+            module.imported_symbols[sub] = set(names)
+
+        for sub, kind_names in module_info.get(ProjectCache.PACKAGE_IMPORT_KINDS_TAG, {}).items():
+            module.import_kinds[sub] = {ImportKind[kind_name] for kind_name in kind_names}
+
+        module.dynamic_imports.update(module_info.get(ProjectCache.PACKAGE_DYNAMIC_IMPORTS_TAG, []))
+        return module
+
     def load_stream(self, stream: io.IOBase):
         logger.info("Loading cache")
         content = stream.read()
         if len(content) > 0:
-            saved_content = json.loads(content)
-        else:
-            return
+            self.load_dict(json.loads(content))
 
+    def load_dict(self, saved_content):
+        """Loads the content of a saved cache. Modules which are already in the cache are replaced."""
         if not isinstance(saved_content, dict):
             logger.warning("Cache was not dict, stop loading")
             return
@@ -74,14 +202,20 @@ class ProjectCache:
             package = Package(package_name, None, PackageType.Unknown)
             self._project.add_package(package)
             for module_name, module_info in modules.items():
-                module = Module(ModuleIdentifier(module_name, None), module_info[ProjectCache.PACKAGE_PATH_TAG], None)
+                module = ProjectCache.deserialize_module(module_name, module_info, self._project)
                 self._project.add_module(module)
                 package.add_module(module)
 
-                if ProjectCache.PACKAGE_SUBMODULES_TAG in module_info:
-                    for sub in module_info[ProjectCache.PACKAGE_SUBMODULES_TAG]:
-                        sub_module = self._project.get_module(sub)
-                        if sub_module != None:
-                            module.add_submodule(sub_module)
-                        else:
-                            module.add_submodule(ModuleIdentifier(sub, None))
+        missing_content = saved_content.get(constants.MISSING_MODULES_TAG, None)
+        if missing_content is not None:
+            self._path_fingerprint = missing_content[ProjectCache.MISSING_FINGERPRINT_TAG]
+            for module_name, lookup in missing_content[ProjectCache.MISSING_NAMES_TAG].items():
+                self._missing_modules[module_name] = tuple(lookup) if lookup is not None else None
+            logger.info(f"Loaded {len(self._missing_modules)} missing modules in cache")
+
+
+def _get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
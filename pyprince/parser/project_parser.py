@@ -1,18 +1,27 @@
 import queue
+import sqlite3
 import sys
 import os
 from pathlib import Path
-from typing import Optional, Tuple, Union, List
+from types import CodeType
+from typing import Dict, Optional, Set, Tuple, Union, List
 
 import libcst
 
 from pyprince.parser import constants
 from pyprince.parser.import_handler import ImportHandler
 from pyprince.parser.module_finder import ModuleFinder
+from pyprince.parser.module_loader import ModuleLoader
 from pyprince.parser.package_finder import PackageFinder
-from pyprince.parser.project import ModuleIdentifier, Package, PackageType, Project, Module
+from pyprince.parser.project import ImportKind, ModuleIdentifier, ModuleKind, Package, PackageType, Project, Module
+from pyprince.parser.symbol_collector import collect_symbols
 from pyprince.utils import logger
+from pyprince.utils.progress import ProgressReporter
 from pyprince.parser.project_cache import ProjectCache
+from pyprince.parser.shared_cache import SharedModuleCache
+
+# The parser logs its progress after every this many modules, the single modules are only logged at debug level
+PROGRESS_LOG_INTERVAL = 200
 
 
 def parse_project(
@@ -20,6 +29,11 @@ def parse_project(
     project_cache: Optional[ProjectCache] = None,
     shallow_stdlib: bool = False,
     shallow_site_packages: bool = False,
+    skip_import_kinds: Optional[Set[ImportKind]] = None,
+    static_resolve: bool = False,
+    shared_cache: Optional[SharedModuleCache] = None,
+    project: Optional[Project] = None,
+    progress: Optional[ProgressReporter] = None,
 ) -> Project:
     """
     Parses in all the module files starting from an entry_file.
@@ -28,21 +42,58 @@ def parse_project(
     When 'shallow_stdlib' param is true, we wont include the whole stdlib,
     just the surface modules that other modules include.
     When 'shallow_site_packages' is true, we include only the surface modules of packages that are in site-packages.
+    Submodules which are only imported in the contexts of 'skip_import_kinds' (ex: in an 'if TYPE_CHECKING' block)
+    are not followed. They are still kept as submodules of the modules importing them.
+    When 'static_resolve' is true, modules are resolved without importing their parent packages,
+    so no code of the parsed project is executed.
+    If shared_cache is not None, stdlib and site-packages modules parsed by other processes are reused from there,
+    and the ones parsed here are published to it.
+    The parsed modules are added to 'project' if it is given (ex: a SqliteProject), otherwise to a new in-memory Project.
+    If progress is not None, the number of processed and queued modules is reported to it while parsing.
     """
-    parser = ProjectParser(project_cache, shallow_stdlib, shallow_site_packages)
+    parser = ProjectParser(
+        project_cache,
+        shallow_stdlib,
+        shallow_site_packages,
+        skip_import_kinds,
+        static_resolve,
+        shared_cache,
+        project,
+        progress,
+    )
     return parser.parse_project_from_entry_script(entry_file)
 
 
 class ProjectParser:
-    def __init__(self, project_cache: Optional[ProjectCache], shallow_stdlib: bool, shallow_site_packages: bool):
-        self.proj = Project()
-        self.finder = ModuleFinder()
+    def __init__(
+        self,
+        project_cache: Optional[ProjectCache],
+        shallow_stdlib: bool,
+        shallow_site_packages: bool,
+        skip_import_kinds: Optional[Set[ImportKind]] = None,
+        static_resolve: bool = False,
+        shared_cache: Optional[SharedModuleCache] = None,
+        project: Optional[Project] = None,
+        progress: Optional[ProgressReporter] = None,
+    ):
+        self.proj = project if project is not None else Project()
+        self.finder = ModuleFinder(static=static_resolve)
         self.package_finder = PackageFinder(self.proj)
         self.import_handler = ImportHandler(self.finder)
+        self.module_loader = ModuleLoader()
+        # Code objects of bytecode-only modules, until their imports are resolved
+        self._module_code: Dict[str, CodeType] = dict()
+        # Modules whose imports were resolved here, only they are complete enough to be shared
+        self._resolved_modules: Set[str] = set()
 
         self.project_cache = project_cache or ProjectCache()
         self.shallow_stdlib = shallow_stdlib
         self.shallow_site_packages = shallow_site_packages
+        self.skip_import_kinds = skip_import_kinds or set()
+        self.shared_cache = shared_cache
+        self.parsed_module_count = 0
+        self.cached_module_count = 0
+        self.progress = progress
 
     def parse_project_from_entry_script(self, entry_file: Path) -> Project:
         logger.info(f"Parsing started from {entry_file.absolute()}")
@@ -56,58 +107,91 @@ class ProjectParser:
         # For the root file of the project, it may not be in the sys.path, so we add it so importlib can find it
         sys.path = [str(entry_file.parent)] + sys.path
         self.finder.update_toplevel_module_paths(sys.path)
+        self.finder.missing_modules.update(self.project_cache.find_missing_modules(sys.path, entry_file.parent))
 
         root_name = entry_file.stem
         root: Module = self._parse_module(ModuleIdentifier(root_name))
 
+        self._resolve_imports(root)
         self.proj.add_root_module(root.name)
-        self.proj.add_module(root)
+        self._add_module(root)
 
         root_package: Package = self.package_finder.find_package(root)
         self.proj.add_package(root_package)
-        root_package.add_module(root.id)
+        self.proj.add_module_to_package(root_package, root)
 
-        self.import_handler.resolve_module_imports(root)
         remaining_modules = queue.SimpleQueue()
-        for sub in root.submodules:
+        for sub in root.get_submodules(self.skip_import_kinds):
             remaining_modules.put(sub)
 
         while not remaining_modules.empty():
             next_module: ModuleIdentifier = remaining_modules.get()
             if self.proj.has_module(next_module.name):
                 continue
-            cached_module = self.project_cache.find_in_cache(next_module)
+            cached_module = self.project_cache.find_in_cache(next_module) or self._find_in_shared_cache(next_module)
             if cached_module is None:
-                logger.info(f"Parsing module '{next_module.name}' (remaining: {remaining_modules.qsize()})")
+                logger.debug("Parsing module '{}' (remaining: {})", next_module.name, remaining_modules.qsize())
                 mod = self._parse_module(next_module)
                 if mod is None:
                     continue
-                self.import_handler.resolve_module_imports(mod)
+                self._resolve_imports(mod)
+                self.parsed_module_count += 1
             else:
-                logger.info(f"Found module in cache '{cached_module.name}' (remaining: {remaining_modules.qsize()})")
+                logger.debug(
+                    "Found module in cache '{}' (remaining: {})", cached_module.name, remaining_modules.qsize()
+                )
                 mod = cached_module
+                self.cached_module_count += 1
+            self._report_progress(remaining_modules.qsize())
 
-            self.proj.add_module(mod)
+            self._add_module(mod)
 
             package = self._resolve_module_package(mod)
+            self._publish_to_shared_cache(mod, package)
             if self._does_shallow_parsing_apply(package):
-                for sub in mod.submodules:
+                for sub in mod.get_submodules(self.skip_import_kinds):
                     if not self.proj.has_module(sub.name):
-                        logger.info(f"Parsing shallow submodule '{sub.name}'")
+                        logger.debug("Parsing shallow submodule '{}'", sub.name)
                         sub_mod = self._parse_module(sub)
                         if sub_mod is None:
                             continue
-                        self.proj.add_module(sub_mod)
+                        self.parsed_module_count += 1
+                        self._report_progress(remaining_modules.qsize())
+                        self._add_module(sub_mod)
                         self._resolve_module_package(sub_mod)
                 continue
 
-            for sub in mod.submodules:
+            for sub in mod.get_submodules(self.skip_import_kinds):
                 if not self.proj.has_module(sub.name):
                     remaining_modules.put(sub)
+        for module_name in sorted(self.finder.missing_modules):
+            self.proj.add_unresolved_module(module_name, self._find_lookup_dir(module_name))
+        self._flush_shared_cache()
+        self.module_loader.close()
         sys.path = sys.path[1:]
-        logger.success(f"Parsing finished for {entry_file.absolute()}")
+        if self.progress is not None:
+            self.progress.finish(self.parsed_module_count, self.cached_module_count)
+        logger.success(
+            "Parsing finished for {entry}, parsed {parsed} modules, found {cached} modules in caches",
+            entry=entry_file.absolute(),
+            parsed=self.parsed_module_count,
+            cached=self.cached_module_count,
+        )
         return self.proj
 
+    def _report_progress(self, remaining: int):
+        if self.progress is not None:
+            self.progress.update(self.parsed_module_count, self.cached_module_count, remaining)
+        processed = self.parsed_module_count + self.cached_module_count
+        if processed % PROGRESS_LOG_INTERVAL == 0:
+            # The values are keyword arguments, so they are separate fields of the serialized logs
+            logger.info(
+                "Parsed {parsed} modules, found {cached} modules in caches, {remaining} modules are queued",
+                parsed=self.parsed_module_count,
+                cached=self.cached_module_count,
+                remaining=remaining,
+            )
+
     def _parse_module(self, module_id: ModuleIdentifier) -> Module:
         try:
             return self._parse_module_unchecked(module_id)
@@ -123,13 +207,27 @@ class ProjectParser:
             mod = Module(module_id, None, None)
             return mod
 
+        module_id = self._identify_module(module_id)
+        if module_id.kind == ModuleKind.Namespace:
+            mod = Module(module_id, self._get_module_location(module_id), None)
+            return mod
+
         module_path = self.find_module_path(module_id)
         if module_path is None:
             # I guess there can be multiple reasons.
             # One reason is when the import is platform specific. For example pwd is unix only
             mod = Module(module_id, None, None)
             return mod
-        if not self.finder.is_parsable_origin(module_path):
+        if module_id.kind == ModuleKind.Bytecode:
+            assert module_id.spec is not None
+            code = self.module_loader.get_code(module_id.spec)
+            if code is not None:
+                self._module_code[module_id.name] = code
+            mod = Module(module_id, module_path, None)
+            return mod
+        if module_id.kind not in [ModuleKind.Source, ModuleKind.Unknown] or not self.finder.is_parsable_origin(
+            module_path
+        ):
             mod = Module(module_id, module_path, None)
             return mod
 
@@ -141,16 +239,77 @@ class ProjectParser:
             return mod
 
         logger.debug(f"Parsing module {module_id.name} from {module_path}")
-        content = Path(module_path).read_bytes()  # TODO: DI FileLoader
+        assert module_id.spec is not None
+        content = self.module_loader.get_source(module_id.spec)
+        if content is None:
+            logger.warning(f"Could not read the source of module {module_id.name} from {module_path}")
+            mod = Module(module_id, module_path, None)
+            return mod
         cst: libcst.Module = libcst.parse_module(content)
         mod = Module(module_id, module_path, cst)
         return mod
 
+    def _resolve_imports(self, mod: Module):
+        self._resolved_modules.add(mod.name)
+        code = self._module_code.pop(mod.name, None)
+        if code is not None:
+            self.import_handler.resolve_code_imports(mod, code)
+        else:
+            self.import_handler.resolve_module_imports(mod)
+
+    def _find_in_shared_cache(self, module_id: ModuleIdentifier) -> Optional[Module]:
+        if self.shared_cache is None or module_id.name == "__main__":
+            return None
+        module_id = self._identify_module(module_id)
+        if module_id.spec is None:
+            return None
+        return self.shared_cache.find_module(module_id.name, self._get_module_location(module_id))
+
+    def _publish_to_shared_cache(self, mod: Module, package: Package):
+        """
+        Queues a resolved module of the environment for the shared cache, which publishes the queue in batches,
+        so concurrent runs can reuse the modules before this run finishes. Project modules depend on the entrypoint.
+        """
+        if (
+            self.shared_cache is None
+            or package.package_type not in [PackageType.StandardLib, PackageType.Site]
+            or mod.name not in self._resolved_modules
+        ):
+            return
+        try:
+            self.shared_cache.add_module(mod)
+        except sqlite3.Error:
+            logger.opt(exception=True).warning(f"Failed to publish module {mod.name} to the shared cache")
+
+    def _flush_shared_cache(self):
+        if self.shared_cache is None:
+            return
+        try:
+            self.shared_cache.publish()
+        except sqlite3.Error:
+            logger.opt(exception=True).warning("Failed to publish modules to the shared cache")
+
+    def _add_module(self, mod: Module):
+        """Adds the module to the project, and indexes the symbols it defines.
+        Cached modules have no syntax tree, so their symbols are not indexed."""
+        self.proj.add_module(mod)
+        for symbol in collect_symbols(mod):
+            self.proj.add_symbol(symbol)
+
+    def _find_lookup_dir(self, module_name: str) -> Optional[str]:
+        """Returns the package directory where a submodule is looked up, None for top-level modules."""
+        if "." not in module_name:
+            return None
+        parent_id = self.finder.try_find_top_level_module(module_name.rpartition(".")[0])
+        if parent_id is None or parent_id.spec is None or not parent_id.spec.submodule_search_locations:
+            return None
+        return str(Path(list(parent_id.spec.submodule_search_locations)[0]).resolve())
+
     def _resolve_module_package(self, mod: Module) -> Package:
         package: Package = self.package_finder.find_package(mod)
-        package.add_module(mod.id)
         if not self.proj.has_package(package.name):
             self.proj.add_package(package)
+        self.proj.add_module_to_package(package, mod)
         return package
 
     def _does_shallow_parsing_apply(self, package: Package) -> bool:
@@ -160,8 +319,26 @@ class ProjectParser:
             return True
         return False
 
+    def _identify_module(self, module_id: ModuleIdentifier) -> ModuleIdentifier:
+        """Returns the identifier of the module with its spec and kind, looking it up if they are unknown."""
+        if module_id.spec is not None and module_id.kind != ModuleKind.Unknown:
+            return module_id
+        if module_id.spec is not None:
+            return ModuleIdentifier(module_id.name, module_id.spec, self.finder.get_module_kind(module_id.spec))
+        # The finder remembers the found and the missing modules, so a missing module is not searched again
+        found_id = self.finder.try_find_top_level_module(module_id.name)
+        return found_id if found_id is not None else module_id
+
+    def _get_module_location(self, module_id: ModuleIdentifier) -> Optional[str]:
+        assert module_id.spec is not None
+        if module_id.kind == ModuleKind.Namespace:
+            # Namespace packages have no file, their location is their first directory
+            search_locations = list(module_id.spec.submodule_search_locations or [])
+            return search_locations[0] if search_locations else None
+        return module_id.spec.origin
+
     def find_module_path(self, module_id: ModuleIdentifier):
-        spec = self.finder.find_spec(module_id.name) if module_id.spec is None else module_id.spec
+        spec = self._identify_module(module_id).spec
         if spec is None:
             return None
         return spec.origin
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import sys
+from typing import List, Optional, Tuple
+
+from pyprince.parser.project import Module
+from pyprince.parser.project_cache import ProjectCache
+from pyprince.utils import logger
+
+
+class SharedModuleCache:
+    """
+    Module parse results shared between pyprince processes, which analyse entrypoints in the same python environment.
+    The results are stored in a SQLite database in WAL mode, so readers are never blocked by a publishing process,
+    and publishing processes wait for each other with a busy timeout.
+    Modules are keyed by the environment and their name, and are only reused while the file they were parsed from
+    has the same path, modification time and size.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS modules (
+            environment TEXT NOT NULL,
+            name TEXT NOT NULL,
+            path TEXT,
+            mtime_ns INTEGER,
+            size INTEGER,
+            content TEXT NOT NULL,
+            PRIMARY KEY (environment, name)
+        )
+    """
+
+    def __init__(
+        self,
+        database_path: Path,
+        environment: Optional[str] = None,
+        timeout: float = 60.0,
+        batch_size: int = 200,
+    ) -> None:
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions are started explicitly, so a batch of modules is published atomically
+        self._connection = sqlite3.connect(str(database_path), timeout=timeout, isolation_level=None)
+        self._connection.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute(SharedModuleCache.SCHEMA)
+        self.environment = environment or get_environment_key()
+        self.batch_size = batch_size
+        self._pending: List[Tuple[str, str, Optional[str], Optional[int], Optional[int], str]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def find_module(self, module_name: str, path: Optional[str]) -> Optional[Module]:
+        """Returns the module parsed by any process from the file at path, if the file did not change since then."""
+        row = self._connection.execute(
+            "SELECT path, mtime_ns, size, content FROM modules WHERE environment = ? AND name = ?",
+            (self.environment, module_name),
+        ).fetchone()
+        if row is None or row[0] != path or get_file_stat(path) != (row[1], row[2]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ProjectCache.deserialize_module(module_name, json.loads(row[3]))
+
+    def add_module(self, module: Module):
+        """Queues the module for publishing, the queue is published when it reaches the batch size."""
+        mtime_ns, size = get_file_stat(module.path)
+        content = json.dumps(ProjectCache.serialize_module(module))
+        self._pending.append((self.environment, module.name, module.path, mtime_ns, size, content))
+        if len(self._pending) >= self.batch_size:
+            self.publish()
+
+    def publish(self):
+        if len(self._pending) == 0:
+            return
+        logger.info(f"Publishing {len(self._pending)} modules to the shared cache")
+        # IMMEDIATE takes the write lock upfront, so concurrent publishers wait on the busy timeout instead of failing
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO modules (environment, name, path, mtime_ns, size, content) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        self._pending.clear()
+
+    def close(self):
+        self.publish()
+        self._connection.close()
+        logger.info(f"Shared cache closed, hits: {self.hits}, misses: {self.misses}")
+
+
+def get_environment_key() -> str:
+    """Identifies the python environment, modules of the stdlib and site-packages only change with it."""
+    key = "|".join([sys.implementation.cache_tag or "", sys.platform, sys.prefix, sys.base_prefix, sys.version])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def get_file_stat(path: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    if path is None:
+        return None, None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_mtime_ns, stat.st_size
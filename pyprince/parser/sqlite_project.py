@@ -0,0 +1,401 @@
+import json
+from pathlib import Path
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import libcst
+
+from pyprince.parser import constants
+from pyprince.parser.project import (
+    ImportEdge,
+    ImportKind,
+    Module,
+    ModuleIdentifier,
+    ModuleKind,
+    Package,
+    PackageType,
+    Project,
+    Symbol,
+    SymbolKind,
+)
+from pyprince.parser.project_cache import ProjectCache
+from pyprince.parser.shared_cache import get_file_stat
+from pyprince.utils import logger
+
+SQLITE_SUFFIXES = [".db", ".sqlite", ".sqlite3"]
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS modules (
+        name TEXT PRIMARY KEY,
+        path TEXT,
+        kind INTEGER NOT NULL DEFAULT 0,
+        package TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS modules_package ON modules (package)",
+    """
+    CREATE TABLE IF NOT EXISTS edges (
+        source TEXT NOT NULL,
+        target TEXT NOT NULL,
+        kinds INTEGER NOT NULL,
+        dynamic INTEGER NOT NULL DEFAULT 0,
+        symbols TEXT,
+        PRIMARY KEY (source, target)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS edges_target ON edges (target)",
+    """
+    CREATE TABLE IF NOT EXISTS packages (
+        name TEXT PRIMARY KEY,
+        path TEXT,
+        type INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER,
+        size INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS symbols (
+        qualified_name TEXT PRIMARY KEY,
+        module TEXT NOT NULL,
+        name TEXT NOT NULL,
+        kind INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name)",
+    "CREATE TABLE IF NOT EXISTS roots (position INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS unresolved (name TEXT PRIMARY KEY, lookup_dir TEXT, lookup_mtime_ns INTEGER)",
+    # Modification times of the directories of sys.path, when the unresolved modules were looked up
+    "CREATE TABLE IF NOT EXISTS search_paths (path TEXT PRIMARY KEY, mtime_ns INTEGER)",
+]
+
+_TABLES = ["modules", "edges", "packages", "fingerprints", "symbols", "roots", "unresolved", "search_paths"]
+
+
+class SqliteProject(Project):
+    """
+    A Project which keeps its modules, import edges, packages and symbols in a SQLite database instead of memory,
+    for graphs which do not fit in memory. Added modules are buffered and inserted in batches.
+    Modules read back are new objects, so modules must be complete when they are added.
+    Syntax trees are only kept in memory when 'keep_syntax_trees' is true, which is needed for code generation.
+    """
+
+    def __init__(
+        self, database_path: Path, keep_syntax_trees: bool = False, batch_size: int = 1000, reset: bool = True
+    ) -> None:
+        super().__init__()
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.database_path = database_path
+        self.keep_syntax_trees = keep_syntax_trees
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(str(database_path), isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        if reset:
+            for table in _TABLES:
+                self._connection.execute(f"DELETE FROM {table}")
+
+        self._pending_modules: Dict[str, Module] = {}
+        self._pending_package_modules: Dict[str, str] = {}
+        self._pending_symbols: Dict[str, Symbol] = {}
+        # Defining nodes of symbols, only when syntax trees are kept
+        self._symbol_nodes: Dict[str, libcst.CSTNode] = {}
+
+    def add_root_module(self, module_name: str):
+        position = self._connection.execute("SELECT COUNT(*) FROM roots").fetchone()[0]
+        self._connection.execute("INSERT INTO roots (position, name) VALUES (?, ?)", (position, module_name))
+
+    def get_root_modules(self) -> List[str]:
+        return [row[0] for row in self._connection.execute("SELECT name FROM roots ORDER BY position")]
+
+    def add_module(self, module: Module):
+        self._pending_modules[module.name] = module
+        if module.syntax_tree is not None:
+            self.add_syntax_tree(module.name, module.syntax_tree)
+        if len(self._pending_modules) >= self.batch_size:
+            self.flush()
+
+    def has_module(self, module_name: str) -> bool:
+        if module_name in self._pending_modules:
+            return True
+        query = "SELECT 1 FROM modules WHERE name = ? AND kind >= 0"
+        return self._connection.execute(query, (module_name,)).fetchone() is not None
+
+    def get_module(self, module_name: str) -> Optional[Module]:
+        if module_name in self._pending_modules:
+            return self._pending_modules[module_name]
+        row = self._connection.execute(
+            "SELECT path, kind FROM modules WHERE name = ? AND kind >= 0", (module_name,)
+        ).fetchone()
+        if row is None:
+            return None
+        mod = self._create_module(module_name, row[0], row[1])
+        edges = self._connection.execute(
+            "SELECT target, kinds, dynamic, symbols FROM edges WHERE source = ? ORDER BY rowid", (module_name,)
+        )
+        for target, kinds, dynamic, symbols in edges:
+            _add_edge(mod, target, kinds, dynamic, symbols)
+        return mod
+
+    def get_modules(self) -> Iterable[str]:
+        self.flush()
+        return [row[0] for row in self._connection.execute("SELECT name FROM modules WHERE kind >= 0 ORDER BY rowid")]
+
+    def iter_modules(self) -> Iterable[Module]:
+        """Reads the modules with their edges in a single pass over both tables."""
+        self.flush()
+        modules = self._connection.execute("SELECT rowid, name, path, kind FROM modules WHERE kind >= 0 ORDER BY rowid")
+        edges = self._connection.execute(
+            "SELECT m.rowid, e.target, e.kinds, e.dynamic, e.symbols FROM edges e "
+            + "JOIN modules m ON m.name = e.source ORDER BY m.rowid, e.rowid"
+        )
+        edge = edges.fetchone()
+        for rowid, name, path, kind in modules.fetchall():
+            mod = self._create_module(name, path, kind)
+            while edge is not None and edge[0] <= rowid:
+                if edge[0] == rowid:
+                    _add_edge(mod, edge[1], edge[2], edge[3], edge[4])
+                edge = edges.fetchone()
+            yield mod
+
+    def iter_edges(self) -> Iterable[ImportEdge]:
+        self.flush()
+        query = "SELECT source, target, kinds, dynamic FROM edges ORDER BY rowid"
+        for source, target, kinds, dynamic in self._connection.execute(query):
+            yield ImportEdge(source, target, frozenset(_decode_import_kinds(kinds)), bool(dynamic))
+
+    def add_package(self, package: Package):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO packages (name, path, type) VALUES (?, ?, ?)",
+            (package.name, package.path, package.package_type.value),
+        )
+        for module_name in package.modules:
+            self._pending_package_modules[module_name] = package.name
+
+    def has_package(self, package_name: str) -> bool:
+        query = "SELECT 1 FROM packages WHERE name = ?"
+        return self._connection.execute(query, (package_name,)).fetchone() is not None
+
+    def list_packages(self) -> Iterable[str]:
+        return [row[0] for row in self._connection.execute("SELECT name FROM packages ORDER BY rowid")]
+
+    def get_package(self, package_name: str) -> Optional[Package]:
+        row = self._connection.execute("SELECT path, type FROM packages WHERE name = ?", (package_name,)).fetchone()
+        if row is None:
+            return None
+        self.flush()
+        query = "SELECT name FROM modules WHERE package = ? AND kind >= 0"
+        modules = {module_row[0] for module_row in self._connection.execute(query, (package_name,))}
+        return Package(package_name, row[0], PackageType(row[1]), modules)
+
+    def add_module_to_package(self, package: Package, module: Union[ModuleIdentifier, Module]):
+        package.add_module(module)
+        self._pending_package_modules[module.name] = package.name
+
+    def add_unresolved_module(self, module_name: str, lookup_dir: Optional[str] = None):
+        lookup_mtime_ns = get_file_stat(lookup_dir)[0]
+        self._connection.execute(
+            "INSERT OR REPLACE INTO unresolved (name, lookup_dir, lookup_mtime_ns) VALUES (?, ?, ?)",
+            (module_name, lookup_dir, lookup_mtime_ns),
+        )
+
+    def get_unresolved_modules(self) -> Iterable[str]:
+        return [row[0] for row in self._connection.execute("SELECT name FROM unresolved ORDER BY rowid")]
+
+    def get_unresolved_module_lookup_dir(self, module_name: str) -> Optional[str]:
+        query = "SELECT lookup_dir FROM unresolved WHERE name = ?"
+        row = self._connection.execute(query, (module_name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_unresolved_module_lookups(self) -> Dict[str, Optional[Tuple[str, Optional[int]]]]:
+        """Maps the unresolved modules to the directory and its mtime where they were looked up."""
+        query = "SELECT name, lookup_dir, lookup_mtime_ns FROM unresolved ORDER BY rowid"
+        return {
+            name: (lookup_dir, mtime_ns) if lookup_dir is not None else None
+            for name, lookup_dir, mtime_ns in self._connection.execute(query)
+        }
+
+    def set_search_path_fingerprint(self, fingerprint: Dict[str, Optional[int]]):
+        self._connection.execute("DELETE FROM search_paths")
+        self._connection.executemany(
+            "INSERT INTO search_paths (path, mtime_ns) VALUES (?, ?)", list(fingerprint.items())
+        )
+
+    def get_search_path_fingerprint(self) -> Dict[str, Optional[int]]:
+        return {
+            path: mtime_ns for path, mtime_ns in self._connection.execute("SELECT path, mtime_ns FROM search_paths")
+        }
+
+    def add_syntax_tree(self, module_name: str, st: libcst.Module):
+        if self.keep_syntax_trees:
+            super().add_syntax_tree(module_name, st)
+
+    def add_symbol(self, symbol: Symbol):
+        self._pending_symbols[symbol.qualified_name] = symbol
+        if self.keep_syntax_trees and symbol.node is not None:
+            self._symbol_nodes[symbol.qualified_name] = symbol.node
+
+    def get_symbol(self, qualified_name: str) -> Optional[Symbol]:
+        if qualified_name in self._pending_symbols:
+            return self._pending_symbols[qualified_name]
+        query = "SELECT module, kind FROM symbols WHERE qualified_name = ?"
+        row = self._connection.execute(query, (qualified_name,)).fetchone()
+        if row is None:
+            return None
+        return Symbol(qualified_name, row[0], SymbolKind(row[1]), self._symbol_nodes.get(qualified_name, None))
+
+    def find_symbols(self, name: str) -> List[Symbol]:
+        self.flush()
+        query = "SELECT qualified_name, module, kind FROM symbols WHERE name = ? ORDER BY rowid"
+        return [
+            Symbol(qualified_name, module_name, SymbolKind(kind), self._symbol_nodes.get(qualified_name, None))
+            for qualified_name, module_name, kind in self._connection.execute(query, (name,))
+        ]
+
+    def get_fingerprint(self, path: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Returns the (mtime_ns, size) of the file at path, when its module was added to the project."""
+        self.flush()
+        query = "SELECT mtime_ns, size FROM fingerprints WHERE path = ?"
+        row = self._connection.execute(query, (path,)).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def flush(self):
+        """Inserts the buffered modules, package memberships and symbols in a single transaction."""
+        if not (self._pending_modules or self._pending_package_modules or self._pending_symbols):
+            return
+        logger.debug(f"Writing {len(self._pending_modules)} modules to {self.database_path}")
+        self._connection.execute("BEGIN")
+        try:
+            modules = list(self._pending_modules.values())
+            self._connection.executemany(
+                "INSERT INTO modules (name, path, kind) VALUES (?, ?, ?) "
+                + "ON CONFLICT (name) DO UPDATE SET path = excluded.path, kind = excluded.kind",
+                [(mod.name, mod.path, mod.kind.value) for mod in modules],
+            )
+            self._connection.executemany("DELETE FROM edges WHERE source = ?", [(mod.name,) for mod in modules])
+            self._connection.executemany(
+                "INSERT INTO edges (source, target, kinds, dynamic, symbols) VALUES (?, ?, ?, ?, ?)",
+                [edge for mod in modules for edge in _encode_edges(mod)],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO fingerprints (path, mtime_ns, size) VALUES (?, ?, ?)",
+                [(mod.path, *get_file_stat(mod.path)) for mod in modules if mod.path is not None],
+            )
+            # Modules which only have a package are inserted with a negative kind, so they are not found
+            self._connection.executemany(
+                "INSERT INTO modules (name, kind, package) VALUES (?, -1, ?) "
+                + "ON CONFLICT (name) DO UPDATE SET package = excluded.package",
+                list(self._pending_package_modules.items()),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO symbols (qualified_name, module, name, kind) VALUES (?, ?, ?, ?)",
+                [
+                    (symbol.qualified_name, symbol.module_name, symbol.name, symbol.kind.value)
+                    for symbol in self._pending_symbols.values()
+                ],
+            )
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        self._pending_modules.clear()
+        self._pending_package_modules.clear()
+        self._pending_symbols.clear()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def _create_module(self, name: str, path: Optional[str], kind: int) -> Module:
+        syntax_tree = self._syntax_trees.get(name, None)
+        return Module(ModuleIdentifier(name, None, ModuleKind(kind)), path, syntax_tree)
+
+
+class SqliteProjectCache(ProjectCache):
+    """
+    A ProjectCache stored in the database of a SqliteProject, modules are read from there when they are requested,
+    instead of loading the whole cache upfront. Modules are only used while their file has the same mtime and size.
+    The unresolved modules are saved with the fingerprint of sys.path, like in the JSON cache.
+    """
+
+    def __init__(self, database_path: Path) -> None:
+        super().__init__()
+        self.database_path = database_path
+        self._store: Optional[SqliteProject] = None
+        if database_path.exists():
+            self._store = SqliteProject(database_path, reset=False)
+            self._missing_modules = self._store.get_unresolved_module_lookups()
+            self._path_fingerprint = self._store.get_search_path_fingerprint()
+
+    def find_in_cache(self, module_id: ModuleIdentifier) -> Optional[Module]:
+        store = self._store
+        module = store.get_module(module_id.name) if store is not None else None
+        if store is None or module is None:
+            # Modules loaded into the in-memory cache, ex: from a stdlib pack
+            return super().find_in_cache(module_id)
+        if module.path is not None and store.get_fingerprint(module.path) != get_file_stat(module.path):
+            logger.debug(f"Cached module '{module.name}' changed since it was cached")
+            return None
+        return module
+
+    def save(self, project: Project):
+        """Saves the stdlib modules of the project, replacing the previous content of the cache.
+        Modules are read from the saved database afterwards, so its connection stays open until close() is called."""
+        std_package = project.get_package(constants.STDLIB_PACKAGE_NAME)
+        if std_package is None:
+            logger.warning(f"{constants.STDLIB_PACKAGE_NAME} was empty, exit from saving.")
+            return
+        if self._store is not None:
+            self._store.close()
+        self._store = SqliteProject(self.database_path)
+        self._store.add_package(Package(std_package.name, std_package.path, std_package.package_type))
+        for module_name in std_package.modules:
+            module = project.get_module(module_name)
+            if module is not None:
+                self._store.add_module(module)
+                self._store.add_module_to_package(std_package, module)
+        for module_name in project.get_unresolved_modules():
+            self._store.add_unresolved_module(module_name, project.get_unresolved_module_lookup_dir(module_name))
+        self._store.set_search_path_fingerprint(
+            ProjectCache.get_path_fingerprint(sys.path, self._get_entry_dir(project))
+        )
+        logger.info(f"Saving {len(std_package.modules)} modules in cache for {constants.STDLIB_PACKAGE_NAME}")
+        self._store.flush()
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+
+def _encode_edges(mod: Module) -> Iterable[Tuple[str, str, int, int, Optional[str]]]:
+    for sub in mod.submodules:
+        kinds = sum(1 << kind.value for kind in mod.import_kinds.get(sub.name, {ImportKind.TopLevel}))
+        symbols = mod.imported_symbols.get(sub.name, None)
+        yield (
+            mod.name,
+            sub.name,
+            kinds,
+            int(sub.name in mod.dynamic_imports),
+            json.dumps(sorted(symbols)) if symbols else None,
+        )
+
+
+def _decode_import_kinds(kinds: int) -> Set[ImportKind]:
+    return {kind for kind in ImportKind if kinds & (1 << kind.value)}
+
+
+def _add_edge(mod: Module, target: str, kinds: int, dynamic: int, symbols: Optional[str]):
+    mod.submodules.append(ModuleIdentifier(target))
+    mod.import_kinds[target] = _decode_import_kinds(kinds)
+    if dynamic:
+        mod.dynamic_imports.add(target)
+    if symbols is not None:
+        mod.imported_symbols[target] = set(json.loads(symbols))
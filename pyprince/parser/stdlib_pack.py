@@ -0,0 +1,149 @@
+"""
+Stdlib packs are prebuilt caches of the stdlib dependency graph for a python version and platform,
+which are shipped with pyprince, so the stdlib does not have to be parsed on the first run.
+Paths in packs are relative to placeholders of the stdlib and the prefix directory, so they work on any install.
+"""
+
+import importlib.resources
+import json
+from pathlib import Path
+import pkgutil
+import sys
+import sysconfig
+from typing import Dict, List, Optional
+
+from pyprince.parser import constants
+from pyprince.parser.project import Project
+from pyprince.parser.project_cache import ProjectCache
+from pyprince.utils import logger
+
+PACK_TAG = "stdlib_pack"
+PACK_PYTHON_TAG = "python"
+PACK_IMPLEMENTATION_TAG = "implementation"
+PACK_PLATFORM_TAG = "platform"
+PACK_SENTINEL_TAG = "sentinel"
+PACK_SENTINEL_SIZE_TAG = "sentinel_size"
+
+STDLIB_PLACEHOLDER = "$stdlib"
+PREFIX_PLACEHOLDER = "$prefix"
+# A stdlib file, which must have the same size as when the pack was built
+SENTINEL_PATH = f"{STDLIB_PLACEHOLDER}/os.py"
+
+PACKS_DIR_NAME = "stdlib_packs"
+
+
+def get_pack_name() -> str:
+    """ex: stdlib-cpython-3.11-linux.json"""
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    return f"stdlib-{sys.implementation.name}-{version}-{sys.platform}.json"
+
+
+def get_placeholders() -> Dict[str, str]:
+    """Maps the placeholders to their directories, the more specific directories come first."""
+    return {
+        STDLIB_PLACEHOLDER: str(Path(sysconfig.get_path("stdlib")).resolve()),
+        PREFIX_PLACEHOLDER: str(Path(sys.base_prefix).resolve()),
+    }
+
+
+def get_stdlib_module_names() -> List[str]:
+    """Top-level modules of the stdlib, which can be imported on this platform."""
+    names = getattr(sys, "stdlib_module_names", None)
+    if names is None:
+        # Before python 3.10 the stdlib is listed from its directory
+        stdlib_path = sysconfig.get_path("stdlib")
+        names = set(sys.builtin_module_names)
+        names.update(info.name for info in pkgutil.iter_modules([stdlib_path, str(Path(stdlib_path) / "lib-dynload")]))
+    # Importing these modules has side effects or they are only test helpers
+    excluded = {"__main__", "antigravity", "this", "idlelib", "test"}
+    return sorted(name for name in names if name not in excluded and not name.startswith("_test"))
+
+
+def create_pack(project: Project) -> Optional[dict]:
+    """Creates the pack of the stdlib package of the project, with paths replaced by placeholders."""
+    content = ProjectCache().serialize_dict(project)
+    if content is None:
+        return None
+    # Missing modules depend on the sys.path of the environment, they are not shipped
+    content.pop(constants.MISSING_MODULES_TAG, None)
+    placeholders = get_placeholders()
+    for module_info in content[constants.PACKAGE_TAG][constants.STDLIB_PACKAGE_NAME].values():
+        module_info[ProjectCache.PACKAGE_PATH_TAG] = _to_placeholder_path(
+            module_info[ProjectCache.PACKAGE_PATH_TAG], placeholders
+        )
+    content[PACK_TAG] = {
+        PACK_PYTHON_TAG: f"{sys.version_info.major}.{sys.version_info.minor}",
+        PACK_IMPLEMENTATION_TAG: sys.implementation.name,
+        PACK_PLATFORM_TAG: sys.platform,
+        PACK_SENTINEL_TAG: SENTINEL_PATH,
+        PACK_SENTINEL_SIZE_TAG: _get_size(_from_placeholder_path(SENTINEL_PATH, placeholders)),
+    }
+    return content
+
+
+def find_pack(packs_dir: Optional[Path] = None) -> Optional[dict]:
+    """Returns the pack matching the running python with its paths resolved, None if there is no such pack."""
+    pack_name = get_pack_name()
+    try:
+        if packs_dir is not None:
+            pack_text = (packs_dir / pack_name).read_text(encoding="utf-8")
+        else:
+            pack_text = (importlib.resources.files("pyprince") / PACKS_DIR_NAME / pack_name).read_text(encoding="utf-8")
+    except (OSError, ModuleNotFoundError):
+        logger.info(f"There is no stdlib pack {pack_name}")
+        return None
+
+    content = json.loads(pack_text)
+    pack_info = content.get(PACK_TAG, {})
+    placeholders = get_placeholders()
+    sentinel = _from_placeholder_path(pack_info.get(PACK_SENTINEL_TAG, SENTINEL_PATH), placeholders)
+    if (
+        pack_info.get(PACK_PYTHON_TAG) != f"{sys.version_info.major}.{sys.version_info.minor}"
+        or pack_info.get(PACK_IMPLEMENTATION_TAG) != sys.implementation.name
+        or pack_info.get(PACK_PLATFORM_TAG) != sys.platform
+        or pack_info.get(PACK_SENTINEL_SIZE_TAG) != _get_size(sentinel)
+    ):
+        logger.info(f"Stdlib pack {pack_name} does not match the stdlib at {placeholders[STDLIB_PLACEHOLDER]}")
+        return None
+
+    for module_info in content[constants.PACKAGE_TAG][constants.STDLIB_PACKAGE_NAME].values():
+        module_info[ProjectCache.PACKAGE_PATH_TAG] = _from_placeholder_path(
+            module_info[ProjectCache.PACKAGE_PATH_TAG], placeholders
+        )
+    return content
+
+
+def load_matching_pack(project_cache: ProjectCache, packs_dir: Optional[Path] = None) -> bool:
+    """Loads the pack matching the running python into the cache. Returns false if there was no matching pack."""
+    content = find_pack(packs_dir)
+    if content is None:
+        return False
+    logger.info(f"Loading stdlib pack {get_pack_name()}")
+    project_cache.load_dict(content)
+    return True
+
+
+def _to_placeholder_path(path: Optional[str], placeholders: Dict[str, str]) -> Optional[str]:
+    if path is None or path in [constants.BUILTIN, constants.FROZEN]:
+        return path
+    resolved = Path(path).resolve()
+    for placeholder, directory in placeholders.items():
+        if resolved.is_relative_to(directory):
+            return f"{placeholder}/{resolved.relative_to(directory).as_posix()}"
+    return path
+
+
+def _from_placeholder_path(path: Optional[str], placeholders: Dict[str, str]) -> Optional[str]:
+    if path is None:
+        return None
+    for placeholder, directory in placeholders.items():
+        if path.startswith(f"{placeholder}/"):
+            return str(Path(directory, *path[len(placeholder) + 1 :].split("/")))
+    return path
+
+
+def _get_size(path: Optional[str]) -> Optional[int]:
+    try:
+        return Path(path).stat().st_size if path is not None else None
+    except OSError:
+        return None
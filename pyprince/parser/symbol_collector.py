@@ -0,0 +1,66 @@
+from typing import List, Sequence, Union
+
+import libcst
+
+from pyprince.parser.project import Module, Symbol, SymbolKind
+
+
+def collect_symbols(mod: Module) -> List[Symbol]:
+    """
+    Collects the functions, classes and variables defined at module level and in class bodies.
+    Definitions inside if, try and with blocks at module level are included, because they still define module members.
+    Works only on the syntax tree, the module is not imported.
+    Modules without a syntax tree (ex: the ones found in the project cache or the shared cache) have no symbols.
+    """
+    if mod.syntax_tree is None:
+        return []
+    symbols: List[Symbol] = []
+    _collect_block(mod.syntax_tree.body, mod.name, mod.name, symbols)
+    return symbols
+
+
+def _collect_block(
+    statements: Sequence[Union[libcst.BaseStatement, libcst.BaseSmallStatement]],
+    prefix: str,
+    module_name: str,
+    symbols: List[Symbol],
+):
+    for statement in statements:
+        if isinstance(statement, libcst.FunctionDef):
+            symbols.append(Symbol(f"{prefix}.{statement.name.value}", module_name, SymbolKind.Function, statement))
+        elif isinstance(statement, libcst.ClassDef):
+            class_name = f"{prefix}.{statement.name.value}"
+            symbols.append(Symbol(class_name, module_name, SymbolKind.Class, statement))
+            _collect_block(statement.body.body, class_name, module_name, symbols)
+        elif isinstance(statement, (libcst.SimpleStatementLine, libcst.SimpleStatementSuite)):
+            _collect_block(statement.body, prefix, module_name, symbols)
+        elif isinstance(statement, libcst.Assign):
+            for target in statement.targets:
+                _collect_assign_target(target.target, statement, prefix, module_name, symbols)
+        elif isinstance(statement, libcst.AnnAssign) and statement.value is not None:
+            _collect_assign_target(statement.target, statement, prefix, module_name, symbols)
+        elif isinstance(statement, libcst.If):
+            _collect_block(statement.body.body, prefix, module_name, symbols)
+            if isinstance(statement.orelse, libcst.If):
+                _collect_block([statement.orelse], prefix, module_name, symbols)
+            elif isinstance(statement.orelse, libcst.Else):
+                _collect_block(statement.orelse.body.body, prefix, module_name, symbols)
+        elif isinstance(statement, libcst.Try):
+            _collect_block(statement.body.body, prefix, module_name, symbols)
+            for handler in statement.handlers:
+                _collect_block(handler.body.body, prefix, module_name, symbols)
+            for block in [statement.orelse, statement.finalbody]:
+                if block is not None:
+                    _collect_block(block.body.body, prefix, module_name, symbols)
+        elif isinstance(statement, libcst.With):
+            _collect_block(statement.body.body, prefix, module_name, symbols)
+
+
+def _collect_assign_target(
+    target: libcst.BaseExpression, statement: libcst.CSTNode, prefix: str, module_name: str, symbols: List[Symbol]
+):
+    if isinstance(target, libcst.Name):
+        symbols.append(Symbol(f"{prefix}.{target.value}", module_name, SymbolKind.Variable, statement))
+    elif isinstance(target, (libcst.Tuple, libcst.List)):
+        for element in target.elements:
+            _collect_assign_target(element.value, statement, prefix, module_name, symbols)
@@ -0,0 +1,126 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from pyprince.parser import ImportKind, Project
+from pyprince.tracer import ImportTrace
+
+
+@dataclass
+class ReconciliationReport:
+    """
+    Compares the statically parsed dependencies with the imports of the running program.
+    Every reported module has the import chain from the root module which explains it.
+    """
+
+    # Statically reachable modules, which were never loaded by the program
+    over_approximated: Dict[str, List[str]] = field(default_factory=dict)
+    # Modules loaded by the program, which were not found statically. Modules preloaded by the interpreter are missing.
+    under_approximated: Dict[str, List[str]] = field(default_factory=dict)
+    static_module_count: int = 0
+    loaded_module_count: int = 0
+
+    def to_dict(self):
+        return {
+            "static_modules": self.static_module_count,
+            "loaded_modules": self.loaded_module_count,
+            "over_approximated": {k: self.over_approximated[k] for k in sorted(self.over_approximated)},
+            "under_approximated": {k: self.under_approximated[k] for k in sorted(self.under_approximated)},
+        }
+
+
+def reconcile(
+    proj: Project, trace: ImportTrace, skip_import_kinds: Optional[Set[ImportKind]] = None
+) -> ReconciliationReport:
+    """
+    Reconciles the static project with the import trace of the program.
+    Importing a submodule imports its parent packages too, so they are reachable on both sides.
+    Static imports which are only in the contexts of skip_import_kinds are not followed, like in the parser.
+    """
+    root = trace.root_module
+    static_chains = _find_import_chains([root], lambda name: _static_submodules(proj, name, skip_import_kinds))
+    traced_chains = _find_import_chains([root], lambda name: trace.edges.get(name, []))
+
+    loaded = trace.loaded_modules()
+    loaded.discard("__main__")
+    loaded.add(root)
+    report = ReconciliationReport(static_module_count=len(static_chains), loaded_module_count=len(loaded))
+
+    for module_name, chain in static_chains.items():
+        if module_name not in loaded:
+            report.over_approximated[module_name] = chain
+
+    for module_name in loaded:
+        if module_name in static_chains or module_name in trace.preloaded:
+            continue
+        chain = traced_chains.get(module_name, None)
+        if chain is None:
+            chain = _start_at_root(_loaded_by_chain(trace, module_name), traced_chains, root)
+        report.under_approximated[module_name] = chain
+    return report
+
+
+def _static_submodules(proj: Project, module_name: str, skip_import_kinds: Optional[Set[ImportKind]]) -> Iterable[str]:
+    mod = proj.get_module(module_name)
+    if mod is None:
+        return []
+    return [sub.name for sub in mod.get_submodules(skip_import_kinds)]
+
+
+def _find_import_chains(roots: List[str], get_submodules) -> Dict[str, List[str]]:
+    """
+    Finds the shortest import chain to every module reachable from the roots with a breadth-first search.
+    The parent packages of a reached module are reached with the chain of the module.
+    """
+    parents: Dict[str, Optional[str]] = {root: None for root in roots}
+    remaining = deque(roots)
+    while remaining:
+        module_name = remaining.popleft()
+        for sub_name in get_submodules(module_name):
+            reached = [sub_name] + _parent_packages(sub_name)
+            previous = module_name
+            for name in reached:
+                if name not in parents:
+                    parents[name] = previous
+                    remaining.append(name)
+                previous = name
+
+    chains: Dict[str, List[str]] = {}
+    for module_name in parents:
+        chain = [module_name]
+        parent = parents[module_name]
+        while parent is not None:
+            chain.append(parent)
+            parent = parents[parent]
+        chains[module_name] = list(reversed(chain))
+    return chains
+
+
+def _parent_packages(module_name: str) -> List[str]:
+    """ex: a.b.c -> [a.b, a]"""
+    parts = module_name.split(".")
+    return [".".join(parts[:index]) for index in range(len(parts) - 1, 0, -1)]
+
+
+def _start_at_root(chain: List[str], chains: Dict[str, List[str]], root: str) -> List[str]:
+    """
+    Prefixes the chain with the import chain of its first module, or of the closest parent package of it.
+    Modules without a known importer (ex: modules which are added to sys.modules by their package, like typing.io)
+    were still loaded while the root module was running, so the chain starts at the root module in every case.
+    """
+    first = chain[0]
+    for name in [first] + _parent_packages(first):
+        prefix = chains.get(name, None)
+        if prefix is not None:
+            return prefix + chain if name != first else prefix + chain[1:]
+    return [root] + chain
+
+
+def _loaded_by_chain(trace: ImportTrace, module_name: str) -> List[str]:
+    """The chain of modules which were loading when the module was imported, based on the import times."""
+    chain = [module_name]
+    import_time = trace.import_times.get(module_name, None)
+    while import_time is not None and import_time.loaded_by is not None and import_time.loaded_by not in chain:
+        chain.append(import_time.loaded_by)
+        import_time = trace.import_times.get(import_time.loaded_by, None)
+    return list(reversed(chain))
@@ -0,0 +1,78 @@
+"""
+Serves pyprince commands to a long running client process (ex: the npm package) over a JSON line protocol,
+so the client does not have to start a new python process for every command.
+
+The server writes {"ready": true} when it is ready, then reads one request per line from its input:
+    {"id": 1, "args": ["parse", "main.py", "--dm"]}
+and answers every request with one line, in the order of the requests:
+    {"id": 1, "ok": true, "output": "<what the command printed>"}
+    {"id": 2, "ok": false, "output": "", "error": "<error message>"}
+The server stops when its input is closed.
+Packages of the parsed projects, which are imported to resolve their modules, stay imported between requests.
+Clients which parse projects that change between requests should pass --static-resolve.
+"""
+
+import contextlib
+import io
+import json
+from typing import Any, Dict, List, TextIO
+
+import typer
+
+from pyprince.utils import logger
+from pyprince.utils.error import PyPrinceException
+
+PROTOCOL_VERSION = 1
+
+
+def serve_requests(app: typer.Typer, input_stream: TextIO, output_stream: TextIO):
+    _write_message(output_stream, {"ready": True, "protocol": PROTOCOL_VERSION})
+    for line in input_stream:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            _write_message(output_stream, {"id": None, "ok": False, "output": "", "error": f"Invalid request: {e}"})
+            continue
+        _write_message(output_stream, handle_request(app, request))
+
+
+def handle_request(app: typer.Typer, request: Dict[str, Any]) -> Dict[str, Any]:
+    request_id = request.get("id", None)
+    args = request.get("args", None)
+    if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+        return {"id": request_id, "ok": False, "output": "", "error": "Request args must be a list of strings"}
+    if len(args) > 0 and args[0] == "serve":
+        return {"id": request_id, "ok": False, "output": "", "error": "serve can not be called from a server"}
+
+    output = io.StringIO()
+    try:
+        # Commands print their results, which are captured so they do not mix with the protocol messages
+        with contextlib.redirect_stdout(output):
+            _run_command(app, args)
+    except (typer.TyperException, PyPrinceException) as e:
+        # Usage errors of the command line, ex: unknown command or missing option
+        message = e.format_message() if hasattr(e, "format_message") else str(e)  # pyright: ignore
+        return {"id": request_id, "ok": False, "output": output.getvalue(), "error": message}
+    except Exception as e:
+        logger.opt(exception=True).error(f"Request {request_id} failed with args: {args}")
+        return {"id": request_id, "ok": False, "output": output.getvalue(), "error": f"{type(e).__name__}: {e}"}
+    return {"id": request_id, "ok": True, "output": output.getvalue()}
+
+
+def _run_command(app: typer.Typer, args: List[str]):
+    try:
+        app(args, prog_name="pyprince", standalone_mode=False)
+    except typer.Exit as e:
+        exit_code = getattr(e, "exit_code", 0)
+        if exit_code != 0:
+            raise PyPrinceException(f"Command exited with code {exit_code}")
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            raise PyPrinceException(f"Command exited with code {e.code}")
+
+
+def _write_message(output_stream: TextIO, message: Dict[str, Any]):
+    output_stream.write(json.dumps(message) + "\n")
+    output_stream.flush()
@@ -0,0 +1,310 @@
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Set
+
+from pyprince import generators
+from pyprince.parser import Module, ModuleIdentifier, ModuleKind, Project
+from pyprince.parser.module_finder import ModuleFinder
+from pyprince.parser.package_finder import PackageFinder
+from pyprince.utils import logger
+from pyprince.utils.error import TracingError
+
+TRACE_FILE_ENV = "PYPRINCE_TRACE_FILE"
+IMPORT_TIME_PREFIX = "import time:"
+
+# The bootstrap runs in the traced interpreter. It records the modules which are already loaded by the interpreter,
+# wraps builtins.__import__ and importlib.import_module to record the parent -> child edges of import statements,
+# then runs the entrypoint as __main__. The timings come from -X importtime on stderr.
+# The bootstrap only imports modules which the interpreter loads at startup, so the imports of the program are not
+# hidden as preloaded. importlib is wrapped once something imports it, json is imported after the program finished.
+# The entrypoint is executed without runpy, because runpy imports modules lazily which would show up in the trace.
+_TRACER_BOOTSTRAP = """
+import builtins, sys
+
+_preloaded = sorted(sys.modules)
+
+import os
+
+_trace_file = os.environ.pop({env!r})
+_entry = sys.argv[1]
+_edges = {{}}
+_original_import = builtins.__import__
+_original_import_module = None
+
+
+def _resolve(name, package, level):
+    if level == 0:
+        return name
+    if not package:
+        return None
+    parts = package.rsplit(".", level - 1)
+    if len(parts) < level:
+        return None
+    return parts[0] + "." + name if name else parts[0]
+
+
+def _record(parent, child):
+    # Extension modules importing other modules are reported with the globals of the import machinery
+    if parent is not None and child is not None and parent != child and not parent.startswith("importlib._bootstrap"):
+        _edges.setdefault(parent, {{}})[child] = None
+
+
+def _traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+    module = _original_import(name, globals, locals, fromlist, level)
+    if globals is not None:
+        parent = globals.get("__name__")
+        package = globals.get("__package__")
+        if package is None and parent is not None:
+            package = parent if "__path__" in globals else parent.rpartition(".")[0]
+        child = _resolve(name, package, level)
+        if fromlist and child is not None:
+            submodules = [child + "." + item for item in fromlist if (child + "." + item) in sys.modules]
+            for submodule in submodules:
+                _record(parent, submodule)
+            if len(submodules) < len(fromlist):
+                _record(parent, child)
+        else:
+            _record(parent, child)
+    if _original_import_module is None:
+        _wrap_import_module()
+    return module
+
+
+def _traced_import_module(name, package=None):
+    module = _original_import_module(name, package)
+    _record(sys._getframe(1).f_globals.get("__name__"), module.__name__)
+    return module
+
+
+def _wrap_import_module():
+    global _original_import_module
+    importlib = sys.modules.get("importlib")
+    # The module can be partially initialized, when the hook runs for the imports of importlib itself
+    if getattr(importlib, "import_module", None) is not None:
+        _original_import_module = importlib.import_module
+        importlib.import_module = _traced_import_module
+
+
+def _module_path(module):
+    spec = getattr(module, "__spec__", None)
+    origin = getattr(spec, "origin", None)
+    if origin is None:
+        origin = getattr(module, "__file__", None)
+    if origin is None:
+        paths = list(getattr(module, "__path__", None) or [])
+        origin = paths[0] if paths else None
+    return origin
+
+
+def _write_trace():
+    modules = {{name: _module_path(module) for name, module in list(sys.modules.items())}}
+    import json
+
+    tracer_modules = sorted(set(sys.modules) - set(modules))
+    with open(_trace_file, "w") as stream:
+        stream.write(json.dumps({{"event": "start", "preloaded": _preloaded}}) + "\\n")
+        for parent, children in _edges.items():
+            stream.write(json.dumps({{"event": "imports", "parent": parent, "children": list(children)}}) + "\\n")
+        stream.write(json.dumps({{"event": "modules", "paths": modules}}) + "\\n")
+        stream.write(json.dumps({{"event": "tracer", "modules": tracer_modules}}) + "\\n")
+
+
+builtins.__import__ = _traced_import
+_wrap_import_module()
+sys.argv = sys.argv[1:]
+sys.path[0] = os.path.dirname(os.path.abspath(_entry))
+_main = type(sys)("__main__")
+_main.__file__ = _entry
+_main.__builtins__ = builtins
+sys.modules["__main__"] = _main
+try:
+    with open(_entry, "rb") as _entry_stream:
+        _code = compile(_entry_stream.read(), _entry, "exec")
+    exec(_code, _main.__dict__)
+finally:
+    builtins.__import__ = _original_import
+    if _original_import_module is not None:
+        sys.modules["importlib"].import_module = _original_import_module
+    _write_trace()
+""".format(
+    env=TRACE_FILE_ENV
+)
+
+
+@dataclass
+class ModuleImportTime:
+    self_us: int
+    cumulative_us: int
+    order: int  # The index of the module in the order the modules started loading
+    loaded_by: Optional[str]  # The module which was loading when this module was imported
+
+
+@dataclass
+class ImportTrace:
+    root_module: str
+    # Modules which were loaded by the interpreter before the entrypoint was started
+    preloaded: Set[str] = field(default_factory=set)
+    # Modules which were loaded by the tracer after the entrypoint finished (ex: json to write the trace)
+    tracer_modules: Set[str] = field(default_factory=set)
+    # Modules in the order they started loading
+    order: List[str] = field(default_factory=list)
+    # Parent -> child edges of the executed import statements, including imports of already loaded modules
+    edges: Dict[str, List[str]] = field(default_factory=dict)
+    import_times: Dict[str, ModuleImportTime] = field(default_factory=dict)
+    paths: Dict[str, Optional[str]] = field(default_factory=dict)
+    returncode: int = 0
+
+    def loaded_modules(self) -> Set[str]:
+        """The modules which were in sys.modules when the entrypoint finished."""
+        return set(self.paths.keys()) | self.preloaded
+
+
+def trace_imports(
+    entry_file: Path,
+    args: Sequence[str] = (),
+    python_executable: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> ImportTrace:
+    """
+    Runs the entry_file in a subprocess, and records the modules it actually imports.
+    The import statements are recorded with an import hook, the timings with '-X importtime'.
+    The stdout of the program is forwarded to stderr, so it does not mix with the output of pyprince.
+    """
+    python_executable = python_executable or sys.executable
+    entry_file = entry_file.absolute()
+    with tempfile.TemporaryDirectory(prefix="pyprince_trace_") as temp_dir:
+        trace_file = Path(temp_dir) / "trace.jsonl"
+        env = dict(os.environ)
+        env[TRACE_FILE_ENV] = str(trace_file)
+        command = [python_executable, "-X", "importtime", "-c", _TRACER_BOOTSTRAP, str(entry_file), *args]
+        logger.info(f"Tracing imports of {entry_file} with {python_executable}")
+        try:
+            process = subprocess.run(
+                command, env=env, stdout=sys.stderr, stderr=subprocess.PIPE, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired as ex:
+            raise TracingError(f"Tracing {entry_file} timed out after {timeout}s") from ex
+        if process.returncode != 0:
+            logger.warning(f"Traced program exited with code {process.returncode}")
+
+        import_time_lines = []
+        for line in process.stderr.splitlines():
+            if line.startswith(IMPORT_TIME_PREFIX):
+                import_time_lines.append(line)
+            else:
+                sys.stderr.write(line + "\n")
+
+        if not trace_file.exists():
+            raise TracingError(f"Traced program did not write the import trace for {entry_file}")
+        trace = ImportTrace(entry_file.stem, returncode=process.returncode)
+        with trace_file.open("r") as stream:
+            _load_trace_events(trace, stream.readlines())
+    _load_import_times(trace, import_time_lines)
+    logger.info(f"Traced {len(trace.order)} imported modules, {len(trace.preloaded)} modules were preloaded")
+    return trace
+
+
+def _load_trace_events(trace: ImportTrace, lines: List[str]):
+    for line in lines:
+        event = json.loads(line)
+        if event["event"] == "start":
+            trace.preloaded = set(event["preloaded"])
+        elif event["event"] == "imports":
+            parent = trace.root_module if event["parent"] == "__main__" else event["parent"]
+            trace.edges.setdefault(parent, []).extend(event["children"])
+        elif event["event"] == "modules":
+            trace.paths = {name: path for name, path in event["paths"].items() if name != "__main__"}
+        elif event["event"] == "tracer":
+            trace.tracer_modules = set(event["modules"])
+
+
+def _load_import_times(trace: ImportTrace, lines: List[str]):
+    """
+    Parses the output of '-X importtime'. A line is written when a module finished loading, indented by its depth,
+    so the modules loaded while a module was loading are the lines right before it with a greater depth.
+    ex:
+        import time: self [us] | cumulative | imported package
+        import time:       168 |        168 |   _json
+        import time:       464 |        632 | json.scanner
+    """
+    # (depth, module_name, self_us, cumulative_us) in the order the modules finished loading
+    finished = []
+    for line in lines:
+        columns = line[len(IMPORT_TIME_PREFIX) :].split("|")
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue  # Header line
+        name_column = columns[2][1:]
+        name = name_column.lstrip(" ")
+        depth = (len(name_column) - len(name)) // 2
+        finished.append((depth, name, int(columns[0]), int(columns[1])))
+
+    # Rebuilding the start order from the finish order. Children finish before their parent.
+    children: Dict[int, List[int]] = {}
+    pending: List[int] = []
+    roots: List[int] = []
+    for index, (depth, _, _, _) in enumerate(finished):
+        children[index] = [child for child in pending if finished[child][0] == depth + 1]
+        pending = [child for child in pending if finished[child][0] <= depth] + [index]
+        if depth == 0:
+            roots.append(index)
+
+    order = 0
+    stack = [(root, trace.root_module) for root in reversed(roots)]
+    while stack:
+        index, parent = stack.pop()
+        _, name, self_us, cumulative_us = finished[index]
+        if name in trace.preloaded or name in trace.tracer_modules:
+            continue  # Loaded by the interpreter or the tracer, together with the modules it loaded
+        trace.order.append(name)
+        trace.import_times[name] = ModuleImportTime(self_us, cumulative_us, order, parent)
+        order += 1
+        stack.extend((child, name) for child in reversed(children[index]))
+
+
+def build_project(trace: ImportTrace) -> Project:
+    """Creates a project from the trace, which contains the modules the traced program imported, without syntax trees."""
+    proj = Project()
+    package_finder = PackageFinder(proj)
+
+    module_names = [trace.root_module] + trace.order
+    for parent, children in trace.edges.items():
+        module_names.append(parent)
+        module_names.extend(children)
+
+    for module_name in module_names:
+        if proj.has_module(module_name):
+            continue
+        path = trace.paths.get(module_name, None)
+        kind = ModuleFinder.get_origin_kind(path) if path is not None else ModuleKind.Unknown
+        mod = Module(ModuleIdentifier(module_name, None, kind), path, None)
+        for child in trace.edges.get(module_name, []):
+            mod.add_submodule(ModuleIdentifier(child))
+        proj.add_module(mod)
+        try:
+            package = package_finder.find_package(mod)
+        except RuntimeError:
+            logger.debug(f"Could not find the package of traced module {module_name}")
+            continue
+        package.add_module(mod.id)
+        if not proj.has_package(package.name):
+            proj.add_package(package)
+    proj.add_root_module(trace.root_module)
+    return proj
+
+
+def describe_import_trace(trace: ImportTrace) -> generators.DependencyDescriptor:
+    """
+    Describes the traced dependencies the same way as generators.describe_module_dependencies,
+    with the import times of the modules loaded by the traced program.
+    """
+    desc = generators.describe_module_dependencies(build_project(trace))
+    for module_name, import_time in trace.import_times.items():
+        desc.add_timing(
+            module_name, import_time.self_us, import_time.cumulative_us, import_time.order, import_time.loaded_by
+        )
+    return desc
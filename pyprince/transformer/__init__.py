@@ -0,0 +1,4 @@
+from pyprince.transformer.function_inliner import FunctionInliner, inline_call, expand_function_calls
+from pyprince.transformer.function_inliner import expand_project_function
+from pyprince.transformer.optimizer import optimize_module, optimize_project
+from pyprince.transformer.optimizer import fold_constants, propagate_copies, eliminate_dead_assignments
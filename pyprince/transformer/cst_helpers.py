@@ -0,0 +1,28 @@
+import libcst
+
+CONSTANT_NAMES = ["True", "False", "None"]
+
+
+def is_constant_expression(node: libcst.BaseExpression) -> bool:
+    """Return true if node is a literal, that evaluates to the same immutable value every time."""
+    if isinstance(node, (libcst.Integer, libcst.Float, libcst.Imaginary, libcst.SimpleString)):
+        return True
+    if isinstance(node, libcst.Name):
+        return node.value in CONSTANT_NAMES
+    if isinstance(node, libcst.ConcatenatedString):
+        return is_constant_expression(node.left) and is_constant_expression(node.right)
+    if isinstance(node, libcst.UnaryOperation) and isinstance(node.operator, (libcst.Minus, libcst.Plus)):
+        return isinstance(node.expression, (libcst.Integer, libcst.Float, libcst.Imaginary))
+    return False
+
+
+def is_side_effect_free(node: libcst.BaseExpression) -> bool:
+    """Return true if evaluating the node cannot have side effects, so dropping it does not change the code.
+    Reading an unbound name is treated as a programming error, not as a side effect."""
+    return is_constant_expression(node) or isinstance(node, libcst.Name)
+
+
+def assign_statement(name: str, value: libcst.BaseExpression) -> libcst.SimpleStatementLine:
+    return libcst.SimpleStatementLine(
+        body=[libcst.Assign(targets=[libcst.AssignTarget(target=libcst.Name(name))], value=value)]
+    )
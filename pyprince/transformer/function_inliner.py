@@ -0,0 +1,378 @@
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import libcst
+import libcst.matchers as cstm
+from libcst.metadata import (
+    Assignment,
+    ClassScope,
+    GlobalScope,
+    FunctionScope,
+    MetadataWrapper,
+    ParentNodeProvider,
+    ScopeProvider,
+)
+
+from pyprince.parser.project import Project
+from pyprince.transformer.cst_helpers import assign_statement, is_constant_expression, is_side_effect_free
+from pyprince.utils import logger
+from pyprince.utils.error import InliningError, PyPrinceException
+
+# Statements, that can have a call as their whole value. Only these call sites are expanded, because hoisting the
+# callee body before the statement keeps the evaluation order of the original code only in these cases.
+_INLINABLE_STATEMENTS = (libcst.Expr, libcst.Assign, libcst.AnnAssign, libcst.AugAssign, libcst.Return)
+
+# If a callee contains any of these, renaming its locals or moving its body into another function is not safe.
+_UNSUPPORTED_CALLEE_NODES = cstm.OneOf(
+    cstm.Yield(),
+    cstm.Await(),
+    cstm.Global(),
+    cstm.Nonlocal(),
+    cstm.Import(),
+    cstm.ImportFrom(),
+    cstm.FunctionDef(),
+    cstm.ClassDef(),
+    cstm.Lambda(),
+    cstm.Call(func=cstm.Name("locals") | cstm.Name("vars") | cstm.Name("eval") | cstm.Name("exec")),
+)
+
+
+class FunctionInliner:
+    """Expands calls of module level functions in place of their call sites in a module.
+
+    Only calls that are the whole value of a simple statement are expanded (ex: `f(x)`, `y = f(x)`, `y += f(x)`,
+    `return f(x)`). The locals of the callee are renamed to fresh names, the arguments are bound to them in
+    evaluation order, and returns are rewritten into assignments of the result.
+    """
+
+    def __init__(self, module: libcst.Module) -> None:
+        self.module = module
+        wrapper = MetadataWrapper(module, unsafe_skip_copy=True)
+        self._scopes = wrapper.resolve(ScopeProvider)
+        self._parents = wrapper.resolve(ParentNodeProvider)
+        self._used_names: Set[str] = _find_names(module)
+
+    def inline_call(self, call: libcst.Call) -> libcst.Module:
+        """Expands a single call site. Raises InliningError if the call cannot be expanded."""
+        line, statements = self._expand_call_site(call)
+        return self.module.visit(_StatementReplacer({line: statements}))
+
+    def expand_calls(self, function_name: str) -> libcst.Module:
+        """Expands every expandable call site one level deep inside a module level function.
+        Returns the original module if there was nothing to expand."""
+        replacements: Dict[libcst.SimpleStatementLine, List[libcst.BaseStatement]] = {}
+        for call in self.find_call_sites(function_name):
+            try:
+                line, statements = self._expand_call_site(call)
+                replacements[line] = statements
+            except InliningError as e:
+                logger.debug(f"Skipping call site in {function_name}: {e}")
+        if len(replacements) == 0:
+            return self.module
+        return self.module.visit(_StatementReplacer(replacements))
+
+    def find_call_sites(self, function_name: str) -> List[libcst.Call]:
+        """Returns the calls in a module level function, that are the whole value of a simple statement."""
+        function = self._find_module_function(function_name)
+        if function is None:
+            raise PyPrinceException(f"Could not find module level function '{function_name}'")
+        calls: List[libcst.Call] = []
+        for line in cstm.findall(function.body, cstm.SimpleStatementLine()):
+            assert isinstance(line, libcst.SimpleStatementLine)
+            if len(line.body) != 1 or self._enclosing_function(line) is not function:
+                continue
+            value = getattr(line.body[0], "value", None)
+            if isinstance(value, libcst.Call) and isinstance(value.func, libcst.Name):
+                calls.append(value)
+        return calls
+
+    def _expand_call_site(self, call: libcst.Call) -> Tuple[libcst.SimpleStatementLine, List[libcst.BaseStatement]]:
+        statement = self._parents[call]
+        line = self._parents.get(statement)
+        if not isinstance(statement, _INLINABLE_STATEMENTS) or getattr(statement, "value", None) is not call:
+            raise InliningError("Call is not the whole value of an expression, assignment or return statement")
+        if isinstance(statement, libcst.AugAssign) and not isinstance(statement.target, libcst.Name):
+            raise InliningError("Augmented assignment target is not a simple name")
+        if not isinstance(line, libcst.SimpleStatementLine) or len(line.body) != 1:
+            raise InliningError("Call site shares its line with other statements")
+
+        callee = self._resolve_callee(call)
+        callee_name = callee.name.value
+        self._check_callee(callee)
+
+        callee_scope = self._scopes[callee.params]
+        if callee_scope is None:
+            raise InliningError(f"Could not find the scope of {callee_name}")
+        local_names = {assignment.name for assignment in callee_scope.assignments}
+        free_names = _find_names(callee.body) - local_names
+        shadowed = free_names & self._visible_local_names(self._scopes[call])
+        if len(shadowed) > 0:
+            raise InliningError(f"Names used by {callee_name} are shadowed at the call site: {sorted(shadowed)}")
+
+        renames = {name: self._fresh_name(f"_{callee_name}_{name}") for name in sorted(local_names)}
+        renamer = _LocalRenamer(renames)
+        statements: List[libcst.BaseStatement] = [
+            assign_statement(renames[param_name], value) for param_name, value in self._bind_arguments(call, callee)
+        ]
+
+        result_name = self._fresh_name(f"_{callee_name}_result")
+        needs_result = not isinstance(statement, libcst.Expr)
+        body = [stmt.visit(renamer) for stmt in _block_statements(callee.body)]
+        rewritten_body = self._rewrite_returns(body, result_name, needs_result)  # type: ignore
+        if rewritten_body is None:
+            raise InliningError(f"{callee_name} returns from inside a loop, with or try block")
+        statements.extend(rewritten_body)
+
+        result_value: Optional[libcst.BaseExpression] = libcst.Name(result_name) if needs_result else None
+        if needs_result and _is_single_tail_assignment(rewritten_body, result_name):
+            # The callee has one return at its end, so we can use the returned expression in place of the call.
+            tail = statements.pop()
+            assert isinstance(tail, libcst.SimpleStatementLine) and isinstance(tail.body[0], libcst.Assign)
+            result_value = tail.body[0].value
+
+        if result_value is not None:
+            statements.append(line.with_changes(body=[statement.with_changes(value=result_value)], leading_lines=()))
+        if len(statements) == 0:
+            statements.append(libcst.SimpleStatementLine(body=[libcst.Pass()]))
+        statements[0] = statements[0].with_changes(leading_lines=line.leading_lines)
+        return line, statements
+
+    def _resolve_callee(self, call: libcst.Call) -> libcst.FunctionDef:
+        if not isinstance(call.func, libcst.Name):
+            raise InliningError("Only calls of plain function names are expanded")
+        callee_name = call.func.value
+        caller_scope = self._scopes[call]
+        if not isinstance(caller_scope, FunctionScope):
+            raise InliningError("Only calls inside function bodies are expanded")
+        if callee_name in self._visible_local_names(caller_scope):
+            raise InliningError(f"{callee_name} is shadowed by a local name at the call site")
+        assignments = list(caller_scope.globals.assignments[callee_name])
+        callee = assignments[0].node if len(assignments) == 1 and isinstance(assignments[0], Assignment) else None
+        if not isinstance(callee, libcst.FunctionDef):
+            raise InliningError(f"{callee_name} is not defined exactly once as a module level function")
+        if not isinstance(self._parents[callee], libcst.Module):
+            raise InliningError(f"{callee_name} is not a module level function")
+        return callee
+
+    def _check_callee(self, callee: libcst.FunctionDef):
+        if callee.asynchronous is not None or len(callee.decorators) > 0:
+            raise InliningError(f"{callee.name.value} is async or decorated")
+        if isinstance(callee.params.star_arg, libcst.Param) or callee.params.star_kwarg is not None:
+            raise InliningError(f"{callee.name.value} has variadic parameters")
+        if len(cstm.findall(callee.body, _UNSUPPORTED_CALLEE_NODES)) > 0:
+            raise InliningError(f"{callee.name.value} contains statements that cannot be moved to another scope")
+
+    def _bind_arguments(self, call: libcst.Call, callee: libcst.FunctionDef) -> List[Tuple[str, libcst.BaseExpression]]:
+        """Matches call arguments with the parameters of the callee.
+        The result is in evaluation order, followed by the parameters that take their default values."""
+        params = callee.params
+        positional = list(params.posonly_params) + list(params.params)
+        keyword_names = {param.name.value for param in list(params.params) + list(params.kwonly_params)}
+        bound: Dict[str, libcst.BaseExpression] = {}
+        for index, arg in enumerate(call.args):
+            if arg.star != "":
+                raise InliningError("Call site uses argument unpacking")
+            if arg.keyword is None:
+                if index >= len(positional):
+                    raise InliningError(f"Too many positional arguments for {callee.name.value}")
+                param_name = positional[index].name.value
+            else:
+                param_name = arg.keyword.value
+                if param_name not in keyword_names:
+                    raise InliningError(f"Unknown keyword argument {param_name} for {callee.name.value}")
+            if param_name in bound:
+                raise InliningError(f"Multiple values for argument {param_name} of {callee.name.value}")
+            bound[param_name] = arg.value
+
+        result = list(bound.items())
+        for param in positional + list(params.kwonly_params):
+            if param.name.value in bound:
+                continue
+            if param.default is None:
+                raise InliningError(f"Missing argument {param.name.value} for {callee.name.value}")
+            if not is_constant_expression(param.default):
+                # Defaults are evaluated once at definition time, copying a mutable default would change behaviour.
+                raise InliningError(f"Default value of {param.name.value} is not a constant")
+            result.append((param.name.value, param.default))
+        return result
+
+    def _rewrite_returns(
+        self, statements: Sequence[libcst.BaseStatement], result_name: str, needs_result: bool
+    ) -> Optional[List[libcst.BaseStatement]]:
+        """Rewrites return statements into assignments to result_name, so the block falls through at its end.
+        Statements following an if, which contains a return, are moved into the branches that do not return.
+        Returns None if a return is in a position that cannot be rewritten (ex: inside a loop).
+        """
+        result: List[libcst.BaseStatement] = []
+        for index, statement in enumerate(statements):
+            if len(cstm.findall(statement, cstm.Return())) == 0:
+                result.append(statement)
+                continue
+            if isinstance(statement, libcst.SimpleStatementLine):
+                return_index = next(i for i, small in enumerate(statement.body) if isinstance(small, libcst.Return))
+                if return_index > 0:
+                    before = list(statement.body[:return_index])
+                    before[-1] = before[-1].with_changes(semicolon=libcst.MaybeSentinel.DEFAULT)
+                    result.append(statement.with_changes(body=before))
+                return_stmt = statement.body[return_index]
+                assert isinstance(return_stmt, libcst.Return)
+                value = return_stmt.value if return_stmt.value is not None else libcst.Name("None")
+                if needs_result:
+                    result.append(assign_statement(result_name, value))
+                elif not is_side_effect_free(value):
+                    result.append(libcst.SimpleStatementLine(body=[libcst.Expr(value)]))
+                # Statements after the return are unreachable
+                return result
+            if isinstance(statement, libcst.If):
+                rewritten_if = self._rewrite_if_returns(statement, statements[index + 1 :], result_name, needs_result)
+                if rewritten_if is None:
+                    return None
+                result.append(rewritten_if)
+                return result
+            return None
+
+        if needs_result:
+            result.append(assign_statement(result_name, libcst.Name("None")))
+        return result
+
+    def _rewrite_if_returns(
+        self,
+        if_node: libcst.If,
+        rest: Sequence[libcst.BaseStatement],
+        result_name: str,
+        needs_result: bool,
+    ) -> Optional[libcst.If]:
+        body = self._rewrite_returns(list(_block_statements(if_node.body)) + list(rest), result_name, needs_result)
+        if body is None:
+            return None
+
+        orelse: Union[libcst.If, libcst.Else, None] = None
+        if isinstance(if_node.orelse, libcst.If):
+            orelse = self._rewrite_if_returns(if_node.orelse, rest, result_name, needs_result)
+            if orelse is None:
+                return None
+        else:
+            else_statements = list(_block_statements(if_node.orelse.body)) if if_node.orelse is not None else []
+            else_body = self._rewrite_returns(else_statements + list(rest), result_name, needs_result)
+            if else_body is None:
+                return None
+            if len(else_body) > 0:
+                if if_node.orelse is not None:
+                    orelse = if_node.orelse.with_changes(body=_make_block(if_node.orelse.body, else_body))
+                else:
+                    orelse = libcst.Else(body=_make_block(if_node.body, else_body))
+        return if_node.with_changes(body=_make_block(if_node.body, body), orelse=orelse)
+
+    def _find_module_function(self, function_name: str) -> Optional[libcst.FunctionDef]:
+        for statement in self.module.body:
+            if isinstance(statement, libcst.FunctionDef) and statement.name.value == function_name:
+                return statement
+        return None
+
+    def _enclosing_function(self, node: libcst.CSTNode) -> Optional[libcst.CSTNode]:
+        parent = self._parents.get(node)
+        while parent is not None and not isinstance(parent, (libcst.FunctionDef, libcst.ClassDef, libcst.Lambda)):
+            parent = self._parents.get(parent)
+        return parent
+
+    def _visible_local_names(self, scope) -> Set[str]:
+        """Names that are bound in the function scope and in its enclosing function scopes."""
+        names: Set[str] = set()
+        while scope is not None and not isinstance(scope, GlobalScope):
+            if not isinstance(scope, ClassScope):
+                names.update(assignment.name for assignment in scope.assignments)
+            scope = scope.parent
+        return names
+
+    def _fresh_name(self, base: str) -> str:
+        name = base
+        index = 1
+        while name in self._used_names:
+            name = f"{base}_{index}"
+            index += 1
+        self._used_names.add(name)
+        return name
+
+
+class _LocalRenamer(libcst.CSTTransformer):
+    def __init__(self, renames: Dict[str, str]) -> None:
+        self.renames = renames
+
+    def leave_Name(self, original_node: libcst.Name, updated_node: libcst.Name) -> libcst.Name:
+        new_name = self.renames.get(updated_node.value)
+        return updated_node if new_name is None else updated_node.with_changes(value=new_name)
+
+    def leave_Attribute(self, original_node: libcst.Attribute, updated_node: libcst.Attribute) -> libcst.Attribute:
+        # attribute names are not variables
+        return updated_node.with_changes(attr=original_node.attr)
+
+    def leave_Arg(self, original_node: libcst.Arg, updated_node: libcst.Arg) -> libcst.Arg:
+        # keyword argument names belong to the called function
+        return updated_node.with_changes(keyword=original_node.keyword)
+
+
+class _StatementReplacer(libcst.CSTTransformer):
+    def __init__(self, replacements: Dict[libcst.SimpleStatementLine, List[libcst.BaseStatement]]) -> None:
+        self.replacements = replacements
+
+    def leave_SimpleStatementLine(self, original_node: libcst.SimpleStatementLine, updated_node):
+        if original_node in self.replacements:
+            return libcst.FlattenSentinel(self.replacements[original_node])
+        return updated_node
+
+
+def _block_statements(block: libcst.BaseSuite) -> Sequence[libcst.BaseStatement]:
+    if isinstance(block, libcst.SimpleStatementSuite):
+        return [libcst.SimpleStatementLine(body=block.body)]
+    assert isinstance(block, libcst.IndentedBlock)
+    return block.body
+
+
+def _make_block(original: libcst.BaseSuite, statements: List[libcst.BaseStatement]) -> libcst.IndentedBlock:
+    if len(statements) == 0:
+        statements = [libcst.SimpleStatementLine(body=[libcst.Pass()])]
+    if isinstance(original, libcst.IndentedBlock):
+        return original.with_changes(body=statements)
+    return libcst.IndentedBlock(body=statements)
+
+
+def _is_single_tail_assignment(statements: Sequence[libcst.BaseStatement], name: str) -> bool:
+    """Return true if the only assignment to name is the last statement of the block."""
+    body = [stmt for stmt in statements if isinstance(stmt, (libcst.SimpleStatementLine, libcst.BaseCompoundStatement))]
+    assignments = cstm.findall(libcst.Module(body=body), cstm.AssignTarget(target=cstm.Name(name)))
+    if len(assignments) != 1 or len(statements) == 0:
+        return False
+    last = statements[-1]
+    return isinstance(last, libcst.SimpleStatementLine) and assignments[0] in cstm.findall(last, cstm.AssignTarget())
+
+
+def _find_names(node: libcst.CSTNode) -> Set[str]:
+    return {name.value for name in cstm.findall(node, cstm.Name()) if isinstance(name, libcst.Name)}
+
+
+def inline_call(module: libcst.Module, call: libcst.Call) -> libcst.Module:
+    """Expands the body of the called function in place of a call in module."""
+    return FunctionInliner(module).inline_call(call)
+
+
+def expand_function_calls(module: libcst.Module, function_name: str, depth: int = 1) -> libcst.Module:
+    """Expands the calls inside a module level function. Calls that come from the expanded bodies
+    are expanded again, until 'depth' levels are expanded or there is nothing left to expand."""
+    for _ in range(depth):
+        expanded = FunctionInliner(module).expand_calls(function_name)
+        if expanded is module:
+            break
+        module = expanded
+    return module
+
+
+def expand_project_function(proj: Project, module_name: str, function_name: str, depth: int = 1) -> libcst.Module:
+    """Expands the calls inside a function of a project module, and updates the syntax tree of the module."""
+    syntax_tree = proj.get_syntax_tree(module_name)
+    if syntax_tree is None:
+        raise PyPrinceException(f"Module '{module_name}' has no syntax tree to expand calls in")
+    expanded = expand_function_calls(syntax_tree, function_name, depth)
+    proj.add_syntax_tree(module_name, expanded)
+    mod = proj.get_module(module_name)
+    if mod is not None:
+        mod.syntax_tree = expanded
+    return expanded
@@ -0,0 +1,381 @@
+import ast
+import operator
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import libcst
+import libcst.matchers as cstm
+from libcst.metadata import Assignment, FunctionScope, MetadataWrapper, ParentNodeProvider, ScopeProvider
+
+from pyprince.parser.project import Project
+from pyprince.transformer.cst_helpers import is_constant_expression
+from pyprince.utils import logger
+
+OptimizationPass = Callable[[libcst.Module], libcst.Module]
+
+# Functions that can observe local variables by name, so locals of a function calling them are not touched.
+_LOCALS_INTROSPECTION = cstm.Call(func=cstm.Name("locals") | cstm.Name("vars") | cstm.Name("eval") | cstm.Name("exec"))
+
+# Folding stops, when the result would be bigger than these, like in the peephole optimizer of CPython.
+_MAX_FOLDED_INT_BITS = 128
+_MAX_FOLDED_SEQUENCE_LENGTH = 4096
+
+_BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    libcst.Add: operator.add,
+    libcst.Subtract: operator.sub,
+    libcst.Multiply: operator.mul,
+    libcst.Divide: operator.truediv,
+    libcst.FloorDivide: operator.floordiv,
+    libcst.Modulo: operator.mod,
+    libcst.Power: operator.pow,
+    libcst.LeftShift: operator.lshift,
+    libcst.RightShift: operator.rshift,
+    libcst.BitOr: operator.or_,
+    libcst.BitAnd: operator.and_,
+    libcst.BitXor: operator.xor,
+}
+
+_UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    libcst.Minus: operator.neg,
+    libcst.Plus: operator.pos,
+    libcst.BitInvert: operator.invert,
+    libcst.Not: operator.not_,
+}
+
+_COMPARISON_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    libcst.Equal: operator.eq,
+    libcst.NotEqual: operator.ne,
+    libcst.LessThan: operator.lt,
+    libcst.LessThanEqual: operator.le,
+    libcst.GreaterThan: operator.gt,
+    libcst.GreaterThanEqual: operator.ge,
+}
+
+
+def optimize_module(
+    module: libcst.Module, passes: Optional[Iterable[OptimizationPass]] = None, max_iterations: int = 10
+) -> libcst.Module:
+    """
+    Runs the optimization passes on a module, until the code does not change anymore.
+
+    The default passes fold constant expressions, propagate constants and copies of variables
+    to their usages, and remove assignments of function locals, that are never read.
+    Locals are only touched in functions, that dont introspect their locals (ex: with locals() or eval()).
+    """
+    optimization_passes = list(passes) if passes is not None else DEFAULT_PASSES
+    for _ in range(max_iterations):
+        optimized = module
+        for optimization_pass in optimization_passes:
+            optimized = optimization_pass(optimized)
+        if optimized.deep_equals(module):
+            break
+        module = optimized
+    return module
+
+
+def optimize_project(proj: Project, module_names: Optional[Iterable[str]] = None):
+    """Optimizes the syntax trees of the given modules in the project. By default all parsed modules are optimized."""
+    names = list(module_names) if module_names is not None else list(proj.get_modules())
+    for module_name in names:
+        syntax_tree = proj.get_syntax_tree(module_name)
+        if syntax_tree is None:
+            continue
+        logger.debug(f"Optimizing module {module_name}")
+        optimized = optimize_module(syntax_tree)
+        proj.add_syntax_tree(module_name, optimized)
+        mod = proj.get_module(module_name)
+        if mod is not None:
+            mod.syntax_tree = optimized
+
+
+def fold_constants(module: libcst.Module) -> libcst.Module:
+    """Replaces operations on literals with their results (ex: `2 * 3` => `6`)."""
+    return module.visit(_ConstantFolder())
+
+
+def propagate_copies(module: libcst.Module) -> libcst.Module:
+    """Replaces reads of function locals with their value, if the local is assigned once
+    with a constant or with another local, that cannot change before the reads (ex: `a = 7; b = a` => `b = 7`)."""
+    wrapper = MetadataWrapper(module, unsafe_skip_copy=True)
+    analysis = _ScopeAnalysis(wrapper)
+    replacements: Dict[libcst.Name, libcst.BaseExpression] = {}
+    for _, scope in analysis.function_scopes():
+        for assignment in scope.assignments:
+            if not isinstance(assignment, Assignment):
+                continue
+            replacement = analysis.copy_value(scope, assignment)
+            if replacement is None:
+                continue
+            for reference in assignment.references:
+                use = reference.node
+                if not isinstance(use, libcst.Name):
+                    continue
+                replacements[use] = _parenthesized_for(use, analysis.parents[use], replacement)
+    if len(replacements) == 0:
+        return module
+    return module.visit(_NameReplacer(replacements))
+
+
+def eliminate_dead_assignments(module: libcst.Module) -> libcst.Module:
+    """Removes assignments of function locals that are never read, when the assigned value has no side effects."""
+    wrapper = MetadataWrapper(module, unsafe_skip_copy=True)
+    analysis = _ScopeAnalysis(wrapper)
+    dead_statements: Set[libcst.Assign] = set()
+    for function, scope in analysis.function_scopes():
+        # Every occurrence of the name counts as a read, except the assignments themselves.
+        # This is stricter than the references of the scope provider, which misses reads before the assignment.
+        name_occurrences = Counter(
+            name.value for name in cstm.findall(function, cstm.Name()) if isinstance(name, libcst.Name)
+        )
+        for name in {assignment.name for assignment in scope.assignments}:
+            assignments = list(scope.assignments[name])
+            if name_occurrences[name] != len(assignments):
+                continue
+            for assignment in assignments:
+                if not isinstance(assignment, Assignment):
+                    continue
+                statement = analysis.simple_assign_of(assignment.node)
+                if statement is not None and analysis.is_pure_value(scope, statement.value):
+                    dead_statements.add(statement)
+    if len(dead_statements) == 0:
+        return module
+    return module.visit(_StatementRemover(dead_statements))
+
+
+DEFAULT_PASSES: List[OptimizationPass] = [fold_constants, propagate_copies, eliminate_dead_assignments]
+
+# Expressions which bind looser than the operands of operators, attributes, subscripts and calls
+_COMPOUND_EXPRESSIONS = (
+    libcst.UnaryOperation,
+    libcst.BinaryOperation,
+    libcst.BooleanOperation,
+    libcst.Comparison,
+    libcst.IfExp,
+    libcst.Lambda,
+    libcst.NamedExpr,
+    libcst.ConcatenatedString,
+)
+
+
+def _parenthesized_for(use: libcst.Name, parent: libcst.CSTNode, value: libcst.BaseExpression) -> libcst.BaseExpression:
+    """Returns the value which replaces the use, in parentheses if the parent would bind it differently.
+    ex: `a ** x` with `a = -2` is `(-2) ** x`, because `-2 ** x` is `-(2 ** x)`"""
+    if len(value.lpar) > 0 or isinstance(value, libcst.Name):
+        return value
+    if isinstance(parent, libcst.Attribute):
+        # ex: `7.real` is not valid, but `(7).real` is
+        needs_parentheses = True
+    elif isinstance(parent, (libcst.BinaryOperation, libcst.UnaryOperation)):
+        needs_parentheses = isinstance(value, _COMPOUND_EXPRESSIONS)
+    elif isinstance(parent, libcst.Subscript):
+        needs_parentheses = parent.value is use and isinstance(value, _COMPOUND_EXPRESSIONS)
+    elif isinstance(parent, libcst.Call):
+        needs_parentheses = parent.func is use and isinstance(value, _COMPOUND_EXPRESSIONS)
+    else:
+        needs_parentheses = False
+    if not needs_parentheses:
+        return value
+    return value.with_changes(lpar=[libcst.LeftParen()], rpar=[libcst.RightParen()])
+
+
+class _ScopeAnalysis:
+    def __init__(self, wrapper: MetadataWrapper) -> None:
+        self.scopes = wrapper.resolve(ScopeProvider)
+        self.parents = wrapper.resolve(ParentNodeProvider)
+        self.module = wrapper.module
+
+    def function_scopes(self) -> List[Tuple[libcst.FunctionDef, FunctionScope]]:
+        """Functions and their scopes, whose locals can be safely rewritten."""
+        result = []
+        for function in cstm.findall(self.module, cstm.FunctionDef()):
+            assert isinstance(function, libcst.FunctionDef)
+            if len(cstm.findall(function, _LOCALS_INTROSPECTION)) > 0:
+                continue
+            scope = self.scopes[function.params]
+            if isinstance(scope, FunctionScope):
+                result.append((function, scope))
+        return result
+
+    def simple_assign_of(self, target: libcst.CSTNode) -> Optional[libcst.Assign]:
+        """Returns the assign statement, if target is the only target of it (ex: `x = ...`)"""
+        if not isinstance(target, libcst.Name):
+            return None
+        assign_target = self.parents.get(target)
+        if not isinstance(assign_target, libcst.AssignTarget):
+            return None
+        statement = self.parents.get(assign_target)
+        if not isinstance(statement, libcst.Assign) or len(statement.targets) != 1:
+            return None
+        return statement
+
+    def copy_value(self, scope: FunctionScope, assignment: Assignment) -> Optional[libcst.BaseExpression]:
+        """Returns the value, that can replace every read of the assigned local, or None if it is not safe.
+
+        The local has to be assigned exactly once, and all reads have to come after the assignment in the same block,
+        so the assignment surely runs before them. Copied locals cannot be reassigned between the copy and the reads.
+        """
+        if len(scope.assignments[assignment.name]) != 1 or len(assignment.references) == 0:
+            return None
+        statement = self.simple_assign_of(assignment.node)
+        if statement is None:
+            return None
+        line = self.parents[statement]
+        block = self.parents[line]
+        if not isinstance(block, libcst.IndentedBlock) or not isinstance(line, libcst.SimpleStatementLine):
+            return None
+        if len(line.body) != 1:
+            return None
+        line_index = block.body.index(line)
+
+        # The references of the scope provider can miss reads before the assignment, so check every access by name.
+        for reference in set(assignment.references) | set(scope.accesses[assignment.name]):
+            if reference.scope is not scope or not isinstance(reference.node, libcst.Name):
+                return None
+            if isinstance(self.parents[reference.node], libcst.Del):
+                return None
+            use_index = self._index_in_block(reference.node, block)
+            if use_index is None or use_index <= line_index:
+                return None
+
+        value = statement.value
+        if is_constant_expression(value):
+            return value
+        if not isinstance(value, libcst.Name) or value.value not in scope.assignments:
+            return None
+        source_assignments = list(scope.assignments[value.value])
+        if len(source_assignments) != 1 or not isinstance(source_assignments[0], Assignment):
+            return None
+        source_node = source_assignments[0].node
+        if not isinstance(source_node, libcst.Param):
+            source_index = self._index_in_block(source_node, block)
+            if source_index is not None and source_index >= line_index:
+                return None
+        return value
+
+    def is_pure_value(self, scope: FunctionScope, value: libcst.BaseExpression) -> bool:
+        """Return true if evaluating value has no side effects. Names are pure only if they are locals of scope."""
+        if is_constant_expression(value):
+            return True
+        return isinstance(value, libcst.Name) and value.value in scope.assignments
+
+    def _index_in_block(self, node: libcst.CSTNode, block: libcst.IndentedBlock) -> Optional[int]:
+        """Returns the index of the statement in block, that contains node, or None if block does not contain it."""
+        current: Optional[libcst.CSTNode] = node
+        while current is not None:
+            parent = self.parents.get(current)
+            if parent is block:
+                return block.body.index(current)  # type: ignore
+            current = parent
+        return None
+
+
+class _ConstantFolder(libcst.CSTTransformer):
+    def leave_BinaryOperation(self, original_node, updated_node: libcst.BinaryOperation) -> libcst.BaseExpression:
+        operation = _BINARY_OPERATORS.get(type(updated_node.operator))
+        if operation is None or not _are_constants(updated_node.left, updated_node.right):
+            return updated_node
+        left, right = _literal_value(updated_node.left), _literal_value(updated_node.right)
+        if not _is_small_operation(updated_node.operator, left, right):
+            return updated_node
+        return _folded(updated_node, lambda: operation(left, right))
+
+    def leave_UnaryOperation(self, original_node, updated_node: libcst.UnaryOperation) -> libcst.BaseExpression:
+        operation = _UNARY_OPERATORS[type(updated_node.operator)]
+        if is_constant_expression(updated_node) or not _are_constants(updated_node.expression):
+            return updated_node
+        value = _literal_value(updated_node.expression)
+        return _folded(updated_node, lambda: operation(value))
+
+    def leave_Comparison(self, original_node, updated_node: libcst.Comparison) -> libcst.BaseExpression:
+        expressions = [updated_node.left] + [target.comparator for target in updated_node.comparisons]
+        operations = [_COMPARISON_OPERATORS.get(type(target.operator)) for target in updated_node.comparisons]
+        if None in operations or not _are_constants(*expressions):
+            return updated_node
+        values = [_literal_value(expression) for expression in expressions]
+        return _folded(
+            updated_node, lambda: all(op(values[i], values[i + 1]) for i, op in enumerate(operations))  # type: ignore
+        )
+
+    def leave_BooleanOperation(self, original_node, updated_node: libcst.BooleanOperation) -> libcst.BaseExpression:
+        if not _are_constants(updated_node.left):
+            return updated_node
+        left_value = bool(_literal_value(updated_node.left))
+        is_and = isinstance(updated_node.operator, libcst.And)
+        # `a and b` evaluates to a if a is falsy, `a or b` evaluates to a if a is truthy
+        chosen = updated_node.left if left_value != is_and else updated_node.right
+        if len(updated_node.lpar) > 0 and len(chosen.lpar) == 0:
+            chosen = chosen.with_changes(lpar=updated_node.lpar, rpar=updated_node.rpar)
+        return chosen
+
+
+class _NameReplacer(libcst.CSTTransformer):
+    def __init__(self, replacements: Dict[libcst.Name, libcst.BaseExpression]) -> None:
+        self.replacements = replacements
+
+    def leave_Name(self, original_node: libcst.Name, updated_node: libcst.Name) -> libcst.BaseExpression:
+        return self.replacements.get(original_node, updated_node)
+
+
+class _StatementRemover(libcst.CSTTransformer):
+    def __init__(self, statements: Set[libcst.Assign]) -> None:
+        self.statements = statements
+
+    def leave_Assign(self, original_node: libcst.Assign, updated_node: libcst.Assign):
+        if original_node in self.statements:
+            return libcst.RemoveFromParent()
+        return updated_node
+
+    def leave_SimpleStatementLine(self, original_node, updated_node: libcst.SimpleStatementLine):
+        if len(updated_node.body) == 0:
+            return libcst.RemoveFromParent()
+        return updated_node
+
+    def leave_IndentedBlock(self, original_node, updated_node: libcst.IndentedBlock) -> libcst.IndentedBlock:
+        if len(updated_node.body) == 0:
+            return updated_node.with_changes(body=[libcst.SimpleStatementLine(body=[libcst.Pass()])])
+        return updated_node
+
+
+def _are_constants(*nodes: libcst.BaseExpression) -> bool:
+    return all(is_constant_expression(node) for node in nodes)
+
+
+def _literal_value(node: libcst.BaseExpression) -> Any:
+    return ast.literal_eval(libcst.Module(body=[]).code_for_node(node).strip())
+
+
+def _is_small_operation(op: libcst.BaseBinaryOp, left: Any, right: Any) -> bool:
+    """Filters out operations, whose results would blow up the size of the code (ex: `2 ** 10000`)."""
+    if isinstance(op, libcst.Power) and isinstance(left, int) and isinstance(right, int):
+        return right < 0 or max(abs(left).bit_length(), 1) * right <= _MAX_FOLDED_INT_BITS
+    if isinstance(op, libcst.LeftShift) and isinstance(right, int):
+        return right <= _MAX_FOLDED_INT_BITS
+    if isinstance(op, libcst.Multiply) and isinstance(left, (str, bytes)) and isinstance(right, int):
+        return len(left) * right <= _MAX_FOLDED_SEQUENCE_LENGTH
+    if isinstance(op, libcst.Multiply) and isinstance(right, (str, bytes)) and isinstance(left, int):
+        return len(right) * left <= _MAX_FOLDED_SEQUENCE_LENGTH
+    return True
+
+
+def _folded(original: libcst.BaseExpression, compute: Callable[[], Any]) -> libcst.BaseExpression:
+    """Returns the literal node of the computed value, or the original node,
+    if computing raises (the error has to happen at runtime) or the result cannot be written as a literal."""
+    try:
+        value = compute()
+    except Exception:
+        return original
+    if type(value) not in (bool, int, float, str, bytes) and value is not None:
+        return original
+    if isinstance(value, int) and value.bit_length() > _MAX_FOLDED_INT_BITS:
+        return original
+    if isinstance(value, (str, bytes)) and len(value) > _MAX_FOLDED_SEQUENCE_LENGTH:
+        return original
+    code = repr(value)
+    try:
+        if ast.literal_eval(code) != value:
+            return original
+    except ValueError:
+        # ex: nan and inf have no literals
+        return original
+    folded = libcst.parse_expression(code)
+    return folded.with_changes(lpar=original.lpar, rpar=original.rpar)
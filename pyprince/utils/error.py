@@ -1,2 +1,14 @@
 class PyPrinceException(Exception):
     pass
+
+
+class InliningError(PyPrinceException):
+    """Raised when a call site cannot be expanded without changing the behaviour of the code."""
+
+    pass
+
+
+class TracingError(PyPrinceException):
+    """Raised when the imports of a program could not be traced."""
+
+    pass
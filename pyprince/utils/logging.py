@@ -8,9 +8,19 @@ from loguru import logger
 # logger.info("This is an info message")
 # logger.warning("This is a warning message")
 # logger.error("This is an error message")
+#
+# On hot paths pass the arguments instead of formatting them, so messages below the log level cost almost nothing:
+# logger.debug("Parsing module {}", module_name)
+# logger.opt(lazy=True).debug("- {}", lambda: expensive_description())
 
+DEFAULT_LEVEL = "INFO"
 
-def init():
+
+def init(level: str = DEFAULT_LEVEL, serialize: bool = False):
+    """Logs to files in the log folder. The sinks are written from a background thread, so logging does not block.
+    level: The minimum level, which is logged.
+    serialize: Write every record as a JSON line, with the keyword arguments of the log call in its 'extra' field.
+    """
     can_rotate = True
 
     def should_rotate_log(_msg, _file):
@@ -29,20 +39,24 @@ def init():
     logger.remove()
     logger.add(
         logpath,
-        level="DEBUG",
-        diagnose=True,
-        retention=3,
-        enqueue=True,
-        rotation=should_rotate_log,
-    )
-    logger.add(
-        info_logpath,
-        level="INFO",
+        level=level,
         diagnose=True,
         retention=3,
         enqueue=True,
         rotation=should_rotate_log,
+        serialize=serialize,
     )
+    if logger.level(level).no < logger.level("INFO").no:
+        # The info log is only a summary of a more detailed log
+        logger.add(
+            info_logpath,
+            level="INFO",
+            diagnose=True,
+            retention=3,
+            enqueue=True,
+            rotation=should_rotate_log,
+            serialize=serialize,
+        )
 
 
 def get_log_folder() -> pathlib.Path:
@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+import json
+import time
+from typing import Callable, Optional, TextIO
+
+
+class ProgressReporter(ABC):
+    """
+    Reports the progress of a parse to a stream (ex: stderr), while the parser calls update() for every module.
+    Reports are throttled to one per 'interval' seconds, so an update costs a clock read between two reports.
+    """
+
+    def __init__(self, stream: TextIO, interval: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        self.stream = stream
+        self.interval = interval
+        self.clock = clock
+        self.start_time = clock()
+        self._next_report_time = self.start_time + interval
+
+    def update(self, parsed: int, cached: int, remaining: int):
+        """parsed and cached are the number of modules processed so far, remaining is the number of queued modules."""
+        now = self.clock()
+        if now < self._next_report_time:
+            return
+        self._next_report_time = now + self.interval
+        self.report(self._create_event("progress", now, parsed, cached, remaining))
+
+    def finish(self, parsed: int, cached: int):
+        self.report(self._create_event("finished", self.clock(), parsed, cached, 0))
+
+    @abstractmethod
+    def report(self, event: dict):
+        pass
+
+    def _create_event(self, event_name: str, now: float, parsed: int, cached: int, remaining: int) -> dict:
+        elapsed = max(now - self.start_time, 1e-9)
+        processed = parsed + cached
+        rate = processed / elapsed
+        return {
+            "event": event_name,
+            "parsed": parsed,
+            "cached": cached,
+            "queued": remaining,
+            "elapsed": round(elapsed, 3),
+            "modules_per_second": round(rate, 1),
+            "cache_hit_ratio": round(cached / processed, 3) if processed > 0 else 0.0,
+            # The queue can grow while it is processed, so this is only a lower estimate
+            "eta": round(remaining / rate, 1) if rate > 0 else None,
+        }
+
+
+class TextProgressReporter(ProgressReporter):
+    """Human readable progress, which is rewritten in place on terminals."""
+
+    def report(self, event: dict):
+        eta = f"{event['eta']:.0f}s" if event["eta"] is not None else "?"
+        line = (
+            f"Modules: {event['parsed'] + event['cached']} ({event['modules_per_second']:.1f}/s), "
+            + f"queued: {event['queued']}, cache hits: {event['cache_hit_ratio']:.0%}, "
+        )
+        line += f"ETA: {eta}" if event["event"] == "progress" else f"finished in {event['elapsed']:.1f}s"
+        is_terminal = self.stream.isatty()
+        end = "\n" if event["event"] == "finished" or not is_terminal else ""
+        self.stream.write(f"\r{line}\x1b[K{end}" if is_terminal else f"{line}{end}")
+        self.stream.flush()
+
+
+class JsonProgressReporter(ProgressReporter):
+    """One JSON object per line, for tools which show the progress (ex: the npm package)."""
+
+    def report(self, event: dict):
+        self.stream.write(json.dumps(event) + "\n")
+        self.stream.flush()
+
+
+def create_progress_reporter(progress_format: str, stream: TextIO) -> Optional[ProgressReporter]:
+    """progress_format is one of 'none', 'text' or 'json'."""
+    if progress_format == "text":
+        return TextProgressReporter(stream)
+    if progress_format == "json":
+        return JsonProgressReporter(stream)
+    return None
@@ -1,8 +1,13 @@
+from array import array
+import csv
 import json
+from pathlib import Path
+import sys
 import traceback
-from typing import List, Any
+from typing import BinaryIO, Dict, Iterator, List, Any, TextIO, Tuple
 
 from pyprince.generators import DependencyDescriptor
+from pyprince.parser import ImportKind
 
 
 class PyPrinceJsonSerializer(json.JSONEncoder):
@@ -20,11 +25,163 @@ def exception_to_json() -> str:
     return json.dumps({"result": "error", "details": traceback.format_exc()}, indent=2)
 
 
+# Modules which are not source files are drawn with a different shape
+_DOT_KIND_SHAPES = {
+    "Extension": "box",
+    "Builtin": "diamond",
+    "Frozen": "diamond",
+    "Namespace": "folder",
+    "Bytecode": "box",
+}
+
+
 def to_graphviz_dot(descriptor: DependencyDescriptor) -> str:
     file_builder: List[str] = []
     file_builder.append("digraph G {")
+    for node, kind in descriptor.kinds.items():
+        shape = _DOT_KIND_SHAPES.get(kind, None)
+        if shape is not None:
+            file_builder.append(f'    "{node}" [shape={shape}]')
     for parent, targets in descriptor.edges.items():
+        conditional_targets = descriptor.import_kinds.get(parent, {})
+        dynamic_targets = descriptor.dynamic_edges.get(parent, [])
         for target in targets:
-            file_builder.append(f'    "{parent}" -> "{target}"')
+            attributes = []
+            if target in dynamic_targets:
+                attributes.append("style=dotted")
+            elif target in conditional_targets:
+                # Edges which are not imported at the top-level of the module may not be loaded at runtime
+                attributes.append("style=dashed")
+            timing = descriptor.timings.get(target, None)
+            if timing is not None and timing.loaded_by == parent:
+                # The edge which loaded the module costs the cumulative import time of the module
+                attributes.append(f'label="{timing.cumulative_us / 1000:.1f}ms"')
+            weight = descriptor.weights.get(parent, {}).get(target, None)
+            if weight is not None:
+                # Edges of condensed graphs are labeled with the number of imports they stand for
+                attributes.append(f'label="{weight}"')
+            if len(attributes) > 0:
+                file_builder.append(f'    "{parent}" -> "{target}" [{", ".join(attributes)}]')
+            else:
+                file_builder.append(f'    "{parent}" -> "{target}"')
     file_builder.append("}")
     return "\n".join(file_builder)
+
+
+# Columns of the edge lists. Kinds are the names of the import contexts of the edge, separated by '|'
+EDGE_LIST_COLUMNS = ["source", "target", "kinds", "dynamic"]
+
+COLUMNAR_FORMAT_VERSION = 1
+# Bit of the edge flags, which marks edges of importlib.import_module or __import__ calls.
+# The lower bits are the import kinds of the edge, ImportKind.X is bit (1 << X.value)
+DYNAMIC_EDGE_FLAG = 1 << 7
+# Edge columns are written in chunks of this many edges, so the edges are never all in memory again
+_COLUMN_CHUNK_SIZE = 65536
+_UINT32_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+
+def iter_edge_rows(descriptor: DependencyDescriptor) -> Iterator[Tuple[str, str, List[str], bool]]:
+    """Yields the edges of the descriptor as (source, target, import kind names, dynamic) tuples."""
+    for parent, targets in descriptor.edges.items():
+        conditional_targets = descriptor.import_kinds.get(parent, {})
+        dynamic_targets = set(descriptor.dynamic_edges.get(parent, []))
+        for target in targets:
+            kinds = conditional_targets.get(target, [ImportKind.TopLevel.name])
+            yield parent, target, kinds, target in dynamic_targets
+
+
+def write_edge_list(descriptor: DependencyDescriptor, stream: TextIO, delimiter: str = ","):
+    """Writes the edges as CSV (or TSV with a tab delimiter) rows, one edge per row after a header row."""
+    writer = csv.writer(stream, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(EDGE_LIST_COLUMNS)
+    for source, target, kinds, dynamic in iter_edge_rows(descriptor):
+        writer.writerow([source, target, "|".join(kinds), int(dynamic)])
+
+
+def write_columnar(descriptor: DependencyDescriptor, output_dir: Path):
+    """
+    Writes the graph as separate tables into output_dir, which can be bulk loaded without parsing the edges:
+    - nodes.csv: id, name, kind and package_id of the nodes. Ids are the row numbers, starting from 0.
+    - packages.csv: id, name and type of the packages.
+    - edges.src.u32, edges.dst.u32: node ids of the sources and targets of the edges, as little-endian uint32 arrays.
+    - edges.flags.u8: import kinds and dynamic flag of the edges, one byte per edge.
+    - meta.json: the number of rows, the files and the types of the columns.
+    ex: numpy.fromfile(output_dir / "edges.src.u32", dtype="<u4")
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    package_ids: Dict[str, int] = {}
+    node_packages: Dict[str, int] = {}
+    with (output_dir / "packages.csv").open("w", newline="", encoding="utf-8") as package_stream:
+        writer = csv.writer(package_stream, lineterminator="\n")
+        writer.writerow(["id", "name", "type"])
+        for package_name, package in descriptor.packages.items():
+            package_id = len(package_ids)
+            package_ids[package_name] = package_id
+            writer.writerow([package_id, package_name, package.type])
+            for module_name in package.modules:
+                node_packages[module_name] = package_id
+
+    node_ids: Dict[str, int] = {}
+    with (output_dir / "nodes.csv").open("w", newline="", encoding="utf-8") as node_stream:
+        writer = csv.writer(node_stream, lineterminator="\n")
+        writer.writerow(["id", "name", "kind", "package_id"])
+        for node in descriptor.nodes:
+            if node in node_ids:
+                continue
+            node_ids[node] = len(node_ids)
+            writer.writerow([node_ids[node], node, descriptor.kinds.get(node, ""), node_packages.get(node, -1)])
+        # Edges can connect names which are not nodes (ex: modules of a partial graph), they get ids too
+        for source, target, _, _ in iter_edge_rows(descriptor):
+            for name in [source, target]:
+                if name not in node_ids:
+                    node_ids[name] = len(node_ids)
+                    writer.writerow([node_ids[name], name, descriptor.kinds.get(name, ""), node_packages.get(name, -1)])
+
+    edge_count = 0
+    with (output_dir / "edges.src.u32").open("wb") as src_stream, (output_dir / "edges.dst.u32").open(
+        "wb"
+    ) as dst_stream, (output_dir / "edges.flags.u8").open("wb") as flag_stream:
+        sources, targets, flags = array(_UINT32_TYPECODE), array(_UINT32_TYPECODE), array("B")
+        for source, target, kinds, dynamic in iter_edge_rows(descriptor):
+            sources.append(node_ids[source])
+            targets.append(node_ids[target])
+            flags.append(sum(1 << ImportKind[kind].value for kind in kinds) | (DYNAMIC_EDGE_FLAG if dynamic else 0))
+            if len(sources) == _COLUMN_CHUNK_SIZE:
+                edge_count += _write_columns(sources, targets, flags, src_stream, dst_stream, flag_stream)
+        edge_count += _write_columns(sources, targets, flags, src_stream, dst_stream, flag_stream)
+
+    meta = {
+        "format": "pyprince-columnar",
+        "version": COLUMNAR_FORMAT_VERSION,
+        "node_count": len(node_ids),
+        "edge_count": edge_count,
+        "package_count": len(package_ids),
+        "tables": {
+            "nodes": {"file": "nodes.csv", "columns": ["id", "name", "kind", "package_id"]},
+            "packages": {"file": "packages.csv", "columns": ["id", "name", "type"]},
+            "edges": {
+                "columns": {
+                    "src": {"file": "edges.src.u32", "dtype": "<u4"},
+                    "dst": {"file": "edges.dst.u32", "dtype": "<u4"},
+                    "flags": {"file": "edges.flags.u8", "dtype": "u1"},
+                },
+            },
+        },
+        "flags": {**{kind.name: 1 << kind.value for kind in ImportKind}, "Dynamic": DYNAMIC_EDGE_FLAG},
+    }
+    (output_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def _write_columns(
+    sources: array, targets: array, flags: array, src_stream: BinaryIO, dst_stream: BinaryIO, flag_stream: BinaryIO
+) -> int:
+    count = len(sources)
+    if sys.byteorder != "little":
+        sources.byteswap()
+        targets.byteswap()
+    sources.tofile(src_stream)
+    targets.tofile(dst_stream)
+    flags.tofile(flag_stream)
+    del sources[:], targets[:], flags[:]
+    return count
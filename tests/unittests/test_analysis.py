@@ -0,0 +1,124 @@
+from typing import Dict, List
+
+from hamcrest import assert_that, contains_exactly, empty, equal_to
+
+import tests.testutils as testutils
+from pyprince import analysis
+from pyprince.parser import ImportKind, Module, ModuleIdentifier, Package, PackageType, Project
+
+
+def create_project(imports: Dict[str, List[str]]) -> Project:
+    project = Project()
+    for name, imported_names in imports.items():
+        mod = Module(ModuleIdentifier(name), None, None)
+        for imported in imported_names:
+            mod.add_submodule(ModuleIdentifier(imported))
+        project.add_module(mod)
+    return project
+
+
+class TestCycles(testutils.PyPrinceTestCase):
+    def test_import_cycles(self):
+        project = create_project(
+            {
+                "main": ["a", "selfish"],
+                "a": ["b"],
+                "b": ["c", "a"],
+                "c": ["a", "leaf"],
+                "selfish": ["selfish"],
+                "leaf": [],
+            }
+        )
+        graph = analysis.ModuleGraph.from_project(project)
+        cycles = analysis.find_import_cycles(graph)
+        assert_that([cycle.modules for cycle in cycles], contains_exactly(["a", "b", "c"], ["selfish"]))
+        assert_that(cycles[0].path, equal_to(["a", "b", "a"]))
+        assert_that(cycles[1].path, equal_to(["selfish", "selfish"]))
+
+        # Components come after the components they import
+        components = [
+            sorted(graph.names[node] for node in component)
+            for component in analysis.find_strongly_connected_components(graph)
+        ]
+        assert_that(components.index(["leaf"]) < components.index(["a", "b", "c"]), equal_to(True))
+        assert_that(components[-1], equal_to(["main"]))
+
+    def test_skipped_import_kinds_break_cycles(self):
+        project = create_project({"a": ["b"], "b": []})
+        project.get_module("b").add_submodule(ModuleIdentifier("a"), ImportKind.TypeChecking)
+        cycles = analysis.find_import_cycles(analysis.ModuleGraph.from_project(project))
+        assert_that([cycle.modules for cycle in cycles], equal_to([["a", "b"]]))
+        graph = analysis.ModuleGraph.from_project(project, {ImportKind.TypeChecking})
+        assert_that(analysis.find_import_cycles(graph), empty())
+
+    def test_deep_graph_does_not_hit_recursion_limit(self):
+        depth = 20000
+        graph = analysis.ModuleGraph()
+        for i in range(depth):
+            graph.add_edge(f"m{i}", f"m{i + 1}")
+        graph.add_edge(f"m{depth}", "m0")
+        cycles = analysis.find_import_cycles(graph)
+        assert_that(len(cycles), equal_to(1))
+        assert_that(len(cycles[0].modules), equal_to(depth + 1))
+        assert_that(len(cycles[0].path), equal_to(depth + 2))
+
+
+class TestLayers(testutils.PyPrinceTestCase):
+    def test_layers_put_dependencies_first(self):
+        project = create_project(
+            {
+                "main": ["a", "util"],
+                "a": ["b", "util"],
+                "b": ["a", "leaf"],
+                "util": ["leaf"],
+                "leaf": [],
+                "unreachable": ["leaf"],
+            }
+        )
+        graph = analysis.ModuleGraph.from_project(project)
+        layers = analysis.find_topological_layers(graph, graph.get_ids(["main"]))
+        assert_that(
+            [[graph.names[node] for node in layer] for layer in layers],
+            equal_to([["leaf"], ["util"], ["a", "b"], ["main"]]),
+        )
+        all_layers = analysis.find_topological_layers(graph)
+        assert_that([graph.names[node] for node in all_layers[1]], equal_to(["unreachable", "util"]))
+
+
+class TestFootprint(testutils.PyPrinceTestCase):
+    def test_footprint_of_modules_and_packages(self):
+        test_root = testutils.get_test_scenarios_dir() / self._testMethodName
+        test_root.mkdir(parents=True, exist_ok=True)
+        project = create_project(
+            {
+                "main": ["requests.api", "util"],
+                "util": ["json"],
+                "requests.api": ["requests.models"],
+                "requests.models": ["requests.api", "json"],
+                "json": [],
+            }
+        )
+        for name, size in [("requests.api", 100), ("requests.models", 50), ("json", 7)]:
+            path = test_root / f"{name}.py"
+            path.write_text("#" * size)
+            project.get_module(name).path = str(path)
+        for package_name, package_type, module_names in [
+            ("app", PackageType.Local, ["main", "util"]),
+            ("requests", PackageType.Site, ["requests.api", "requests.models"]),
+            ("stdlib", PackageType.StandardLib, ["json"]),
+        ]:
+            project.add_package(Package(package_name, None, package_type))
+            for module_name in module_names:
+                project.get_package(package_name).add_module(ModuleIdentifier(module_name))
+
+        footprint = analysis.compute_footprint(project)
+        assert_that(
+            footprint.module_reach,
+            equal_to({"main": 4, "util": 1, "requests.api": 2, "requests.models": 2, "json": 0}),
+        )
+        assert_that(
+            footprint.packages["requests"],
+            equal_to(analysis.PackageFootprint("Site", modules=2, source_bytes=150, reach=3, reach_bytes=157)),
+        )
+        assert_that(footprint.packages["app"].reach, equal_to(5))
+        assert_that(list(footprint.to_dict()["packages"]), equal_to(["app", "requests", "stdlib"]))
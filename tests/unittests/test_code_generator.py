@@ -1,7 +1,9 @@
 from pathlib import Path
+import subprocess
+import sys
 import textwrap
 
-from hamcrest import assert_that, equal_to
+from hamcrest import assert_that, contains_exactly, equal_to
 import tests.testutils as testutils
 from tests.testutils import PackageGenerator
 from pyprince.parser import parse_project, Project
@@ -26,3 +28,102 @@ class TestCodeGenerator(testutils.PyPrinceTestCase):
         expected = """print("Hello pyparser")"""
         actual = generators.generate_code(project)
         assert_that(actual, equal_to(expected))
+
+    def test_generate_bundle(self):
+        test_name = Path(self._testMethodName)
+        self._generate_bundle_scenario(test_name)
+
+        project: Project = parse_project(self.test_root / test_name / "src" / "main.py", shallow_stdlib=True)
+        bundle_path = self.test_root / test_name / "out" / "bundle.py"
+        bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        bundle_path.write_text(generators.generate_bundle(project))
+
+        result = subprocess.run([sys.executable, str(bundle_path)], capture_output=True, text=True, check=True)
+        assert_that(result.stdout.strip(), equal_to("hello bundle"))
+
+    def test_generate_zipapp(self):
+        test_name = Path(self._testMethodName)
+        self._generate_bundle_scenario(test_name)
+
+        project: Project = parse_project(self.test_root / test_name / "src" / "main.py", shallow_stdlib=True)
+        zipapp_path = self.test_root / test_name / "out" / "bundle.pyz"
+        zipapp_path.parent.mkdir(parents=True, exist_ok=True)
+        generators.generate_zipapp(project, zipapp_path)
+
+        result = subprocess.run([sys.executable, str(zipapp_path)], capture_output=True, text=True, check=True)
+        assert_that(result.stdout.strip(), equal_to("hello bundle"))
+
+    def test_bundle_includes_parent_packages_of_submodules(self):
+        test_name = Path(self._testMethodName)
+        gen = PackageGenerator()
+        gen.add_file(
+            test_name / "src" / "main.py",
+            textwrap.dedent(
+                """
+                from pkg import helper
+                from pkg.sub import val
+                from nspkg.inner.mod import VALUE
+                print(helper.NAME, val.VALUE, VALUE)
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_name / "src" / "pkg" / "__init__.py", "PACKAGE_FLAG = True\n")
+        gen.add_file(test_name / "src" / "pkg" / "helper.py", 'NAME = "helper"\n')
+        gen.add_file(test_name / "src" / "pkg" / "sub" / "__init__.py", "")
+        gen.add_file(test_name / "src" / "pkg" / "sub" / "val.py", "VALUE = 1\n")
+        gen.add_file(test_name / "src" / "nspkg" / "inner" / "mod.py", "VALUE = 2\n")
+        gen.generate_files(self.test_root)
+
+        project: Project = parse_project(self.test_root / test_name / "src" / "main.py", shallow_stdlib=True)
+        registry = generators._collect_bundle_sources(project, include_site_packages=False)
+        names = list(registry)
+        for parent, child in [("pkg", "pkg.helper"), ("pkg.sub", "pkg.sub.val"), ("nspkg.inner", "nspkg.inner.mod")]:
+            assert_that(names.index(parent) < names.index(child), equal_to(True))
+        assert_that(registry["pkg"], equal_to((True, "PACKAGE_FLAG = True\n")))
+        assert_that(registry["nspkg"], equal_to((True, "")))
+
+        out_dir = self.test_root / test_name / "out"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        (out_dir / "bundle.py").write_text(generators.generate_bundle(project))
+        generators.generate_zipapp(project, out_dir / "bundle.pyz")
+        for output in ["bundle.py", "bundle.pyz"]:
+            # Run from another directory, so the sources next to the entrypoint are not importable
+            result = subprocess.run(
+                [sys.executable, str(out_dir / output)], capture_output=True, text=True, check=True, cwd=out_dir
+            )
+            assert_that(result.stdout.strip(), equal_to("helper 1 2"))
+
+    def test_bundle_modules_are_in_topological_order(self):
+        test_name = Path(self._testMethodName)
+        self._generate_bundle_scenario(test_name)
+
+        project: Project = parse_project(self.test_root / test_name / "src" / "main.py", shallow_stdlib=True)
+        order = generators._topological_order(project, project.get_root_modules(), set())
+        local_order = [name for name in order if name in ["main", "greeter", "greeter.words"]]
+        assert_that(local_order, contains_exactly("greeter.words", "greeter", "main"))
+
+    def _generate_bundle_scenario(self, test_name: Path):
+        gen = PackageGenerator()
+        gen.add_file(
+            test_name / "src" / "main.py",
+            textwrap.dedent(
+                """
+                import greeter
+                greeter.greet("bundle")
+                """
+            ).lstrip(),
+        )
+        gen.add_file(
+            test_name / "src" / "greeter" / "__init__.py",
+            textwrap.dedent(
+                """
+                import os
+                from .words import HELLO
+
+                def greet(name):
+                    print(HELLO + " " + name)
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_name / "src" / "greeter" / "words.py", 'HELLO = "hello"\n')
+        gen.generate_files(self.test_root)
@@ -1,8 +1,22 @@
+from array import array
+import io
+import json
 import textwrap
 
-from hamcrest import assert_that, equal_to, is_
+import libcst
+from hamcrest import assert_that, contains_string, equal_to, is_
 from tests import testutils
-from pyprince.parser import Project, Module, ModuleIdentifier, Package, PackageType
+from pyprince.parser import (
+    ImportKind,
+    ModuleKind,
+    Project,
+    Module,
+    ModuleIdentifier,
+    Package,
+    PackageType,
+    Symbol,
+    SymbolKind,
+)
 from pyprince import generators
 
 from pyprince.utils import serializer
@@ -50,6 +64,62 @@ class TestDescribeModuleDependency(testutils.PyPrinceTestCase):
         }
         assert_that(actual.to_dict(), equal_to(expected))
 
+    def test_describe_conditional_and_dynamic_edges(self):
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main", None), "main.py", None)
+        main_mod.add_submodule(ModuleIdentifier("util"))
+        main_mod.add_submodule(ModuleIdentifier("typing_helpers"), ImportKind.TypeChecking)
+        main_mod.add_dynamic_import(ModuleIdentifier("plugin"), ImportKind.FunctionLocal)
+        project.add_module(main_mod)
+        actual = generators.describe_module_dependencies(project)
+
+        expected = {
+            "nodes": ["main"],
+            "edges": {"main": ["util", "typing_helpers", "plugin"]},
+            "import_kinds": {"main": {"typing_helpers": ["TypeChecking"], "plugin": ["FunctionLocal"]}},
+            "dynamic_edges": {"main": ["plugin"]},
+        }
+        assert_that(actual.to_dict(), equal_to(expected))
+
+    def test_describe_module_kinds(self):
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main", None, ModuleKind.Source), "main.py", None)
+        math_mod = Module(ModuleIdentifier("math", None, ModuleKind.Extension), "math.so", None)
+        unknown_mod = Module(ModuleIdentifier("missing", None), None, None)
+        main_mod.add_submodule(math_mod.id)
+        main_mod.add_submodule(unknown_mod.id)
+        for mod in [main_mod, math_mod, unknown_mod]:
+            project.add_module(mod)
+        desc = generators.describe_module_dependencies(project)
+
+        assert_that(desc.to_dict()["kinds"], equal_to({"main": "Source", "math": "Extension"}))
+        assert_that('"math" [shape=box]' in serializer.to_graphviz_dot(desc), is_(True))
+
+    def test_describe_symbol_dependencies(self):
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main", None), "main.py", None)
+        package_mod = Module(ModuleIdentifier("pkg", None), "pkg/__init__.py", None)
+        impl_mod = Module(ModuleIdentifier("pkg.impl", None), "pkg/impl.py", None)
+        util_mod = Module(ModuleIdentifier("util", None), "util.py", None)
+        main_mod.add_imported_symbol(package_mod.id, "say")
+        main_mod.add_imported_symbol(package_mod.id, "missing")
+        main_mod.add_submodule(util_mod.id)
+        package_mod.add_imported_symbol(impl_mod.id, "say")
+        for mod in [main_mod, package_mod, impl_mod, util_mod]:
+            project.add_module(mod)
+        project.add_symbol(Symbol("pkg.impl.say", "pkg.impl", SymbolKind.Function, libcst.parse_statement("pass")))
+
+        actual = generators.describe_symbol_dependencies(project)
+        expected = {
+            "nodes": ["main", "pkg", "pkg.impl", "util", "pkg.missing", "pkg.impl.say"],
+            "edges": {"main": ["pkg.missing", "pkg.impl.say", "util"], "pkg": ["pkg.impl.say"]},
+            "symbols": {
+                "pkg.impl.say": {"module": "pkg.impl", "kind": "Function"},
+                "pkg.missing": {"module": "pkg", "kind": "Unknown"},
+            },
+        }
+        assert_that(actual.to_dict(), equal_to(expected))
+
     def test_json_serialize(self):
         deps = generators.DependencyDescriptor()
         deps.add_node("main")
@@ -101,3 +171,76 @@ class TestDescribeModuleDependency(testutils.PyPrinceTestCase):
         )
         actual = serializer.to_graphviz_dot(deps)
         assert_that(actual, equal_to(expected))
+
+    def test_edge_list_serialize(self):
+        deps = generators.describe_module_dependencies(self._create_conditional_project())
+        stream = io.StringIO()
+        serializer.write_edge_list(deps, stream, delimiter="\t")
+        expected = textwrap.dedent(
+            """\
+            source\ttarget\tkinds\tdynamic
+            main\tutil\tTopLevel\t0
+            main\ttyping_helpers\tTypeChecking\t0
+            main\tplugin\tFunctionLocal\t1
+            """
+        )
+        assert_that(stream.getvalue(), equal_to(expected))
+
+    def test_columnar_serialize(self):
+        project = self._create_conditional_project()
+        project.add_package(Package("main", None, PackageType.Local))
+        project.get_package("main").add_module(ModuleIdentifier("main"))
+        deps = generators.describe_module_dependencies(project)
+        output_dir = testutils.get_test_scenarios_dir() / self._testMethodName
+        serializer.write_columnar(deps, output_dir)
+
+        meta = json.loads((output_dir / "meta.json").read_text())
+        assert_that(meta["node_count"], equal_to(4))
+        assert_that(meta["edge_count"], equal_to(3))
+        assert_that(
+            (output_dir / "nodes.csv").read_text().splitlines(),
+            equal_to(["id,name,kind,package_id", "0,main,,0", "1,util,,-1", "2,typing_helpers,,-1", "3,plugin,,-1"]),
+        )
+        targets = array("I")
+        targets.frombytes((output_dir / "edges.dst.u32").read_bytes())
+        assert_that(list(targets), equal_to([1, 2, 3]))
+        flags = list((output_dir / "edges.flags.u8").read_bytes())
+        assert_that(flags, equal_to([1, 1 << ImportKind.TypeChecking.value, 4 | serializer.DYNAMIC_EDGE_FLAG]))
+
+    def test_describe_condensed_dependencies(self):
+        project = Project()
+        for name, imports in [
+            ("app.main", ["app.util", "email.mime.text", "email.parser"]),
+            ("app.util", ["email.mime.text", "email.mime.base"]),
+            ("email.mime.text", ["email.mime.base"]),
+        ]:
+            mod = Module(ModuleIdentifier(name, None), None, None)
+            for imported in imports:
+                mod.add_submodule(ModuleIdentifier(imported))
+            project.add_module(mod)
+        project.add_package(Package("app", None, PackageType.Local))
+        project.add_package(Package("stdlib", None, PackageType.StandardLib))
+        project.get_package("app").add_module(ModuleIdentifier("app.main"))
+        project.get_package("app").add_module(ModuleIdentifier("app.util"))
+        project.get_package("stdlib").add_module(ModuleIdentifier("email.mime.text"))
+
+        packages = generators.describe_package_dependencies(project).to_dict()
+        assert_that(packages["nodes"], equal_to(["app", "stdlib", "email"]))
+        assert_that(packages["weights"], equal_to({"app": {"stdlib": 2, "email": 2}, "stdlib": {"email": 1}}))
+
+        prefixes = generators.describe_prefix_dependencies(project, depth=2)
+        assert_that(prefixes.nodes, equal_to(["app.main", "app.util", "email.mime", "email.parser"]))
+        assert_that(
+            dict(prefixes.weights),
+            equal_to({"app.main": {"app.util": 1, "email.mime": 1, "email.parser": 1}, "app.util": {"email.mime": 2}}),
+        )
+        assert_that(serializer.to_graphviz_dot(prefixes), contains_string('"app.util" -> "email.mime" [label="2"]'))
+
+    def _create_conditional_project(self) -> Project:
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main", None), "main.py", None)
+        main_mod.add_submodule(ModuleIdentifier("util"))
+        main_mod.add_submodule(ModuleIdentifier("typing_helpers"), ImportKind.TypeChecking)
+        main_mod.add_dynamic_import(ModuleIdentifier("plugin"), ImportKind.FunctionLocal)
+        project.add_module(main_mod)
+        return project
@@ -0,0 +1,165 @@
+import textwrap
+
+import libcst
+import libcst.matchers as cstm
+from hamcrest import assert_that, calling, equal_to, raises
+
+from tests import testutils
+from pyprince import transformer
+from pyprince.utils.error import InliningError
+
+
+class TestFunctionInliner(testutils.PyPrinceTestCase):
+    def test_inline_single_call_site(self):
+        module = self._parse(
+            """
+            def add(a, b):
+                c = a + b
+                return c
+
+            def main(x):
+                c = 1
+                y = add(x, c)
+                return y
+            """
+        )
+        call = self._find_call(module, "add")
+        actual = transformer.inline_call(module, call)
+        expected = self._dedent(
+            """
+            def add(a, b):
+                c = a + b
+                return c
+
+            def main(x):
+                c = 1
+                _add_a = x
+                _add_b = c
+                _add_c = _add_a + _add_b
+                y = _add_c
+                return y
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+
+    def test_inline_rewrites_early_returns(self):
+        module = self._parse(
+            """
+            def sign(v):
+                if v < 0:
+                    return -1
+                return 1
+
+            def main(x):
+                return sign(x)
+            """
+        )
+        actual = transformer.inline_call(module, self._find_call(module, "sign"))
+        expected = self._dedent(
+            """
+            def sign(v):
+                if v < 0:
+                    return -1
+                return 1
+
+            def main(x):
+                _sign_v = x
+                if _sign_v < 0:
+                    _sign_result = -1
+                else:
+                    _sign_result = 1
+                return _sign_result
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+        self._assert_same_results(module, actual, "main", [-5, 0, 5])
+
+    def test_inline_binds_keyword_and_default_arguments(self):
+        module = self._parse(
+            """
+            def scale(v, factor=2, *, offset=0):
+                return v * factor + offset
+
+            def main(x):
+                return scale(x, offset=3)
+            """
+        )
+        actual = transformer.inline_call(module, self._find_call(module, "scale"))
+        self._assert_same_results(module, actual, "main", [1, 2, 3])
+        assert_that(len(cstm.findall(actual.body[1], cstm.Call())), equal_to(0))
+
+    def test_inline_refuses_return_inside_loop(self):
+        module = self._parse(
+            """
+            def first(items):
+                for item in items:
+                    return item
+
+            def main(x):
+                return first(x)
+            """
+        )
+        call = self._find_call(module, "first")
+        assert_that(calling(transformer.inline_call).with_args(module, call), raises(InliningError))
+
+    def test_inline_refuses_shadowed_global(self):
+        module = self._parse(
+            """
+            import math
+
+            def root(v):
+                return math.sqrt(v)
+
+            def main(math):
+                return root(math)
+            """
+        )
+        call = self._find_call(module, "root")
+        assert_that(calling(transformer.inline_call).with_args(module, call), raises(InliningError))
+
+    def test_expand_calls_to_depth(self):
+        module = self._parse(
+            """
+            def inc(v):
+                return v + 1
+
+            def inc_twice(v):
+                w = inc(v)
+                return inc(w)
+
+            def main(x):
+                total = 0
+                for i in range(x):
+                    total += inc_twice(i)
+                return total
+            """
+        )
+        one_level = transformer.expand_function_calls(module, "main", depth=1)
+        assert_that(self._called_names(one_level, "main"), equal_to({"range", "inc"}))
+
+        two_levels = transformer.expand_function_calls(module, "main", depth=2)
+        assert_that(self._called_names(two_levels, "main"), equal_to({"range"}))
+        self._assert_same_results(module, two_levels, "main", [0, 3, 10])
+
+    def _parse(self, code: str) -> libcst.Module:
+        return libcst.parse_module(self._dedent(code))
+
+    def _dedent(self, code: str) -> str:
+        return textwrap.dedent(code).lstrip()
+
+    def _find_call(self, module: libcst.Module, name: str) -> libcst.Call:
+        call = cstm.findall(module, cstm.Call(func=cstm.Name(name)))[0]
+        assert isinstance(call, libcst.Call)
+        return call
+
+    def _called_names(self, module: libcst.Module, function_name: str):
+        function = next(f for f in module.body if isinstance(f, libcst.FunctionDef) and f.name.value == function_name)
+        calls = [call for call in cstm.findall(function, cstm.Call(func=cstm.Name())) if isinstance(call, libcst.Call)]
+        return {call.func.value for call in calls if isinstance(call.func, libcst.Name)}
+
+    def _assert_same_results(self, original: libcst.Module, expanded: libcst.Module, function_name: str, inputs):
+        original_ns, expanded_ns = {}, {}
+        exec(original.code, original_ns)
+        exec(expanded.code, expanded_ns)
+        for value in inputs:
+            assert_that(expanded_ns[function_name](value), equal_to(original_ns[function_name](value)))
@@ -7,7 +7,7 @@ from pathlib import Path
 
 from hamcrest import assert_that, contains_inanyorder, equal_to, greater_than_or_equal_to, not_none
 from tests import testutils
-from pyprince.parser.project import Module, Project
+from pyprince.parser.project import ImportKind, Module, Project
 from pyprince.parser import parse_project
 
 # Python import possibilities:
@@ -532,6 +532,220 @@ class TestImportResolver(testutils.PyPrinceTestCase):
         project: Project = parse_project(test_main, shallow_stdlib=False)
         self._assert_module_depends_on(project.get_module("main"), "reltest")
 
+    def test_from_import_records_imported_symbols(self):
+        test_name = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_name / "main.py",
+            textwrap.dedent(
+                """
+                from reltest import say, impl
+                from util import shout
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_name / "reltest" / "__init__.py", "from .impl import say")
+        gen.add_file(test_name / "reltest" / "impl.py", "def say(msg):\n    print(msg)\n")
+        gen.add_file(test_name / "util.py", "def shout(msg):\n    print(msg.upper())\n")
+        gen.generate_files(self.test_root)
+
+        test_main = self.test_root / test_name / "main.py"
+        project: Project = parse_project(test_main, shallow_stdlib=True)
+        main = project.get_module("main")
+        assert_that(main.imported_symbols, equal_to({"reltest": {"say"}, "util": {"shout"}}))
+        self._assert_module_depends_on(main, "reltest", "reltest.impl", "util")
+        assert_that(project.resolve_symbol("reltest", "say").qualified_name, equal_to("reltest.impl.say"))
+
+    def test_import_kinds(self):
+        test_name = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_name / "main.py",
+            textwrap.dedent(
+                """
+                import sys
+                from typing import TYPE_CHECKING
+                import toplevel
+
+                if TYPE_CHECKING:
+                    import typeonly
+                try:
+                    import missing_accelerator as accelerated
+                except ImportError:
+                    import fallback as accelerated
+                try:
+                    import missing_tuple_accelerator
+                except (AttributeError, ModuleNotFoundError):
+                    import tuple_fallback
+                try:
+                    import failing_setup
+                except Exception:
+                    import generic_handler
+                try:
+                    import failing_bare_setup
+                except:
+                    import bare_handler
+                if sys.platform == "win32":
+                    import windows_only
+
+                def main():
+                    import lazy
+                    import toplevel
+                """
+            ).lstrip(),
+        )
+        for module_name in ["toplevel", "typeonly", "fallback", "tuple_fallback", "generic_handler", "bare_handler"]:
+            gen.add_file(test_name / f"{module_name}.py", "import json\n")
+        for module_name in ["windows_only", "lazy"]:
+            gen.add_file(test_name / f"{module_name}.py", "import json\n")
+        gen.generate_files(self.test_root)
+
+        test_main = self.test_root / test_name / "main.py"
+        project: Project = parse_project(test_main, shallow_stdlib=True)
+        main = project.get_module("main")
+        assert_that(main.import_kinds["toplevel"], equal_to({ImportKind.TopLevel, ImportKind.FunctionLocal}))
+        assert_that(main.import_kinds["typeonly"], equal_to({ImportKind.TypeChecking}))
+        assert_that(main.import_kinds["missing_accelerator"], equal_to({ImportKind.TopLevel}))
+        assert_that(main.import_kinds["fallback"], equal_to({ImportKind.Fallback}))
+        assert_that(main.import_kinds["tuple_fallback"], equal_to({ImportKind.Fallback}))
+        assert_that(main.import_kinds["generic_handler"], equal_to({ImportKind.TopLevel}))
+        assert_that(main.import_kinds["bare_handler"], equal_to({ImportKind.TopLevel}))
+        assert_that(main.import_kinds["windows_only"], equal_to({ImportKind.PlatformGuarded}))
+        assert_that(main.import_kinds["lazy"], equal_to({ImportKind.FunctionLocal}))
+        assert_that(project.has_module("lazy"), equal_to(True))
+
+    def test_skipping_import_kinds(self):
+        test_name = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_name / "main.py",
+            textwrap.dedent(
+                """
+                from typing import TYPE_CHECKING
+                import toplevel
+
+                if TYPE_CHECKING:
+                    import typeonly
+
+                def main():
+                    import lazy
+                """
+            ).lstrip(),
+        )
+        for module_name in ["toplevel", "typeonly", "lazy"]:
+            gen.add_file(test_name / f"{module_name}.py", "import json\n")
+        gen.generate_files(self.test_root)
+
+        test_main = self.test_root / test_name / "main.py"
+        skipped = {ImportKind.TypeChecking, ImportKind.FunctionLocal}
+        project: Project = parse_project(test_main, shallow_stdlib=True, skip_import_kinds=skipped)
+        main = project.get_module("main")
+        self._assert_module_depends_on(main, "typing", "toplevel", "typeonly", "lazy")
+        assert_that(project.has_module("toplevel"), equal_to(True))
+        assert_that(project.has_module("typeonly"), equal_to(False))
+        assert_that(project.has_module("lazy"), equal_to(False))
+
+    def test_dynamic_imports(self):
+        test_name = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_name / "main.py",
+            textwrap.dedent(
+                """
+                import importlib
+                import plugins
+                PLUGIN_PACKAGE = "plugins"
+
+                def load(name):
+                    importlib.import_module(f"{PLUGIN_PACKAGE}.first")
+                    importlib.import_module(PLUGIN_PACKAGE + ".second")
+                    importlib.import_module(name)
+                    importlib.import_module(BACKEND)
+                    importlib.import_module(MODE)
+                    return __import__("util")
+
+                BACKEND = "backend"
+                MODE = "util"
+                if PLUGIN_PACKAGE:
+                    MODE = "missing_mode"
+                """
+            ).lstrip(),
+        )
+        gen.add_file(
+            test_name / "plugins" / "__init__.py", 'import importlib\nimportlib.import_module(".second", __name__)\n'
+        )
+        gen.add_file(
+            test_name / "plugins" / "first.py",
+            textwrap.dedent(
+                """
+                import importlib
+                importlib.import_module(".third", package=__package__)
+                importlib.import_module(".inner", __name__)
+                """
+            ).lstrip(),
+        )
+        for module_name in ["second", "third"]:
+            gen.add_file(test_name / "plugins" / f"{module_name}.py", "")
+        gen.add_file(test_name / "util.py", "")
+        gen.add_file(test_name / "backend.py", "")
+        gen.generate_files(self.test_root)
+
+        test_main = self.test_root / test_name / "main.py"
+        project: Project = parse_project(test_main, shallow_stdlib=True)
+        main = project.get_module("main")
+        self._assert_module_depends_on(main, "importlib", "plugins.first", "plugins.second", "util")
+        assert_that(main.dynamic_imports, equal_to({"plugins.first", "plugins.second", "backend", "util"}))
+        assert_that(main.import_kinds["util"], equal_to({ImportKind.FunctionLocal}))
+        first_plugin = project.get_module("plugins.first")
+        self._assert_module_depends_on(first_plugin, "importlib", "plugins.third")
+        assert_that(first_plugin.dynamic_imports, equal_to({"plugins.third", "plugins.first.inner"}))
+        assert_that(project.get_module("plugins").dynamic_imports, equal_to({"plugins.second"}))
+        assert_that(project.has_module("plugins.third"), equal_to(True))
+
+    def test_dynamic_imports_of_rebound_names(self):
+        test_name = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_name / "main.py",
+            textwrap.dedent(
+                """
+                import importlib
+                NAME = "a"
+                NAME += ".b"
+                LOOP = "a"
+                for LOOP in ["a.b"]:
+                    pass
+                WALRUS = "a"
+                if (WALRUS := "a.b"):
+                    pass
+                GLOBAL = "a"
+                CLASS_NAME = "util"
+
+                class Config:
+                    CLASS_NAME = "a"
+
+                def rebind():
+                    global GLOBAL
+                    GLOBAL = "a.b"
+
+                importlib.import_module(NAME)
+                importlib.import_module(LOOP)
+                importlib.import_module(WALRUS)
+                importlib.import_module(GLOBAL)
+                importlib.import_module(CLASS_NAME)
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_name / "a" / "__init__.py", "")
+        gen.add_file(test_name / "a" / "b.py", "")
+        gen.add_file(test_name / "util.py", "")
+        gen.generate_files(self.test_root)
+
+        test_main = self.test_root / test_name / "main.py"
+        project: Project = parse_project(test_main, shallow_stdlib=True)
+        main = project.get_module("main")
+        assert_that(main.dynamic_imports, equal_to({"util"}))
+
     def _assert_module_path(self, module: Optional[Module], expected_path: Path):
         assert_that(module, not_none())
         assert_that(module.path, not_none())
@@ -0,0 +1,93 @@
+from pathlib import Path
+import sys
+import textwrap
+
+from hamcrest import assert_that, contains_inanyorder, equal_to, is_, none, not_none
+
+import tests.testutils as testutils
+from pyprince.parser.module_finder import ModuleFinder
+
+
+class TestModuleFinder(testutils.PyPrinceTestCase):
+    def setUp(self):
+        self.test_root = testutils.get_test_scenarios_dir()
+        testutils.remove_imported_modules()
+
+    def test_static_resolution_does_not_import_parent_packages(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "heavy" / "__init__.py", "raise RuntimeError('heavy package was imported')\n")
+        gen.add_file(test_path / "heavy" / "core" / "__init__.py", "")
+        gen.add_file(test_path / "heavy" / "core" / "compute.py", "")
+        gen.generate_files(self.test_root)
+
+        finder = self._create_static_finder([self.test_root / test_path])
+        spec = finder.find_spec("heavy.core.compute")
+        assert_that(spec, not_none())
+        assert_that(spec.origin, equal_to(str(self.test_root / test_path / "heavy" / "core" / "compute.py")))
+        assert_that("heavy" in sys.modules, is_(False))
+        assert_that(finder.find_spec("heavy.missing"), none())
+
+    def test_static_resolution_of_namespace_and_extended_packages(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "first" / "nspkg" / "alpha.py", "")
+        gen.add_file(test_path / "second" / "nspkg" / "beta.py", "")
+        extend_path_init = textwrap.dedent(
+            """
+            from pkgutil import extend_path
+            __path__ = extend_path(__path__, __name__)
+            """
+        ).lstrip()
+        gen.add_file(test_path / "first" / "extpkg" / "__init__.py", extend_path_init)
+        gen.add_file(test_path / "second" / "extpkg" / "__init__.py", extend_path_init)
+        gen.add_file(test_path / "second" / "extpkg" / "plugin.py", "")
+        gen.generate_files(self.test_root)
+
+        finder = self._create_static_finder(
+            [self.test_root / test_path / "first", self.test_root / test_path / "second"]
+        )
+        namespace_spec = finder.find_spec("nspkg")
+        assert_that(namespace_spec.origin, none())
+        assert_that(
+            list(namespace_spec.submodule_search_locations),
+            contains_inanyorder(
+                str(self.test_root / test_path / "first" / "nspkg"),
+                str(self.test_root / test_path / "second" / "nspkg"),
+            ),
+        )
+        assert_that(
+            finder.find_spec("nspkg.beta").origin,
+            equal_to(str(self.test_root / test_path / "second" / "nspkg" / "beta.py")),
+        )
+        assert_that(
+            finder.find_spec("extpkg.plugin").origin,
+            equal_to(str(self.test_root / test_path / "second" / "extpkg" / "plugin.py")),
+        )
+
+    def test_static_resolution_of_pth_paths_and_builtins(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "site-packages" / "extra.pth", "# comment\n../develop\nimport os\n")
+        gen.add_file(test_path / "develop" / "devmodule.py", "")
+        gen.generate_files(self.test_root)
+
+        finder = self._create_static_finder([self.test_root / test_path / "site-packages"])
+        assert_that(
+            finder.find_spec("devmodule").origin,
+            equal_to(str((self.test_root / test_path / "develop" / "devmodule.py").resolve())),
+        )
+        assert_that(finder.find_spec("sys").origin, equal_to("built-in"))
+        assert_that(finder.is_parsable_origin("/lib/_decimal.cpython-311-x86_64-linux-gnu.so"), is_(False))
+
+    def test_failed_lookups_are_cached(self):
+        finder = ModuleFinder()
+        assert_that(finder.try_find_top_level_module("org.python.core"), none())
+        assert_that("org.python.core" in finder.missing_modules, is_(True))
+        finder.update_toplevel_module_paths(sys.path)
+        assert_that(finder.missing_modules, equal_to(set()))
+
+    def _create_static_finder(self, paths) -> ModuleFinder:
+        finder = ModuleFinder(static=True)
+        finder.update_toplevel_module_paths([str(path) for path in paths])
+        return finder
@@ -0,0 +1,154 @@
+import textwrap
+
+import libcst
+from hamcrest import assert_that, equal_to
+
+from tests import testutils
+from pyprince import transformer
+
+
+class TestOptimizer(testutils.PyPrinceTestCase):
+    def test_fold_constants(self):
+        actual = transformer.fold_constants(self._parse("x = (2 + 3) * 4 - 1\ny = 'ab' * 2\nz = 1 < 2 <= 2\n"))
+        assert_that(actual.code, equal_to("x = 19\ny = 'abab'\nz = True\n"))
+
+    def test_fold_constants_keeps_runtime_errors_and_big_results(self):
+        code = "x = 1 / 0\ny = 2 ** 1000\nz = 'a' + 1\n"
+        actual = transformer.fold_constants(self._parse(code))
+        assert_that(actual.code, equal_to(code))
+
+    def test_propagate_constant_and_copy(self):
+        actual = transformer.optimize_module(
+            self._parse(
+                """
+                def f():
+                    asd = 7
+                    rar = asd
+                    return rar * 2
+                """
+            )
+        )
+        expected = self._dedent(
+            """
+            def f():
+                return 14
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+
+    def test_loop_variable_copy_is_propagated_inside_loop_body(self):
+        actual = transformer.optimize_module(
+            self._parse(
+                """
+                def f(items):
+                    total = 0
+                    for item in items:
+                        value = item
+                        total += value
+                    return total
+                """
+            )
+        )
+        expected = self._dedent(
+            """
+            def f(items):
+                total = 0
+                for item in items:
+                    total += item
+                return total
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+
+    def test_reassigned_locals_are_not_propagated(self):
+        code = self._dedent(
+            """
+            def f(a):
+                b = a
+                a = 2
+                c = 1
+                if a:
+                    c = 3
+                return b + c
+            """
+        )
+        actual = transformer.optimize_module(libcst.parse_module(code))
+        assert_that(actual.code, equal_to(code))
+
+    def test_copy_is_not_propagated_when_source_changes_before_usage(self):
+        code = self._dedent(
+            """
+            def f(items):
+                for i in items:
+                    old = last
+                    last = i
+                    print(old)
+            """
+        )
+        actual = transformer.optimize_module(libcst.parse_module(code))
+        assert_that(actual.code, equal_to(code))
+
+    def test_functions_introspecting_locals_are_not_changed(self):
+        code = self._dedent(
+            """
+            def f():
+                unused = 1
+                return locals()
+            """
+        )
+        actual = transformer.optimize_module(libcst.parse_module(code))
+        assert_that(actual.code, equal_to(code))
+
+    def test_optimize_after_inlining(self):
+        module = self._parse(
+            """
+            def square(v):
+                return v * v
+
+            def main():
+                a = square(3)
+                return a
+            """
+        )
+        expanded = transformer.expand_function_calls(module, "main")
+        actual = transformer.optimize_module(expanded)
+        expected = self._dedent(
+            """
+            def square(v):
+                return v * v
+
+            def main():
+                return 9
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+
+    def test_propagated_operations_keep_their_precedence(self):
+        module = self._parse(
+            """
+            def f(x, items):
+                a = -2
+                return a ** x, -a, a.real, items[a], a ** x
+            """
+        )
+        actual = transformer.propagate_copies(module)
+        expected = self._dedent(
+            """
+            def f(x, items):
+                a = -2
+                return (-2) ** x, -(-2), (-2).real, items[-2], (-2) ** x
+            """
+        )
+        assert_that(actual.code, equal_to(expected))
+
+        original_ns, optimized_ns = {}, {}
+        exec(module.code, original_ns)
+        exec(transformer.optimize_module(module).code, optimized_ns)
+        items = list(range(5))
+        assert_that(optimized_ns["f"](2, items), equal_to(original_ns["f"](2, items)))
+
+    def _parse(self, code: str) -> libcst.Module:
+        return libcst.parse_module(self._dedent(code))
+
+    def _dedent(self, code: str) -> str:
+        return textwrap.dedent(code).lstrip()
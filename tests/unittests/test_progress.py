@@ -0,0 +1,60 @@
+import io
+import json
+
+from hamcrest import assert_that, calling, contains_string, equal_to, has_entries, is_, none, raises
+
+import tests.testutils as testutils
+from pyprince.utils.progress import (
+    JsonProgressReporter,
+    ProgressReporter,
+    TextProgressReporter,
+    create_progress_reporter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestProgress(testutils.PyPrinceTestCase):
+    def test_reports_are_throttled(self):
+        clock = FakeClock()
+        stream = io.StringIO()
+        reporter = JsonProgressReporter(stream, interval=1.0, clock=clock)
+
+        clock.now = 0.5
+        reporter.update(parsed=5, cached=0, remaining=10)
+        assert_that(stream.getvalue(), equal_to(""))
+        clock.now = 2.0
+        reporter.update(parsed=15, cached=5, remaining=10)
+        clock.now = 2.5
+        reporter.update(parsed=16, cached=5, remaining=9)
+        reporter.finish(parsed=30, cached=10)
+
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert_that(len(events), equal_to(2))
+        assert_that(
+            events[0],
+            has_entries(
+                {"event": "progress", "queued": 10, "modules_per_second": 10.0, "cache_hit_ratio": 0.25, "eta": 1.0}
+            ),
+        )
+        assert_that(events[1], has_entries({"event": "finished", "parsed": 30, "cached": 10, "queued": 0}))
+
+    def test_text_progress(self):
+        clock = FakeClock()
+        stream = io.StringIO()
+        reporter = TextProgressReporter(stream, interval=1.0, clock=clock)
+        clock.now = 4.0
+        reporter.update(parsed=20, cached=20, remaining=20)
+        reporter.finish(parsed=40, cached=20)
+
+        lines = stream.getvalue().splitlines()
+        assert_that(lines[0], equal_to("Modules: 40 (10.0/s), queued: 20, cache hits: 50%, ETA: 2s"))
+        assert_that(lines[1], contains_string("finished in 4.0s"))
+        assert_that(create_progress_reporter("none", stream), is_(none()))
+        assert_that(calling(ProgressReporter).with_args(stream), raises(TypeError))
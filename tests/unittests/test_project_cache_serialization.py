@@ -18,7 +18,7 @@ from hamcrest import (
 
 from pyprince.parser import constants
 from pyprince.parser.package_finder import PackageFinder
-from pyprince.parser.project import Project, Module, ModuleIdentifier
+from pyprince.parser.project import ImportKind, ModuleKind, Project, Module, ModuleIdentifier
 from pyprince.parser.project_cache import ProjectCache
 from tests import testutils
 
@@ -116,6 +116,76 @@ class TestProjectCacheSerialization(testutils.PyPrinceTestCase):
                 contains_exactly(ModuleIdentifier("sys", None), ModuleIdentifier("abc", None)),
             )
 
+    def test_cache_keeps_imported_symbols(self):
+        project = Project()
+        package_finder = PackageFinder(project)
+        os_module = testutils.create_module("os", testutils.stdlib_path() / "os.py")
+        os_module.add_imported_symbol(ModuleIdentifier("stat"), "S_ISDIR")
+        os_module.add_imported_symbol(ModuleIdentifier("stat"), "S_ISREG")
+        project.add_module(os_module)
+        project.add_package(package_finder.STDLIB_PACKAGE)
+        package_finder.STDLIB_PACKAGE.add_module(os_module)
+
+        cache = ProjectCache()
+        with io.StringIO() as stream:
+            ProjectCache().serialize(stream, project)
+            stream.seek(0)
+            cache.load_stream(stream)
+
+        loaded = cache._project.get_module("os")
+        assert_that(loaded.imported_symbols, equal_to({"stat": {"S_ISDIR", "S_ISREG"}}))
+        assert_that(loaded.import_kinds, equal_to({"stat": {ImportKind.TopLevel}}))
+        assert_that(loaded.submodules, contains_exactly(ModuleIdentifier("stat")))
+
+    def test_cache_keeps_import_kinds(self):
+        project = Project()
+        package_finder = PackageFinder(project)
+        os_module = testutils.create_module("os", testutils.stdlib_path() / "os.py")
+        os_module.add_submodule(ModuleIdentifier("stat"))
+        os_module.add_submodule(ModuleIdentifier("nt"), ImportKind.PlatformGuarded)
+        os_module.add_submodule(ModuleIdentifier("typing"), ImportKind.TypeChecking)
+        os_module.add_submodule(ModuleIdentifier("typing"), ImportKind.FunctionLocal)
+        project.add_module(os_module)
+        project.add_package(package_finder.STDLIB_PACKAGE)
+        package_finder.STDLIB_PACKAGE.add_module(os_module)
+
+        cache = ProjectCache()
+        with io.StringIO() as stream:
+            ProjectCache().serialize(stream, project)
+            stream.seek(0)
+            cache.load_stream(stream)
+
+        loaded = cache._project.get_module("os")
+        assert_that(
+            loaded.import_kinds,
+            equal_to(
+                {
+                    "stat": {ImportKind.TopLevel},
+                    "nt": {ImportKind.PlatformGuarded},
+                    "typing": {ImportKind.TypeChecking, ImportKind.FunctionLocal},
+                }
+            ),
+        )
+
+    def test_cache_keeps_module_kinds(self):
+        project = Project()
+        package_finder = PackageFinder(project)
+        math_module = Module(ModuleIdentifier("math", None, ModuleKind.Extension), "math.so", None)
+        sys_module = Module(ModuleIdentifier("sys", None, ModuleKind.Builtin), constants.BUILTIN, None)
+        for module in [math_module, sys_module]:
+            project.add_module(module)
+            package_finder.STDLIB_PACKAGE.add_module(module)
+        project.add_package(package_finder.STDLIB_PACKAGE)
+
+        cache = ProjectCache()
+        with io.StringIO() as stream:
+            ProjectCache().serialize(stream, project)
+            stream.seek(0)
+            cache.load_stream(stream)
+
+        assert_that(cache._project.get_module("math").kind, is_(ModuleKind.Extension))
+        assert_that(cache._project.get_module("sys").kind, is_(ModuleKind.Builtin))
+
     def _create_cache_with_packages(self, packages: dict):
         return {constants.VERSION_TAG: "1.0", constants.PACKAGE_TAG: packages}
 
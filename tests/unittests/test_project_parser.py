@@ -1,13 +1,21 @@
+import dis
+import io
 from pathlib import Path
+import py_compile
+import sys
 import textwrap
+from unittest import mock
+import zipfile
 
-from hamcrest import assert_that, contains_exactly, contains_inanyorder, has_items, is_, only_contains
+from hamcrest import assert_that, contains_exactly, contains_inanyorder, has_entries, has_items, is_, only_contains
 
 import tests.testutils as testutils
-from pyprince.parser.project import PackageType
+from pyprince.parser.module_finder import ModuleFinder
+from pyprince.parser.project import ImportKind, ModuleKind, PackageType, SymbolKind
 from pyprince.parser.project_cache import ProjectCache
 from pyprince.parser import parse_project, Project, Module
-from pyprince.parser import constants
+from pyprince.parser import constants, module_loader, project_parser
+from pyprince.utils import logger
 
 
 class TestProjectParser(testutils.PyPrinceTestCase):
@@ -209,3 +217,270 @@ class TestProjectParser(testutils.PyPrinceTestCase):
         assert_that(project.get_modules(), contains_inanyorder("main", "os", "sys"))
         assert_that(project.get_package(constants.STDLIB_PACKAGE_NAME).modules, contains_inanyorder("os", "sys"))
         assert_that(project.get_package(constants.STDLIB_PACKAGE_NAME).package_type, PackageType.StandardLib)
+
+    def test_symbol_index(self):
+        test_name = self.current_test_name()
+        test_path = Path(test_name)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_path / "main.py",
+            textwrap.dedent(
+                """
+                from util import Family, some_functionality
+
+                def main():
+                    some_functionality(["Mom", "Dad"], ["Grandpa", "Cousin"])
+                """
+            ).lstrip(),
+        )
+        gen.add_file(
+            test_path / "util.py",
+            textwrap.dedent(
+                """
+                GREETING = "Family"
+                try:
+                    import json
+                    SEPARATOR, END = ", ", "."
+                except ImportError:
+                    pass
+
+                class Family:
+                    size: int = 2
+
+                    def members(self):
+                        return []
+
+                def some_functionality(parents, relatives):
+                    local_variable = parents + relatives
+                    print(f"{GREETING}: {local_variable}")
+                """
+            ).lstrip(),
+        )
+        gen.generate_files(self.test_root)
+
+        project: Project = parse_project(self.test_root / test_name / "main.py", shallow_stdlib=True)
+        assert_that(project.get_symbol("main.main").kind, is_(SymbolKind.Function))
+        assert_that(project.get_symbol("util.Family").kind, is_(SymbolKind.Class))
+        assert_that(project.get_symbol("util.Family.members").kind, is_(SymbolKind.Function))
+        assert_that(project.get_symbol("util.Family.size").kind, is_(SymbolKind.Variable))
+        assert_that(project.get_symbol("util.SEPARATOR").kind, is_(SymbolKind.Variable))
+        assert_that(project.get_symbol("util.END").kind, is_(SymbolKind.Variable))
+        assert_that(project.get_symbol("util.some_functionality.local_variable"), is_(None))
+        assert_that([s.qualified_name for s in project.find_symbols("GREETING")], contains_exactly("util.GREETING"))
+
+        assert_that(project.find_module_for_function("some_functionality")[0], is_("util"))
+        assert_that(project.get_function("some_functionality").name.value, is_("some_functionality"))
+        assert_that(project.get_symbol_position("util.some_functionality").start.line, is_(14))
+
+    def test_cached_modules_have_no_symbols(self):
+        test_name = self.current_test_name()
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            Path(test_name) / "main.py",
+            textwrap.dedent(
+                """
+                from json import dumps
+
+                print(dumps(["Mom", "Dad"]))
+                """
+            ).lstrip(),
+        )
+        gen.generate_files(self.test_root)
+        entry = self.test_root / test_name / "main.py"
+
+        project: Project = parse_project(entry, shallow_stdlib=True)
+        assert_that(project.get_symbol("json.dumps").kind, is_(SymbolKind.Function))
+
+        cache = ProjectCache()
+        cache.load_dict(cache.serialize_dict(project))
+        testutils.remove_imported_modules()
+        cached_project: Project = parse_project(entry, cache, shallow_stdlib=True)
+        assert_that(cached_project.get_module("json").syntax_tree, is_(None))
+        assert_that(cached_project.get_symbol("json.dumps"), is_(None))
+
+    def test_module_kinds(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_path / "main.py",
+            textwrap.dedent(
+                """
+                import sys
+                import math
+                import kindsns
+                import kindsns.member
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_path / "kindsns" / "member.py", "")
+        gen.generate_files(self.test_root)
+
+        project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        assert_that(project.get_module("main").kind, is_(ModuleKind.Source))
+        assert_that(project.get_module("sys").kind, is_(ModuleKind.Builtin))
+        assert_that(project.get_module("kindsns").kind, is_(ModuleKind.Namespace))
+        assert_that(project.get_module("kindsns").path, is_(str(self.test_root / test_path / "kindsns")))
+        assert_that(project.get_module("kindsns.member").kind, is_(ModuleKind.Source))
+        if project.get_module("math").path != "built-in":
+            assert_that(project.get_module("math").kind, is_(ModuleKind.Extension))
+            assert_that(project.get_module("math").syntax_tree, is_(None))
+
+    def test_parsing_modules_from_zip_archive(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import zippkg.helper\n")
+        gen.generate_files(self.test_root)
+        archive_path = self.test_root / test_path / "libs.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("zippkg/__init__.py", "")
+            archive.writestr("zippkg/helper.py", "import json\nfrom . import other\n")
+            archive.writestr("zippkg/other.py", "")
+
+        sys.path.insert(0, str(archive_path))
+        try:
+            project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        finally:
+            sys.path.remove(str(archive_path))
+        helper = project.get_module("zippkg.helper")
+        assert_that(helper.syntax_tree is not None, is_(True))
+        assert_that([sub.name for sub in helper.submodules], contains_inanyorder("json", "zippkg.other"))
+
+    def test_parsing_bytecode_only_module(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import compiledmod\n")
+        gen.add_file(
+            test_path / "compiledmod.py",
+            textwrap.dedent(
+                """
+                import json
+                from compiledhelpers import helper
+
+                def load():
+                    import csv
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_path / "compiledhelpers" / "__init__.py", "")
+        gen.add_file(test_path / "compiledhelpers" / "helper.py", "")
+        gen.generate_files(self.test_root)
+        source_path = self.test_root / test_path / "compiledmod.py"
+        py_compile.compile(str(source_path), cfile=str(source_path.with_suffix(".pyc")), doraise=True)
+        source_path.unlink()
+
+        project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        compiled = project.get_module("compiledmod")
+        assert_that(compiled.kind, is_(ModuleKind.Bytecode))
+        assert_that(
+            [sub.name for sub in compiled.submodules], contains_inanyorder("json", "compiledhelpers.helper", "csv")
+        )
+        assert_that(compiled.import_kinds["csv"], is_({ImportKind.FunctionLocal}))
+
+    def test_code_imports_with_small_int_levels(self):
+        # Since python 3.14 the level of an import is loaded by LOAD_SMALL_INT instead of LOAD_CONST
+        get_instructions = dis.get_instructions
+
+        def small_int_instructions(code):
+            for instruction in get_instructions(code):
+                is_level = instruction.opname == "LOAD_CONST" and isinstance(instruction.argval, int)
+                yield instruction._replace(opname="LOAD_SMALL_INT") if is_level else instruction
+
+        code = compile("import json\nfrom ..package import name\n", "compiledmod.py", "exec")
+        with mock.patch.object(module_loader.dis, "get_instructions", small_int_instructions):
+            imports = list(module_loader.iter_code_imports(code))
+        assert_that(imports, contains_exactly(("json", None, 0, False), ("package", ("name",), 2, False)))
+
+    def test_missing_modules_are_cached(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_path / "main.py",
+            textwrap.dedent(
+                """
+                import os
+                import pyprince_missing_module
+                import localpkg.missing_submodule
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_path / "localpkg" / "__init__.py", "")
+        gen.generate_files(self.test_root)
+        entry_dir = self.test_root / test_path
+
+        project = parse_project(entry_dir / "main.py", shallow_stdlib=True)
+        assert_that(
+            project.get_unresolved_modules(), has_items("pyprince_missing_module", "localpkg.missing_submodule")
+        )
+        cache = ProjectCache()
+        with io.StringIO() as stream:
+            ProjectCache().serialize(stream, project)
+            stream.seek(0)
+            cache.load_stream(stream)
+
+        search_paths = [str(entry_dir)] + sys.path
+        assert_that(
+            cache.find_missing_modules(search_paths, entry_dir),
+            has_items("pyprince_missing_module", "localpkg.missing_submodule"),
+        )
+
+        # Modules which appear in the entrypoint directory or in the package directory are not missing anymore
+        (entry_dir / "pyprince_missing_module.py").write_text("")
+        (entry_dir / "localpkg" / "missing_submodule.py").write_text("")
+        missing = cache.find_missing_modules(search_paths, entry_dir)
+        assert_that("pyprince_missing_module" in missing, is_(False))
+        assert_that("localpkg.missing_submodule" in missing, is_(False))
+
+        # Changes in sys.path invalidate the cached names
+        assert_that(cache.find_missing_modules(search_paths + [str(entry_dir / "localpkg")], entry_dir), is_(set()))
+
+    def test_missing_modules_are_searched_once(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import pyprince_missing_module\nimport helper\n")
+        gen.add_file(test_path / "helper.py", "import pyprince_missing_module\n")
+        gen.generate_files(self.test_root)
+
+        with mock.patch.object(
+            ModuleFinder, "find_spec", autospec=True, side_effect=ModuleFinder.find_spec
+        ) as find_spec:
+            project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        assert_that(project.get_unresolved_modules(), has_items("pyprince_missing_module"))
+        searched = [call.args[1] for call in find_spec.call_args_list]
+        assert_that(searched.count("pyprince_missing_module"), is_(1))
+
+    def test_progress_is_logged_with_fields(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import first\nimport second\n")
+        gen.add_file(test_path / "first.py", "")
+        gen.add_file(test_path / "second.py", "")
+        gen.generate_files(self.test_root)
+
+        records = []
+        sink_id = logger.add(lambda message: records.append(message.record), level="INFO")
+        try:
+            with mock.patch.object(project_parser, "PROGRESS_LOG_INTERVAL", 1):
+                parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        finally:
+            logger.remove(sink_id)
+
+        progress = [record["extra"] for record in records if "remaining" in record["extra"]]
+        assert_that(progress, has_items(has_entries({"parsed": 1, "cached": 0}), has_entries({"parsed": 2})))
+
+    def test_progress_includes_shallow_submodules(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import os\n")
+        gen.generate_files(self.test_root)
+
+        records = []
+        sink_id = logger.add(lambda message: records.append(message.record), level="INFO")
+        try:
+            with mock.patch.object(project_parser, "PROGRESS_LOG_INTERVAL", 1):
+                project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        finally:
+            logger.remove(sink_id)
+
+        # The submodules of os are parsed shallowly, without passing through the queue
+        parsed = [record["extra"]["parsed"] for record in records if "remaining" in record["extra"]]
+        assert_that(max(parsed), is_(len(project.get_modules()) - 1))
@@ -0,0 +1,67 @@
+from hamcrest import assert_that, equal_to
+
+import tests.testutils as testutils
+from pyprince import reconciler, tracer
+from pyprince.parser import ImportKind, Module, ModuleIdentifier, Project
+
+
+class TestReconciler(testutils.PyPrinceTestCase):
+    def test_reconcile_static_and_traced_imports(self):
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main"), "main.py", None)
+        main_mod.add_submodule(ModuleIdentifier("pkg.util"))
+        main_mod.add_submodule(ModuleIdentifier("winreg"))
+        main_mod.add_submodule(ModuleIdentifier("sys"))
+        util_mod = Module(ModuleIdentifier("pkg.util"), "pkg/util.py", None)
+        util_mod.add_submodule(ModuleIdentifier("json"))
+        for mod in [main_mod, util_mod]:
+            project.add_module(mod)
+        project.add_root_module("main")
+
+        trace = tracer.ImportTrace("main", preloaded={"sys", "encodings"})
+        trace.edges = {"main": ["pkg.util", "sys"], "pkg.util": ["plugin"], "plugin": ["plugin_helpers"]}
+        trace.paths = {name: None for name in ["sys", "encodings", "pkg", "pkg.util", "plugin", "plugin_helpers"]}
+        trace.import_times["late"] = tracer.ModuleImportTime(1, 1, 0, "plugin")
+        trace.paths["late"] = None
+        # Added to sys.modules by the plugin package, and an orphan without any known importer
+        trace.paths["plugin.io"] = None
+        trace.paths["orphan"] = None
+
+        report = reconciler.reconcile(project, trace)
+        assert_that(
+            report.over_approximated, equal_to({"winreg": ["main", "winreg"], "json": ["main", "pkg.util", "json"]})
+        )
+        assert_that(
+            report.under_approximated,
+            equal_to(
+                {
+                    "plugin": ["main", "pkg.util", "plugin"],
+                    "plugin_helpers": ["main", "pkg.util", "plugin", "plugin_helpers"],
+                    "late": ["main", "pkg.util", "plugin", "late"],
+                    "plugin.io": ["main", "pkg.util", "plugin", "plugin.io"],
+                    "orphan": ["main", "orphan"],
+                }
+            ),
+        )
+        assert_that(report.static_module_count, equal_to(6))
+
+    def test_reconcile_skips_import_kinds(self):
+        project = Project()
+        main_mod = Module(ModuleIdentifier("main"), "main.py", None)
+        main_mod.add_submodule(ModuleIdentifier("util"))
+        main_mod.add_submodule(ModuleIdentifier("typeonly"), ImportKind.TypeChecking)
+        main_mod.add_submodule(ModuleIdentifier("lazy"), ImportKind.FunctionLocal)
+        project.add_module(main_mod)
+        project.add_root_module("main")
+
+        trace = tracer.ImportTrace("main")
+        trace.edges = {"main": ["util", "lazy"]}
+        trace.paths = {name: None for name in ["util", "lazy"]}
+
+        report = reconciler.reconcile(project, trace)
+        assert_that(report.over_approximated, equal_to({"typeonly": ["main", "typeonly"]}))
+
+        report = reconciler.reconcile(project, trace, {ImportKind.TypeChecking, ImportKind.FunctionLocal})
+        assert_that(report.over_approximated, equal_to({}))
+        assert_that(report.under_approximated, equal_to({"lazy": ["main", "lazy"]}))
+        assert_that(report.static_module_count, equal_to(2))
@@ -0,0 +1,44 @@
+import io
+import json
+from pathlib import Path
+
+from hamcrest import assert_that, contains_exactly, contains_string, equal_to, has_entries, is_
+
+import tests.testutils as testutils
+from pyprince import server
+from pyprince.main import app
+
+
+class TestServer(testutils.PyPrinceTestCase):
+    def test_requests_are_answered_in_order(self):
+        requests = [
+            json.dumps({"id": 1, "args": ["version"]}),
+            "not json",
+            json.dumps({"id": 2, "args": ["unknown-command"]}),
+            json.dumps({"id": 3, "args": "version"}),
+            json.dumps({"id": 4, "args": ["serve"]}),
+        ]
+        output = io.StringIO()
+        server.serve_requests(app, io.StringIO("\n".join(requests) + "\n"), output)
+
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert_that(responses[0], equal_to({"ready": True, "protocol": server.PROTOCOL_VERSION}))
+        assert_that(responses[1], has_entries({"id": 1, "ok": True, "output": "pyprince version: 0.0.5\n"}))
+        assert_that([response["id"] for response in responses[2:]], contains_exactly(None, 2, 3, 4))
+        assert_that(all(response["ok"] is False for response in responses[2:]), is_(True))
+        assert_that(responses[3]["error"], equal_to("No such command 'unknown-command'."))
+
+    def test_cycles_are_rejected_for_formats_without_them(self):
+        test_path = Path(self.current_test_name())
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import json\n")
+        gen.generate_files(testutils.get_test_scenarios_dir())
+        entrypoint = str(testutils.get_test_scenarios_dir() / test_path / "main.py")
+
+        request = {"id": 1, "args": ["--quiet", "parse", entrypoint, "--dm", "--cycles", "-f", "csv"]}
+        output = io.StringIO()
+        server.serve_requests(app, io.StringIO(json.dumps(request) + "\n"), output)
+
+        response = json.loads(output.getvalue().splitlines()[1])
+        assert_that(response, has_entries({"id": 1, "ok": False}))
+        assert_that(response["error"], contains_string("--cycles"))
@@ -0,0 +1,118 @@
+from pathlib import Path
+import threading
+from unittest import mock
+
+from hamcrest import assert_that, contains_exactly, contains_inanyorder, equal_to, greater_than, is_, none, not_none
+
+import tests.testutils as testutils
+from pyprince.parser import project_parser
+from pyprince.parser import parse_project, ImportKind, Module, ModuleIdentifier, ModuleKind, SharedModuleCache
+
+
+class TestSharedCache(testutils.PyPrinceTestCase):
+    def setUp(self):
+        self.test_root = testutils.get_test_scenarios_dir()
+        testutils.remove_imported_modules()
+
+    def test_published_modules_are_found_until_their_file_changes(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "shared.py", "import os\n")
+        gen.generate_files(self.test_root)
+        module_path = self.test_root / test_path / "shared.py"
+
+        module = Module(ModuleIdentifier("shared", None, ModuleKind.Source), str(module_path), None)
+        module.add_submodule(ModuleIdentifier("os"))
+        module.add_submodule(ModuleIdentifier("winreg"), ImportKind.PlatformGuarded)
+        publisher = SharedModuleCache(self.test_root / test_path / "shared.db")
+        publisher.add_module(module)
+        publisher.close()
+
+        reader = SharedModuleCache(self.test_root / test_path / "shared.db")
+        cached = reader.find_module("shared", str(module_path))
+        assert_that(cached, not_none())
+        assert_that([sub.name for sub in cached.submodules], contains_exactly("os", "winreg"))
+        assert_that(cached.import_kinds["winreg"], equal_to({ImportKind.PlatformGuarded}))
+        assert_that(cached.kind, is_(ModuleKind.Source))
+        assert_that(reader.find_module("shared", str(self.test_root / test_path / "other.py")), none())
+
+        module_path.write_text("import os\nimport sys\n")
+        assert_that(reader.find_module("shared", str(module_path)), none())
+        reader.close()
+
+    def test_concurrent_publishers(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "README", "")
+        gen.generate_files(self.test_root)
+        database_path = self.test_root / test_path / "shared.db"
+
+        def publish(prefix: str):
+            cache = SharedModuleCache(database_path, batch_size=10)
+            for index in range(50):
+                cache.add_module(Module(ModuleIdentifier(f"{prefix}{index}"), None, None))
+            cache.close()
+
+        threads = [threading.Thread(target=publish, args=(f"thread{index}_",)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reader = SharedModuleCache(database_path)
+        found = [reader.find_module(f"thread{index}_{number}", None) for index in range(4) for number in range(50)]
+        assert_that(all(mod is not None for mod in found), is_(True))
+        reader.close()
+
+    def test_parser_reuses_modules_published_by_other_runs(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import json\nimport helper\n")
+        gen.add_file(test_path / "helper.py", "")
+        gen.generate_files(self.test_root)
+        database_path = self.test_root / test_path / "shared.db"
+
+        first_cache = SharedModuleCache(database_path)
+        first = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True, shared_cache=first_cache)
+        first_cache.close()
+        assert_that(first_cache.hits, equal_to(0))
+
+        second_cache = SharedModuleCache(database_path)
+        second = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True, shared_cache=second_cache)
+        second_cache.close()
+        assert_that(second_cache.hits, greater_than(0))
+        assert_that(second.get_module("json").syntax_tree, none())
+        assert_that(
+            [sub.name for sub in second.get_module("json").submodules],
+            contains_inanyorder(*[sub.name for sub in first.get_module("json").submodules]),
+        )
+        # Project modules depend on the entrypoint, they are always parsed
+        assert_that(second.get_module("helper").syntax_tree, not_none())
+
+    def test_modules_are_published_while_parsing(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import json\nimport csv\n")
+        gen.generate_files(self.test_root)
+
+        events = []
+
+        def publish(cache: SharedModuleCache):
+            events.append("publish")
+            original_publish(cache)
+
+        def parse_module(parser: project_parser.ProjectParser, module_id: ModuleIdentifier):
+            events.append("parse")
+            return original_parse_module(parser, module_id)
+
+        original_publish = SharedModuleCache.publish
+        original_parse_module = project_parser.ProjectParser._parse_module
+        shared_cache = SharedModuleCache(self.test_root / test_path / "shared.db", batch_size=1)
+        with mock.patch.object(SharedModuleCache, "publish", publish), mock.patch.object(
+            project_parser.ProjectParser, "_parse_module", parse_module
+        ):
+            parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True, shared_cache=shared_cache)
+        shared_cache.close()
+        assert_that("publish" in events, is_(True))
+        # The first module is published as soon as its imports are resolved, before the rest is parsed
+        assert_that("parse" in events[events.index("publish") :], is_(True))
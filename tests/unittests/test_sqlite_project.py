@@ -0,0 +1,137 @@
+from pathlib import Path
+import sys
+import textwrap
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    equal_to,
+    has_item,
+    has_items,
+    is_,
+    none,
+    not_none,
+)
+
+import tests.testutils as testutils
+from pyprince import generators
+from pyprince.parser import (
+    parse_project,
+    ImportEdge,
+    ImportKind,
+    ModuleIdentifier,
+    ModuleKind,
+    SqliteProject,
+    SqliteProjectCache,
+)
+
+
+class TestSqliteProject(testutils.PyPrinceTestCase):
+    def setUp(self):
+        self.test_root = testutils.get_test_scenarios_dir()
+        testutils.remove_imported_modules()
+
+    def test_stored_project_has_the_same_dependencies(self):
+        test_path = Path(self._testMethodName)
+        self._generate_project(test_path)
+        entry = self.test_root / test_path / "main.py"
+
+        in_memory = parse_project(entry, shallow_stdlib=True)
+        store = SqliteProject(self.test_root / test_path / "project.db", batch_size=2)
+        stored = parse_project(entry, shallow_stdlib=True, project=store)
+
+        assert_that(
+            generators.describe_module_dependencies(stored).to_dict(),
+            equal_to(generators.describe_module_dependencies(in_memory).to_dict()),
+        )
+        assert_that(list(stored.iter_edges()), equal_to(list(in_memory.iter_edges())))
+        assert_that(stored.get_symbol("storedpkg.helper.help").module_name, equal_to("storedpkg.helper"))
+        assert_that(stored.get_syntax_tree("main"), none())
+        store.close()
+
+    def test_reopened_store(self):
+        test_path = Path(self._testMethodName)
+        self._generate_project(test_path)
+        database_path = self.test_root / test_path / "project.db"
+
+        store = SqliteProject(database_path)
+        parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True, project=store)
+        store.close()
+
+        reopened = SqliteProject(database_path, reset=False)
+        assert_that(reopened.get_root_modules(), contains_exactly("main"))
+        main = reopened.get_module("main")
+        assert_that([sub.name for sub in main.submodules], contains_inanyorder("os", "storedpkg.helper", "json"))
+        assert_that(main.imported_symbols["storedpkg.helper"], equal_to({"help"}))
+        assert_that(main.import_kinds["json"], equal_to({ImportKind.FunctionLocal}))
+        assert_that(main.kind, is_(ModuleKind.Source))
+        assert_that(
+            list(reopened.iter_edges()),
+            has_item(ImportEdge("main", "json", frozenset({ImportKind.FunctionLocal}))),
+        )
+        assert_that(reopened.get_package("storedpkg").modules, equal_to({"storedpkg.helper"}))
+        reopened.close()
+
+    def test_sqlite_project_cache(self):
+        test_path = Path(self._testMethodName)
+        self._generate_project(test_path)
+        database_path = self.test_root / test_path / "cache.db"
+        project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+        saved_cache = SqliteProjectCache(database_path)
+        saved_cache.save(project)
+        saved_cache.close()
+
+        cache = SqliteProjectCache(database_path)
+        cached_os = cache.find_in_cache(ModuleIdentifier("os"))
+        assert_that(cached_os, not_none())
+        assert_that(
+            [sub.name for sub in cached_os.submodules],
+            equal_to([sub.name for sub in project.get_module("os").submodules]),
+        )
+        assert_that(cache.find_in_cache(ModuleIdentifier("main")), none())
+        cache.close()
+
+    def test_sqlite_project_cache_keeps_missing_modules(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import os\nimport pyprince_missing_module\nimport localpkg.missing\n")
+        gen.add_file(test_path / "localpkg" / "__init__.py", "")
+        gen.generate_files(self.test_root)
+        entry_dir = self.test_root / test_path
+        database_path = entry_dir / "cache.db"
+        project = parse_project(entry_dir / "main.py", shallow_stdlib=True)
+        saved_cache = SqliteProjectCache(database_path)
+        saved_cache.save(project)
+        saved_cache.close()
+
+        cache = SqliteProjectCache(database_path)
+        search_paths = [str(entry_dir)] + sys.path
+        assert_that(
+            cache.find_missing_modules(search_paths, entry_dir),
+            has_items("pyprince_missing_module", "localpkg.missing"),
+        )
+        # The lookup directory changed, so the module may be found there
+        (entry_dir / "localpkg" / "missing.py").write_text("")
+        missing = cache.find_missing_modules(search_paths, entry_dir)
+        assert_that("localpkg.missing" in missing, is_(False))
+        assert_that(missing, has_item("pyprince_missing_module"))
+        cache.close()
+
+    def _generate_project(self, test_path: Path):
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_path / "main.py",
+            textwrap.dedent(
+                """
+                import os
+                from storedpkg.helper import help
+
+                def load():
+                    import json
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_path / "storedpkg" / "__init__.py", "")
+        gen.add_file(test_path / "storedpkg" / "helper.py", "def help():\n    pass\n")
+        gen.generate_files(self.test_root)
@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from hamcrest import assert_that, equal_to, is_, none, not_none, starts_with
+
+import tests.testutils as testutils
+from pyprince.parser import constants, parse_project, ModuleIdentifier, ProjectCache
+from pyprince.parser import stdlib_pack
+
+
+class TestStdlibPack(testutils.PyPrinceTestCase):
+    def setUp(self):
+        self.test_root = testutils.get_test_scenarios_dir()
+        testutils.remove_imported_modules()
+
+    def test_pack_is_loaded_with_resolved_paths(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import json\n")
+        gen.generate_files(self.test_root)
+        project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+
+        pack = stdlib_pack.create_pack(project)
+        assert pack is not None
+        json_info = pack[constants.PACKAGE_TAG][constants.STDLIB_PACKAGE_NAME]["json"]
+        assert_that(json_info["path"], equal_to(f"{stdlib_pack.STDLIB_PLACEHOLDER}/json/__init__.py"))
+        packs_dir = self.test_root / test_path / "packs"
+        packs_dir.mkdir()
+        (packs_dir / stdlib_pack.get_pack_name()).write_text(json.dumps(pack))
+
+        project_cache = ProjectCache()
+        assert_that(stdlib_pack.load_matching_pack(project_cache, packs_dir), is_(True))
+        cached_json = project_cache.find_in_cache(ModuleIdentifier("json"))
+        assert_that(cached_json, not_none())
+        assert_that(Path(cached_json.path).samefile(project.get_module("json").path), is_(True))
+        assert_that(
+            [sub.name for sub in cached_json.submodules],
+            equal_to([sub.name for sub in project.get_module("json").submodules]),
+        )
+        assert_that(project_cache.find_in_cache(ModuleIdentifier("main")), none())
+
+    def test_pack_of_different_stdlib_is_not_loaded(self):
+        test_path = Path(self._testMethodName)
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import json\n")
+        gen.generate_files(self.test_root)
+        project = parse_project(self.test_root / test_path / "main.py", shallow_stdlib=True)
+
+        pack = stdlib_pack.create_pack(project)
+        assert pack is not None
+        pack[stdlib_pack.PACK_TAG][stdlib_pack.PACK_SENTINEL_SIZE_TAG] += 1
+        packs_dir = self.test_root / test_path / "packs"
+        packs_dir.mkdir()
+        (packs_dir / stdlib_pack.get_pack_name()).write_text(json.dumps(pack))
+
+        assert_that(stdlib_pack.find_pack(packs_dir), none())
+        assert_that(stdlib_pack.find_pack(self.test_root / test_path / "missing"), none())
+
+    def test_stdlib_module_names(self):
+        names = stdlib_pack.get_stdlib_module_names()
+        assert_that("json" in names, is_(True))
+        assert_that("antigravity" in names, is_(False))
+        assert_that(stdlib_pack.get_pack_name(), starts_with("stdlib-"))
@@ -0,0 +1,86 @@
+from pathlib import Path
+import textwrap
+
+from hamcrest import assert_that, calling, contains_exactly, equal_to, has_items, is_, not_none, raises
+
+import tests.testutils as testutils
+from pyprince import tracer
+from pyprince.utils.error import TracingError
+
+
+class TestTracer(testutils.PyPrinceTestCase):
+    def setUp(self):
+        self.test_root = testutils.get_test_scenarios_dir()
+
+    def test_import_times_are_ordered_by_start(self):
+        trace = tracer.ImportTrace("main", preloaded={"site", "sitecustomize_dependency"})
+        lines = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:        10 |         10 |   sitecustomize_dependency",
+            "import time:        20 |         30 | site",
+            "import time:         5 |          5 |     _json",
+            "import time:         7 |         12 |   json.scanner",
+            "import time:         3 |         15 | json",
+            "import time:         4 |          4 | csv",
+        ]
+        tracer._load_import_times(trace, lines)
+
+        assert_that(trace.order, contains_exactly("json", "json.scanner", "_json", "csv"))
+        assert_that(trace.import_times["json"], equal_to(tracer.ModuleImportTime(3, 15, 0, "main")))
+        assert_that(trace.import_times["json.scanner"], equal_to(tracer.ModuleImportTime(7, 12, 1, "json")))
+        assert_that(trace.import_times["_json"], equal_to(tracer.ModuleImportTime(5, 5, 2, "json.scanner")))
+        assert_that(trace.import_times["csv"], equal_to(tracer.ModuleImportTime(4, 4, 3, "main")))
+
+    def test_trace_program_imports(self):
+        test_path = Path(self.current_test_name())
+        gen = testutils.PackageGenerator()
+        gen.add_file(
+            test_path / "main.py",
+            textwrap.dedent(
+                """
+                import sys
+                import json
+                from tracedpkg import helper
+
+                def load():
+                    import importlib
+                    importlib.import_module("tracedpkg.lazy")
+
+                load()
+                """
+            ).lstrip(),
+        )
+        gen.add_file(test_path / "tracedpkg" / "__init__.py", "")
+        gen.add_file(test_path / "tracedpkg" / "helper.py", "import tracedpkg.lazy\n")
+        gen.add_file(test_path / "tracedpkg" / "lazy.py", "")
+        gen.generate_files(self.test_root)
+
+        trace = tracer.trace_imports(self.test_root / test_path / "main.py")
+        assert_that(trace.returncode, equal_to(0))
+        assert_that(
+            trace.edges["main"], contains_exactly("sys", "json", "tracedpkg.helper", "importlib", "tracedpkg.lazy")
+        )
+        assert_that(trace.edges["tracedpkg.helper"], contains_exactly("tracedpkg.lazy"))
+        assert_that(trace.order, has_items("tracedpkg", "tracedpkg.helper", "tracedpkg.lazy"))
+        assert_that(trace.import_times["tracedpkg.lazy"].loaded_by, equal_to("tracedpkg.helper"))
+        assert_that("sys" in trace.preloaded, is_(True))
+        # The modules of the tracer are not mistaken for preloaded modules, so the import of the program is timed
+        assert_that("json" in trace.preloaded, is_(False))
+        assert_that(trace.import_times["json"].loaded_by, equal_to("main"))
+
+        desc = tracer.describe_import_trace(trace).to_dict()
+        assert_that(
+            desc["edges"]["main"], contains_exactly("sys", "json", "tracedpkg.helper", "importlib", "tracedpkg.lazy")
+        )
+        assert_that(desc["timings"].get("tracedpkg.helper", None), not_none())
+
+    def test_trace_timeout(self):
+        test_path = Path(self.current_test_name())
+        gen = testutils.PackageGenerator()
+        gen.add_file(test_path / "main.py", "import time\ntime.sleep(30)\n")
+        gen.generate_files(self.test_root)
+
+        entry_file = self.test_root / test_path / "main.py"
+        assert_that(
+            calling(tracer.trace_imports).with_args(entry_file, timeout=0.5), raises(TracingError, "timed out after")
+        )